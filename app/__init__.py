@@ -1,7 +1,8 @@
 # app/__init__.py
 import sys
+import time
 from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import QCoreApplication, Qt
+from PySide6.QtCore import QCoreApplication, Qt, QTimer
 from PySide6.QtGui import QGuiApplication
 
 # Function to be called by forgeyt.py
@@ -12,7 +13,10 @@ def start_app():
     # Import necessary components here to avoid circular imports if possible
     # and to keep the initial forgeyt.py lighter.
     try:
-        from .main_window import App # Import the main UI class
+        from utils.startup import profiler # Times each startup phase (only active when launched via forgeyt.py)
+        with profiler.phase("import app.main_window"):
+            from .main_window import App # Import the main UI class
+        from .workers import warm_up_imports # Background import of yt_dlp/requests
         from utils import CURRENT_VERSION # Import version from utils package
     except ImportError as e:
          print(f"Fatal Error: Could not import App or CURRENT_VERSION in app/__init__.py: {e}", file=sys.stderr)
@@ -37,9 +41,19 @@ def start_app():
     QCoreApplication.setApplicationVersion(CURRENT_VERSION)
 
     # --- Create and Run Application ---
-    app = QApplication(sys.argv)
-    window = App() # Instantiate the main window
+    with profiler.phase("QApplication"):
+        app = QApplication(sys.argv)
+    with profiler.phase("App.__init__"):
+        window = App() # Instantiate the main window
+    shown_at = time.perf_counter()
     window.show()
+    # The first timer tick runs after the window's first paint; the report is complete then
+    def _finish_startup_report():
+        profiler.mark("show + first paint", shown_at)
+        profiler.finish()
+    QTimer.singleShot(0, _finish_startup_report)
+    # Load yt_dlp and requests once the window has painted, so the first download starts without the import delay
+    QTimer.singleShot(200, warm_up_imports)
     sys.exit(app.exec()) # Start the Qt event loop
 
 # Expose start_app for import 'from app import start_app'
@@ -0,0 +1,95 @@
+# app/icon_cache.py
+
+import os
+import base64
+import zlib
+
+from PySide6.QtGui import QIcon, QPixmap, QImageReader
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QSize
+
+
+def render_svg_data_uri(data_uri: str, pixel_size: int | None = None) -> QPixmap | None:
+    """ Rasterises a base64 SVG data URI, at pixel_size x pixel_size device pixels if given. """
+    header, encoded_data = data_uri.split(",", 1)
+    if header != "data:image/svg+xml;base64":
+        return None
+    buffer = QBuffer()
+    buffer.setData(QByteArray(base64.b64decode(encoded_data)))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    reader = QImageReader(buffer, QByteArray(b"svg"))
+    if pixel_size:
+        reader.setScaledSize(QSize(pixel_size, pixel_size)) # Render sharp at the target size instead of scaling 24px up
+    image = reader.read()
+    buffer.close()
+    return None if image.isNull() else QPixmap.fromImage(image)
+
+
+class IconCache:
+    """
+    Rendered icons, keyed by (name, theme, logical size, device pixel ratio).
+
+    Each icon is decoded and rasterised once per process; later lookups (every
+    update_icons call, theme switches back and forth) are dictionary hits.
+    With a disk folder, SVG renders are also kept as PNGs, so the next launch
+    loads a small PNG instead of parsing and rasterising the SVG again. The PNG
+    name carries a checksum of the source data, so edited icons are re-rendered.
+    """
+    def __init__(self, disk_folder: str | None = None):
+        self.disk_folder = disk_folder
+        self._icons: dict[tuple, QIcon] = {}
+
+    @staticmethod
+    def key(name: str, theme: str, size: int | None, dpr: float) -> tuple:
+        return (name, theme, size, round(dpr, 2))
+
+    def lookup(self, key: tuple) -> QIcon | None:
+        return self._icons.get(key)
+
+    def store(self, key: tuple, icon: QIcon) -> QIcon:
+        self._icons[key] = icon
+        return icon
+
+    def clear(self):
+        self._icons.clear()
+
+    def from_data_uri(self, key: tuple, data_uri: str) -> QIcon | None:
+        """ Returns the cached icon for key, rendering data_uri (or loading its PNG from disk) on a miss. """
+        icon = self._icons.get(key)
+        if icon is not None:
+            return icon
+        name, theme, size, dpr = key
+        pixel_size = round(size * dpr) if size else None
+        disk_path = self._disk_path(name, theme, pixel_size, data_uri)
+
+        pixmap = None
+        if disk_path and os.path.exists(disk_path):
+            pixmap = QPixmap(disk_path)
+            if pixmap.isNull():
+                pixmap = None
+        if pixmap is None:
+            pixmap = render_svg_data_uri(data_uri, pixel_size)
+            if pixmap is None:
+                return None
+            if disk_path:
+                self._save_to_disk(pixmap, disk_path)
+        if size:
+            pixmap.setDevicePixelRatio(dpr)
+        icon = QIcon()
+        icon.addPixmap(pixmap)
+        return self.store(key, icon)
+
+    # --- Disk Cache ---
+    def _disk_path(self, name: str, theme: str, pixel_size: int | None, data_uri: str) -> str | None:
+        if not self.disk_folder or not pixel_size:
+            return None
+        checksum = zlib.crc32(data_uri.encode("ascii", "ignore"))
+        return os.path.join(self.disk_folder, f"{name}-{theme}-{pixel_size}px-{checksum:08x}.png")
+
+    def _save_to_disk(self, pixmap: QPixmap, disk_path: str):
+        try:
+            os.makedirs(self.disk_folder, exist_ok=True)
+            if not pixmap.save(disk_path, "PNG"):
+                print(f"Warning: Could not write icon cache file '{disk_path}'.")
+        except OSError as e:
+            print(f"Warning: Icon disk cache unavailable: {e}")
+            self.disk_folder = None # Don't retry for every icon
@@ -4,7 +4,6 @@ import sys
 import os
 import json
 import re # Import regex for parsing progress
-import base64 # Import for decoding data URIs
 import threading # Needed for thread references
 import traceback # For detailed error logging
 import subprocess # For os.startfile alternative / explorer opening
@@ -17,19 +16,26 @@ from PySide6.QtWidgets import (
     QApplication, QWidget, QHBoxLayout, QVBoxLayout, QGridLayout, QStackedLayout,
     QPushButton, QLabel, QLineEdit, QComboBox, QTextEdit, QCheckBox, QFrame,
     QSizePolicy, QFileDialog, QMessageBox, QButtonGroup, QScrollArea, QSpacerItem,
-    QProgressBar, QGroupBox, QGraphicsDropShadowEffect
+    QProgressBar, QGroupBox, QGraphicsDropShadowEffect, QTableView, QHeaderView,
+    QAbstractItemView
 )
 from PySide6.QtGui import (
-    QPixmap, QIcon, QFont, QPalette, QColor, QGuiApplication, QTextCursor
+    QPixmap, QIcon, QFont, QPalette, QColor, QGuiApplication, QTextCursor, QDesktopServices
 )
 from PySide6.QtCore import (
     Qt, QThread, QObject, Signal, Slot, QSize, QEvent, QCoreApplication, QPoint,
-    QByteArray
+    QTimer, QUrl, QSortFilterProxyModel
 )
 
 # --- Import App Components ---
 from .ui_constants import * # Import colors, styles, SVGs, template
-from .workers import DownloadWorker, UpdateCheckWorker # Import worker classes
+from .workers import DownloadWorker, UpdateCheckWorker, DedupeWorker # Import worker classes
+from .icon_cache import IconCache # Rendered icons, decoded once per process
+from .models import ( # Download queue model
+    JobQueueModel, JobFilterProxyModel, QUEUE_STATUSES, COL_URL,
+    STATUS_QUEUED, STATUS_RUNNING, STATUS_FINISHED, STATUS_FAILED, STATUS_CANCELLED,
+    LibraryModel, LIB_COL_TITLE, HISTORY_ROW_LIMIT, format_size, parse_speed, parse_eta
+)
 
 # --- CustomMessageBox Import ---
 
@@ -50,15 +56,27 @@ except ImportError:
 try:
     # Assuming utils/__init__.py exports these (or they come from config.py/path.py)
     from utils import (
-        CURRENT_VERSION, config_file, DEFAULT_SETTINGS,
-        load_config, resource_path
+        CURRENT_VERSION, config_file, config_folder, DEFAULT_SETTINGS,
+        load_config, save_config, resource_path
+    )
+    from utils.loglevels import LOG_LEVEL_NAMES
+    from utils.startup import profiler, load_reports, format_report
+    from utils.updates import (
+        DEFAULT_RELEASES_API_URL, UPDATE_CHECK_INTERVALS, UPDATE_CHECK_DELAY_MS,
+        load_update_cache, update_check_due, is_newer_version
     )
+    from utils.catalog import catalog
+    from utils.dedupe import DEDUPE_MODE_LABELS
+    from utils.sidecars import INFOJSON_FORMAT_LABELS
+    from utils.sections import parse_sections
+    from utils.sizebudget import parse_size
     # windowTheme was imported but not used in the App class, removed for now.
     # If needed, add 'windowTheme' back to the import list.
 except ImportError as e:
     print(f"CRITICAL ERROR: Failed importing from 'utils': {e}. Using placeholders.")
     CURRENT_VERSION = "0.0.0-fallback"
     config_file = "config.json"
+    config_folder = os.path.dirname(os.path.abspath(config_file))
     DEFAULT_SETTINGS = {
         "theme": "system",
         "download_path": os.path.expanduser("~"),
@@ -67,6 +85,9 @@ except ImportError as e:
     def load_config():
         print("WARNING: Using fallback load_config(). Returning default settings.")
         return DEFAULT_SETTINGS.copy()
+    def save_config(data):
+        with open(config_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
     def resource_path(relative_path):
         abs_path = os.path.abspath(relative_path)
         print(f"WARNING: Using fallback resource_path(). Path: {abs_path}")
@@ -74,6 +95,24 @@ except ImportError as e:
         # A better implementation would handle frozen executables (PyInstaller)
         base_path = os.path.dirname(__file__)
         return os.path.join(base_path, relative_path)
+    LOG_LEVEL_NAMES = ["quiet", "error", "warning", "info", "debug"]
+    from contextlib import nullcontext
+    class _NoProfiler:
+        def phase(self, name): return nullcontext()
+    profiler = _NoProfiler()
+    def load_reports(count=2): return []
+    def format_report(report, previous=None): return ""
+    DEFAULT_RELEASES_API_URL = "https://api.github.com/repos/bytewired9/forgeyt/releases/latest"
+    UPDATE_CHECK_INTERVALS = {"Every launch": 0}
+    UPDATE_CHECK_DELAY_MS = 2000
+    def load_update_cache(): return {}
+    def update_check_due(cache, api_url, interval_hours): return True
+    def is_newer_version(current_version, latest_version): return False
+    catalog = None # History page shows that the library catalog is unavailable
+    DEDUPE_MODE_LABELS = {"Keep copies": "off"}
+    INFOJSON_FORMAT_LABELS = {"Full .info.json": "full"}
+    def parse_sections(text): return [], [] # Checked again by download()
+    def parse_size(text): return 0 # Checked again by download()
 
 try:
     # Assuming vars/__init__.py exports 'filetypes' from vars/filetypes.py
@@ -96,7 +135,8 @@ class App(QWidget):
     def __init__(self):
         super().__init__()
         try:
-            self._config = load_config()
+            with profiler.phase("load_config"):
+                self._config = load_config()
         except Exception as e:
             print(f"FATAL: Failed to load configuration: {e}. Using defaults.")
             self._config = DEFAULT_SETTINGS.copy()
@@ -107,29 +147,50 @@ class App(QWidget):
             error_box.exec()
 
         self._is_dark_mode = self.detect_dark_mode(self._config.get("theme", "system"))
+        use_disk_icon_cache = self._config.get("icon_disk_cache", DEFAULT_SETTINGS.get("icon_disk_cache", True))
+        self.icon_cache = IconCache(os.path.join(config_folder, "icon_cache") if use_disk_icon_cache else None)
 
         # Page Initialization Flags
         self._home_initialized = False
         self._settings_initialized = False
         self._about_initialized = False
         self._console_initialized = False
+        self._queue_initialized = False
+        self._history_initialized = False
 
         self.current_page = "none"
         self.download_thread: QThread | None = None
         self.download_worker: DownloadWorker | None = None
         self.update_thread: QThread | None = None
         self.update_worker: UpdateCheckWorker | None = None
+        self.dedupe_thread: QThread | None = None
+        self.dedupe_worker: DedupeWorker | None = None
+
+        # Download queue (jobs run one at a time; the rest wait as "Queued")
+        self.queue_model = JobQueueModel(self)
+        self.queue_proxy = JobFilterProxyModel(self)
+        self.queue_proxy.setSourceModel(self.queue_model)
+        self._active_job_id: int | None = None
+
+        # Library catalog shown on the History page
+        self.library_model = LibraryModel(self)
+        self.library_proxy = QSortFilterProxyModel(self)
+        self.library_proxy.setSourceModel(self.library_model)
+        self.library_proxy.setSortRole(Qt.ItemDataRole.UserRole)
 
         self.progress_regex = re.compile(r"\[download\]\s+([\d\.]+%)")
+        self.job_progress_regex = re.compile(r"\[job\]\s+([\d\.]+%)(.*)$") # Aggregate progress over the whole job
+        self.speed_eta_regex = re.compile(r"\bat\s+(\S+/s|\S+x)\s+ETA\s+(\S+)") # Speed and ETA of the current file/step
+        self.preview_regex = re.compile(r"^\[preview\] (.+)$") # Cached thumbnail of the current video
         self._last_download_path: str | None = None
         self._error_already_handled = False
 
-        self.init_ui()
-        self.create_left_frame()
-        self.create_right_frame()
-        self.apply_stylesheet(self._config.get("theme", "system"))
-        self.show_home()
-        self.start_update_check()
+        with profiler.phase("init_ui"): self.init_ui()
+        with profiler.phase("create_left_frame"): self.create_left_frame()
+        with profiler.phase("create_right_frame"): self.create_right_frame()
+        with profiler.phase("apply_stylesheet"): self.apply_stylesheet(self._config.get("theme", "system"))
+        with profiler.phase("show_home"): self.show_home()
+        with profiler.phase("schedule_update_check"): self._schedule_update_check()
 
         screen_geo = QGuiApplication.primaryScreen().availableGeometry()
         if self.height() > screen_geo.height():
@@ -254,27 +315,22 @@ class App(QWidget):
 
         self.update_icons() # Update icons after stylesheet is potentially changed
 
-    def get_icon(self, name: str) -> QIcon:
-        """ Loads an icon, preferring data URIs, then themed files, then base files. """
+    def get_icon(self, name: str, size: int | None = None) -> QIcon:
+        """ Loads an icon, preferring data URIs, then themed files, then base files. Results are cached per theme, size and DPI. """
+        theme = "dark" if self._is_dark_mode else "light"
+        key = self.icon_cache.key(name, theme, size, self._icon_device_pixel_ratio())
+        cached_icon = self.icon_cache.lookup(key)
+        if cached_icon is not None:
+            return cached_icon
         # This method now uses ICON_DATA_URIS imported from ui_constants
         try:
             # 1. Check Data URIs First
             if name in ICON_DATA_URIS: # Use imported dict
-                data_uri = ICON_DATA_URIS[name]
                 try:
-                    header, encoded_data = data_uri.split(",", 1)
-                    if header == "data:image/svg+xml;base64":
-                        decoded_svg_bytes = base64.b64decode(encoded_data)
-                        byte_array = QByteArray(decoded_svg_bytes)
-                        pixmap = QPixmap()
-                        if pixmap.loadFromData(byte_array, "SVG"):
-                            icon = QIcon()
-                            icon.addPixmap(pixmap)
-                            return icon
-                        else:
-                            print(f"Warning: Failed to load SVG data for icon '{name}'. Falling back.")
-                    else:
-                        print(f"Warning: Unsupported data URI format for icon '{name}'. Falling back.")
+                    icon = self.icon_cache.from_data_uri(key, ICON_DATA_URIS[name])
+                    if icon is not None:
+                        return icon
+                    print(f"Warning: Failed to load SVG data for icon '{name}'. Falling back.")
                 except Exception as e:
                     print(f"Error processing data URI for icon '{name}': {e}. Falling back.")
 
@@ -282,52 +338,57 @@ class App(QWidget):
             icon_suffix = "_dark" if self._is_dark_mode else ""
             try: # Check themed PNG
                 themed_path_png = resource_path(f"assets/{name}{icon_suffix}.png")
-                if os.path.exists(themed_path_png): return QIcon(themed_path_png)
+                if os.path.exists(themed_path_png): return self.icon_cache.store(key, QIcon(themed_path_png))
             except Exception as e: print(f"Warning: Error checking themed PNG for '{name}': {e}")
 
             try: # Check base PNG
                 base_path_png = resource_path(f"assets/{name}.png")
-                if os.path.exists(base_path_png): return QIcon(base_path_png)
+                if os.path.exists(base_path_png): return self.icon_cache.store(key, QIcon(base_path_png))
             except Exception as e: print(f"Warning: Error checking base PNG for '{name}': {e}")
 
             if name == "ForgeYT": # Fallback for main icon (.ico)
                 try:
                     base_path_ico = resource_path(f"assets/{name}.ico")
-                    if os.path.exists(base_path_ico): return QIcon(base_path_ico)
+                    if os.path.exists(base_path_ico): return self.icon_cache.store(key, QIcon(base_path_ico))
                 except Exception as e: print(f"Warning: Error checking ICO for '{name}': {e}")
 
             if name not in ICON_DATA_URIS: # Only warn if file wasn't found AND wasn't a data URI
                  print(f"Warning: Icon asset '{name}' not found (checked data URI, files: .png, {icon_suffix}.png, .ico).")
-            return QIcon() # Return empty icon
+            return self.icon_cache.store(key, QIcon()) # Remember the miss too, so the disk isn't checked again
 
         except Exception as e:
             print(f"Error loading icon '{name}': {e}")
             return QIcon()
 
+    def _icon_device_pixel_ratio(self) -> float:
+        """ Device pixel ratio icons are rendered for (the window's screen once shown, else the primary screen). """
+        screen = self.screen() if self.isVisible() else QGuiApplication.primaryScreen()
+        return screen.devicePixelRatio() if screen else 1.0
+
+    def _set_button_icon(self, button: QPushButton, name: str, size: QSize):
+        """ Sets a cached icon, skipping the call when the button already shows it. """
+        icon = self.get_icon(name, size.width())
+        if button.icon().cacheKey() != icon.cacheKey():
+            button.setIcon(icon)
+        if button.iconSize() != size:
+            button.setIconSize(size)
+
     def update_icons(self):
         nav_icon_size = QSize(20, 20)
         start_icon_size = QSize(28, 28)
         stop_icon_size = QSize(24, 24)
 
-        if hasattr(self, 'home_button'):
-            self.home_button.setIcon(self.get_icon("Home"))
-            self.home_button.setIconSize(nav_icon_size)
-        if hasattr(self, 'settings_button'):
-            self.settings_button.setIcon(self.get_icon("Settings"))
-            self.settings_button.setIconSize(nav_icon_size)
-        if hasattr(self, 'about_button'):
-            self.about_button.setIcon(self.get_icon("About"))
-            self.about_button.setIconSize(nav_icon_size)
-        if hasattr(self, 'console_button'):
-            self.console_button.setIcon(self.get_icon("Console"))
-            self.console_button.setIconSize(nav_icon_size)
+        nav_icons = [('home_button', "Home"), ('queue_button', "Queue"), ('history_button', "History"),
+                     ('settings_button', "Settings"),
+                     ('about_button', "About"), ('console_button', "Console")]
+        for attr, icon_name in nav_icons:
+            if hasattr(self, attr):
+                self._set_button_icon(getattr(self, attr), icon_name, nav_icon_size)
         if hasattr(self, 'start_button'):
             # Use the new "Download" URI SVG
-            self.start_button.setIcon(self.get_icon("Download"))
-            self.start_button.setIconSize(start_icon_size)
+            self._set_button_icon(self.start_button, "Download", start_icon_size)
         if hasattr(self, 'stop_button'):
-            self.stop_button.setIcon(self.get_icon("stop"))
-            self.stop_button.setIconSize(stop_icon_size)
+            self._set_button_icon(self.stop_button, "stop", stop_icon_size)
         if hasattr(self, 'update_button') and self.update_button is not None:
             if update_icon := self.get_icon("update"):
                 self.update_button.setIcon(update_icon)
@@ -373,6 +434,14 @@ class App(QWidget):
         layout.addWidget(self.home_button)
         self.nav_button_group.addButton(self.home_button)
 
+        self.queue_button = self._create_nav_button("Queue", self.show_queue)
+        layout.addWidget(self.queue_button)
+        self.nav_button_group.addButton(self.queue_button)
+
+        self.history_button = self._create_nav_button("History", self.show_history)
+        layout.addWidget(self.history_button)
+        self.nav_button_group.addButton(self.history_button)
+
         self.settings_button = self._create_nav_button("Settings", self.show_settings)
         layout.addWidget(self.settings_button)
         self.nav_button_group.addButton(self.settings_button)
@@ -409,11 +478,15 @@ class App(QWidget):
 
         # Page container widgets
         self.home_page_widget = QWidget()
+        self.queue_page_widget = QWidget()
+        self.history_page_widget = QWidget()
         self.settings_page_widget = QWidget()
         self.about_page_widget = QWidget()
         self.console_page_widget = QWidget()
 
         self.pages_layout.addWidget(self.home_page_widget)
+        self.pages_layout.addWidget(self.queue_page_widget)
+        self.pages_layout.addWidget(self.history_page_widget)
         self.pages_layout.addWidget(self.settings_page_widget)
         self.pages_layout.addWidget(self.about_page_widget)
         self.pages_layout.addWidget(self.console_page_widget)
@@ -443,6 +516,12 @@ class App(QWidget):
         self.progress_bar.setObjectName("progressBar")
         self.progress_bar.hide()
 
+        # Thumbnail of the video being downloaded, served from the thumbnail cache
+        self.thumbnail_preview = QLabel()
+        self.thumbnail_preview.setObjectName("thumbnailPreview")
+        self.thumbnail_preview.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.thumbnail_preview.hide()
+
 
     # --- Page Creation / Update Methods ---
 
@@ -520,6 +599,37 @@ class App(QWidget):
             format_grid.addWidget(self.audio_codec_label, 4, 0, Qt.AlignmentFlag.AlignRight)
             format_grid.addWidget(self.audio_codec_combo, 4, 1)
 
+            # Row 5: Additional Formats (made from the same download)
+            extra_formats_label = QLabel("Also Convert To:")
+            self.extra_formats_entry = QLineEdit(); self.extra_formats_entry.setMinimumWidth(150)
+            self.extra_formats_entry.setPlaceholderText("e.g., mp3, opus")
+            self.extra_formats_entry.setToolTip("Optional: more file types to produce from the same download, converted in one FFmpeg pass.")
+            format_grid.addWidget(extra_formats_label, 5, 0, Qt.AlignmentFlag.AlignRight)
+            format_grid.addWidget(self.extra_formats_entry, 5, 1)
+
+            # Row 6: Sections (time ranges / chapters instead of the whole video)
+            sections_label = QLabel("Time Range:")
+            sections_layout = QHBoxLayout(); sections_layout.setSpacing(10)
+            self.sections_entry = QLineEdit()
+            self.sections_entry.setPlaceholderText("e.g., 1:02:00-1:04:00, 2:10:00-")
+            self.sections_entry.setToolTip("Optional: download only these parts (comma-separated start-end times, each saved as its own file).\n"
+                                           "Leave out start or end for the beginning/end; '*pattern' selects chapters by title.")
+            self.precise_cuts_checkbox = QCheckBox("Precise cuts")
+            self.precise_cuts_checkbox.setToolTip("Re-encode so clips start exactly at the given time (slower). Otherwise clips are cut at the nearest keyframes.")
+            sections_layout.addWidget(self.sections_entry, 1)
+            sections_layout.addWidget(self.precise_cuts_checkbox)
+            format_grid.addWidget(sections_label, 6, 0, Qt.AlignmentFlag.AlignRight)
+            format_grid.addLayout(sections_layout, 6, 1)
+
+            # Row 7: Size budget (best quality that fits)
+            size_budget_label = QLabel("Max File Size:")
+            self.size_budget_entry = QLineEdit(); self.size_budget_entry.setMinimumWidth(150)
+            self.size_budget_entry.setPlaceholderText("e.g., 50MB (Optional)")
+            self.size_budget_entry.setToolTip("Optional: download the best quality that fits this size (e.g., 50MB, 1.5G).\n"
+                                              "If no available format fits, the download is re-encoded to fit.")
+            format_grid.addWidget(size_budget_label, 7, 0, Qt.AlignmentFlag.AlignRight)
+            format_grid.addWidget(self.size_budget_entry, 7, 1)
+
             # ***** FIX 1: Add the format_grid layout to the top_layout *****
             top_layout.addLayout(format_grid)
 
@@ -553,6 +663,9 @@ class App(QWidget):
             initial_checked_state = self._config.get("open_folder_after_download", True)
             self.open_explorer_checkbox.setChecked(bool(initial_checked_state))
             po_layout.addWidget(self.open_explorer_checkbox)
+            self.verbose_logging_checkbox = QCheckBox("Verbose logging for this download")
+            self.verbose_logging_checkbox.setToolTip("Show full yt-dlp, FFmpeg and ForgeYT debug output in the Console for this job only.")
+            po_layout.addWidget(self.verbose_logging_checkbox)
             po_layout.addStretch(1)
             options_layout.addWidget(playlist_output_group)
 
@@ -565,6 +678,9 @@ class App(QWidget):
             mn_layout.addWidget(self.embed_metadata_checkbox)
             self.embed_chapters_checkbox = QCheckBox("Embed chapters")
             mn_layout.addWidget(self.embed_chapters_checkbox)
+            self.split_chapters_checkbox = QCheckBox("Split into chapter files")
+            self.split_chapters_checkbox.setToolTip("Also save each chapter as its own file (in a folder named after the video). The full file is kept.")
+            mn_layout.addWidget(self.split_chapters_checkbox)
             self.thumbnail_checkbox = QCheckBox("Embed thumbnail")
             mn_layout.addWidget(self.thumbnail_checkbox)
             self.write_infojson_checkbox = QCheckBox("Save metadata to .info.json file")
@@ -618,6 +734,7 @@ class App(QWidget):
             # --- Status Container ---
             self.status_container = QWidget()
             status_layout = QVBoxLayout(self.status_container); status_layout.setContentsMargins(0,0,0,0); status_layout.setSpacing(8); status_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            status_layout.addWidget(self.thumbnail_preview, 0, Qt.AlignmentFlag.AlignCenter)
             status_layout.addWidget(self.progress_bar)
             button_label_layout = QHBoxLayout(); button_label_layout.setSpacing(10); button_label_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
             button_label_layout.addWidget(self.loading_label); button_label_layout.addWidget(self.start_button); button_label_layout.addWidget(self.stop_button)
@@ -684,6 +801,201 @@ class App(QWidget):
             self.embed_subs_checkbox.setVisible(not is_audio_only)
             self.autosubs_checkbox.setVisible(not is_audio_only)
 
+    def show_queue(self):
+        """ Creates (if needed) and shows the download queue. """
+        self.current_page = "queue"
+        if not self._queue_initialized:
+            layout = QVBoxLayout(self.queue_page_widget); layout.setSpacing(10)
+            title = QLabel("Download Queue"); title.setObjectName("pageTitle")
+            layout.addWidget(title, 0, Qt.AlignmentFlag.AlignCenter)
+
+            # --- Filter Row ---
+            filter_layout = QHBoxLayout()
+            self.queue_filter_entry = QLineEdit()
+            self.queue_filter_entry.setPlaceholderText("Filter by URL or format...")
+            self.queue_filter_entry.textChanged.connect(self.queue_proxy.set_text_filter)
+            self.queue_status_combo = QComboBox()
+            self.queue_status_combo.addItems(["All"] + QUEUE_STATUSES)
+            self.queue_status_combo.currentTextChanged.connect(self.queue_proxy.set_status_filter)
+            self.queue_clear_button = QPushButton("Clear Finished")
+            self.queue_clear_button.setObjectName("actionButton")
+            self.queue_clear_button.clicked.connect(self.queue_model.remove_finished)
+            filter_layout.addWidget(self.queue_filter_entry, 1)
+            filter_layout.addWidget(self.queue_status_combo)
+            filter_layout.addWidget(self.queue_clear_button)
+            layout.addLayout(filter_layout)
+
+            # --- Table ---
+            self.queue_view = QTableView()
+            self.queue_view.setModel(self.queue_proxy)
+            self.queue_view.setSortingEnabled(True)
+            self.queue_view.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+            self.queue_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+            self.queue_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            self.queue_view.setWordWrap(False)
+            self.queue_view.setAlternatingRowColors(True)
+            # Fixed row heights and interactive columns: the view never measures 50k rows
+            vertical_header = self.queue_view.verticalHeader()
+            vertical_header.setVisible(False)
+            vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+            vertical_header.setDefaultSectionSize(24)
+            horizontal_header = self.queue_view.horizontalHeader()
+            horizontal_header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+            horizontal_header.setSectionResizeMode(COL_URL, QHeaderView.ResizeMode.Stretch)
+            layout.addWidget(self.queue_view, 1)
+
+            self.queue_summary_label = QLabel("")
+            layout.addWidget(self.queue_summary_label)
+            self.queue_model.rowsInserted.connect(self._update_queue_summary)
+            self.queue_model.modelReset.connect(self._update_queue_summary)
+            self._queue_initialized = True
+
+        self._update_queue_summary()
+        self.pages_layout.setCurrentWidget(self.queue_page_widget)
+        if hasattr(self, 'queue_button'):
+            self.queue_button.setChecked(True)
+
+    @Slot()
+    def _update_queue_summary(self):
+        if not self._queue_initialized: return
+        waiting = self.queue_model.count_with_status(STATUS_QUEUED)
+        self.queue_summary_label.setText(f"{self.queue_model.rowCount()} jobs, {waiting} waiting")
+
+    def show_history(self):
+        """ Creates (if needed) and shows the searchable history of the library catalog. """
+        self.current_page = "history"
+        if not self._history_initialized:
+            layout = QVBoxLayout(self.history_page_widget); layout.setSpacing(10)
+            title = QLabel("Download History"); title.setObjectName("pageTitle")
+            layout.addWidget(title, 0, Qt.AlignmentFlag.AlignCenter)
+
+            # --- Search Row ---
+            search_layout = QHBoxLayout()
+            self.history_search_entry = QLineEdit()
+            self.history_search_entry.setPlaceholderText("Search title, uploader, URL or path...")
+            # Query once typing pauses instead of on every keystroke
+            self._history_search_timer = QTimer(self)
+            self._history_search_timer.setSingleShot(True)
+            self._history_search_timer.setInterval(200)
+            self._history_search_timer.timeout.connect(self.refresh_history)
+            self.history_search_entry.textChanged.connect(self._history_search_timer.start)
+            self.history_prune_button = QPushButton("Remove Missing")
+            self.history_prune_button.setObjectName("actionButton")
+            self.history_prune_button.setToolTip("Forget entries whose file was moved or deleted")
+            self.history_prune_button.clicked.connect(self.prune_history)
+            self.history_dedupe_button = QPushButton("Deduplicate")
+            self.history_dedupe_button.setObjectName("actionButton")
+            self.history_dedupe_button.setToolTip("Replace identical files with links to one copy (see Settings > Advanced)")
+            self.history_dedupe_button.clicked.connect(self.start_library_dedupe)
+            search_layout.addWidget(self.history_search_entry, 1)
+            search_layout.addWidget(self.history_prune_button)
+            search_layout.addWidget(self.history_dedupe_button)
+            layout.addLayout(search_layout)
+
+            # --- Table ---
+            self.history_view = QTableView()
+            self.history_view.setModel(self.library_proxy)
+            self.history_view.setSortingEnabled(True)
+            self.history_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+            self.history_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            self.history_view.setWordWrap(False)
+            self.history_view.setAlternatingRowColors(True)
+            self.history_view.setToolTip("Double-click to open the containing folder")
+            self.history_view.doubleClicked.connect(self._open_history_entry)
+            vertical_header = self.history_view.verticalHeader()
+            vertical_header.setVisible(False)
+            vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+            vertical_header.setDefaultSectionSize(24)
+            horizontal_header = self.history_view.horizontalHeader()
+            horizontal_header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+            horizontal_header.setSectionResizeMode(LIB_COL_TITLE, QHeaderView.ResizeMode.Stretch)
+            layout.addWidget(self.history_view, 1)
+
+            self.history_summary_label = QLabel("")
+            layout.addWidget(self.history_summary_label)
+            self._history_initialized = True
+
+        self.refresh_history()
+        self.pages_layout.setCurrentWidget(self.history_page_widget)
+        if hasattr(self, 'history_button'):
+            self.history_button.setChecked(True)
+
+    @Slot()
+    def refresh_history(self):
+        """ Re-runs the history search (newest first, capped at HISTORY_ROW_LIMIT rows). """
+        if not self._history_initialized: return
+        if catalog is None:
+            self.history_summary_label.setText("Library catalog unavailable.")
+            return
+        try:
+            rows = catalog.search(self.history_search_entry.text(), limit=HISTORY_ROW_LIMIT)
+            total = catalog.count()
+        except Exception as e:
+            print(f"Warning: Could not read library catalog: {e}")
+            self.history_summary_label.setText(f"Could not read library catalog: {e}")
+            return
+        self.library_model.set_rows(rows)
+        shown_size = format_size(sum(row.get("filesize") or 0 for row in rows)) or "0 B"
+        self.history_summary_label.setText(f"{len(rows)} of {total} files shown ({shown_size})")
+
+    @Slot()
+    def prune_history(self):
+        if catalog is None: return
+        try:
+            removed = catalog.prune_missing()
+        except Exception as e:
+            self.show_custom_messagebox("Error", f"Could not update library catalog: {e}", QMessageBox.Icon.Warning); return
+        self.update_console_output(f"[history] Removed {removed} missing file(s) from the library catalog.")
+        self.refresh_history()
+
+    @Slot()
+    def start_library_dedupe(self):
+        """ Hashes catalogued files and links duplicates in a background thread. """
+        if self.dedupe_thread and self.dedupe_thread.isRunning(): return
+        mode = self._config.get("dedupe_mode", DEFAULT_SETTINGS.get("dedupe_mode", "reflink"))
+        if mode == "off":
+            self.show_custom_messagebox("Deduplication Off", "Choose a link type for duplicates in Settings > Advanced first.", QMessageBox.Icon.Information); return
+        self.history_dedupe_button.setEnabled(False)
+        self.history_summary_label.setText("Deduplicating...")
+        self.dedupe_thread = QThread(self)
+        self.dedupe_worker = DedupeWorker(mode)
+        self.dedupe_worker.moveToThread(self.dedupe_thread)
+        self.dedupe_worker.progress_update.connect(lambda message: self.update_console_output(f"[dedupe] {message}"))
+        self.dedupe_worker.dedupe_finished.connect(self._on_library_dedupe_finished)
+        self.dedupe_worker.error.connect(lambda message: self.show_custom_messagebox("Error", message, QMessageBox.Icon.Warning))
+        self.dedupe_worker.dedupe_finished.connect(self.dedupe_thread.quit)
+        self.dedupe_worker.error.connect(self.dedupe_thread.quit)
+        self.dedupe_thread.started.connect(self.dedupe_worker.run)
+        self.dedupe_thread.finished.connect(self.dedupe_worker.deleteLater)
+        self.dedupe_thread.finished.connect(self.dedupe_thread.deleteLater)
+        self.dedupe_thread.finished.connect(self._cleanup_dedupe_thread_references)
+        self.dedupe_thread.start()
+
+    @Slot(dict)
+    def _on_library_dedupe_finished(self, report: dict):
+        summary = (f"Linked {report['linked']} duplicate file(s), reclaimed {format_size(report['bytes']) or '0 B'}. "
+                   f"Hashed {report['hashed']} file(s).")
+        if report["failed"]:
+            summary += f" {report['failed']} file(s) could not be read."
+        self.update_console_output(f"[dedupe] {summary}")
+        self.show_custom_messagebox("Deduplication Complete", summary)
+
+    @Slot()
+    def _cleanup_dedupe_thread_references(self):
+        self.dedupe_thread = None
+        self.dedupe_worker = None
+        if self._history_initialized:
+            self.history_dedupe_button.setEnabled(True)
+            self.refresh_history()
+
+    def _open_history_entry(self, proxy_index):
+        entry = self.library_model.row_data(self.library_proxy.mapToSource(proxy_index).row())
+        if not entry: return
+        folder = os.path.dirname(entry["path"])
+        if not os.path.isdir(folder):
+            self.show_custom_messagebox("Not Found", f"Folder no longer exists:\n{folder}", QMessageBox.Icon.Warning); return
+        QDesktopServices.openUrl(QUrl.fromLocalFile(folder))
+
     def show_settings(self):
         """ Creates (if needed) and shows the Settings page content. """
         self.current_page = "settings"
@@ -742,11 +1054,20 @@ class App(QWidget):
             self.check_updates_checkbox.setToolTip("Automatically check for new versions when the application starts.")
             general_layout.addWidget(self.check_updates_checkbox, 1, 0, 1, 2) # Span 2 columns
 
+            # Update Check Interval
+            general_layout.addWidget(QLabel("Update check interval:"), 2, 0)
+            self.update_interval_combo = QComboBox()
+            for label, hours in UPDATE_CHECK_INTERVALS.items():
+                self.update_interval_combo.addItem(label, hours)
+            self._select_update_interval(config_data.get("update_check_interval_hours", DEFAULT_SETTINGS.get("update_check_interval_hours", 24)))
+            self.update_interval_combo.setToolTip("Between checks, the last result is reused without contacting GitHub.")
+            general_layout.addWidget(self.update_interval_combo, 2, 1)
+
             # Clear Console
             self.clear_console_checkbox = QCheckBox("Clear console before each download")
             self.clear_console_checkbox.setChecked(config_data.get("clear_console_before_download", DEFAULT_SETTINGS["clear_console_before_download"]))
             self.clear_console_checkbox.setToolTip("Clears the text in the Console tab when a new download begins.")
-            general_layout.addWidget(self.clear_console_checkbox, 2, 0, 1, 2)
+            general_layout.addWidget(self.clear_console_checkbox, 3, 0, 1, 2)
 
             layout.addWidget(general_group)
 
@@ -779,6 +1100,23 @@ class App(QWidget):
             self.keep_original_default_checkbox.setToolTip("Sets the initial state of the 'Keep original' checkbox on the Home page.")
             download_layout.addWidget(self.keep_original_default_checkbox, 2, 0, 1, 3)
 
+            # Skip Downloads Already In The Library Catalog
+            self.skip_existing_checkbox = QCheckBox("Skip videos already downloaded in the same format")
+            self.skip_existing_checkbox.setChecked(config_data.get("skip_existing_downloads", DEFAULT_SETTINGS.get("skip_existing_downloads", True)))
+            self.skip_existing_checkbox.setToolTip("Checks the download history (library catalog) before downloading each video.")
+            download_layout.addWidget(self.skip_existing_checkbox, 3, 0, 1, 3)
+
+            # Scratch Folder: downloading, merging and converting happen here; finished files move to the download path
+            scratch_label = QLabel("Scratch Folder:")
+            self.scratch_path_entry = QLineEdit(config_data.get("scratch_path", DEFAULT_SETTINGS.get("scratch_path", "")))
+            self.scratch_path_entry.setPlaceholderText("Leave empty to work directly in the download path")
+            self.scratch_path_entry.setToolTip("Optional: a fast local folder (SSD, tmpfs) for partial downloads and intermediate files.\nUseful when the download path is a slow network share.")
+            scratch_folder_button = QPushButton("Select"); scratch_folder_button.setObjectName("selectScratchFolderButton"); scratch_folder_button.setToolTip("Choose scratch folder")
+            scratch_folder_button.clicked.connect(self.select_scratch_directory)
+            download_layout.addWidget(scratch_label, 4, 0)
+            download_layout.addWidget(self.scratch_path_entry, 4, 1)
+            download_layout.addWidget(scratch_folder_button, 4, 2)
+
             layout.addWidget(download_group)
 
 
@@ -804,6 +1142,20 @@ class App(QWidget):
             self.write_infojson_default_checkbox.setChecked(config_data.get("default_write_infojson", DEFAULT_SETTINGS["default_write_infojson"]))
             meta_sub_layout.addWidget(self.write_infojson_default_checkbox, 3, 0)
 
+            # Sidecar format: yt-dlp's full dump, or a compact (compressed) version without format/thumbnail lists
+            infojson_format_layout = QHBoxLayout(); infojson_format_layout.setSpacing(10)
+            self.infojson_format_combo = QComboBox()
+            for label, value in INFOJSON_FORMAT_LABELS.items():
+                self.infojson_format_combo.addItem(label, value)
+            self._select_combo_data(self.infojson_format_combo, config_data.get("infojson_format", DEFAULT_SETTINGS.get("infojson_format", "full")))
+            self.infojson_format_combo.setToolTip("Compact files leave out the format and thumbnail lists, usually most of the size. Read them with 'python -m utils.sidecars <file>'.")
+            self.infojson_per_playlist_checkbox = QCheckBox("One file per playlist")
+            self.infojson_per_playlist_checkbox.setChecked(config_data.get("infojson_per_playlist", DEFAULT_SETTINGS.get("infojson_per_playlist", False)))
+            self.infojson_per_playlist_checkbox.setToolTip("Compact formats only: playlist entries are collected in one .info.jsonl file.")
+            infojson_format_layout.addWidget(self.infojson_format_combo, 1)
+            infojson_format_layout.addWidget(self.infojson_per_playlist_checkbox)
+            meta_sub_layout.addLayout(infojson_format_layout, 3, 1)
+
             meta_sub_layout.addWidget(QLabel("--- Subtitles ---"), 4, 0, 1, 2, Qt.AlignmentFlag.AlignCenter) # Separator
 
             self.download_subs_default_checkbox = QCheckBox("Download subtitles by default")
@@ -850,9 +1202,39 @@ class App(QWidget):
             net_yt_layout.addWidget(sponsorblock_label, 1, 0)
             net_yt_layout.addWidget(self.sponsorblock_default_combo, 1, 1)
 
+            self.sponsorblock_smart_cut_checkbox = QCheckBox("Smart SponsorBlock Cuts")
+            self.sponsorblock_smart_cut_checkbox.setChecked(config_data.get("sponsorblock_smart_cut", DEFAULT_SETTINGS.get("sponsorblock_smart_cut", True)))
+            self.sponsorblock_smart_cut_checkbox.setToolTip("When skipping segments, re-encode only the few frames around each cut.\nOff: cut at the nearest keyframes (faster, but cuts can be off by a few seconds).")
+            net_yt_layout.addWidget(self.sponsorblock_smart_cut_checkbox, 2, 0, 1, 2)
+
             layout.addWidget(net_yt_group)
 
-            # --- GroupBox 5: Advanced (FFmpeg/FFprobe Path) ---
+            # --- GroupBox 5: Logging ---
+            logging_group = QGroupBox("Logging")
+            logging_layout = QGridLayout(logging_group)
+            logging_layout.setColumnStretch(1, 1)
+            logging_layout.setSpacing(10)
+
+            self.log_level_combos = {}
+            log_level_rows = [
+                ("log_level_ytdlp", "yt-dlp Log Level:", "Messages from yt-dlp itself (extraction, download info)."),
+                ("log_level_ffmpeg", "FFmpeg Log Level:", "Messages from FFmpeg postprocessing steps. Also sets FFmpeg's own -loglevel."),
+                ("log_level_forgeyt", "ForgeYT Log Level:", "ForgeYT's own job messages (selected options, paths). 'debug' also prints the final yt-dlp options."),
+            ]
+            for row, (config_key, label_text, tooltip) in enumerate(log_level_rows):
+                combo = QComboBox()
+                combo.addItems(LOG_LEVEL_NAMES)
+                current_level = config_data.get(config_key, DEFAULT_SETTINGS.get(config_key, "info"))
+                level_index = combo.findText(current_level, Qt.MatchFlag.MatchFixedString)
+                if level_index >= 0: combo.setCurrentIndex(level_index)
+                combo.setToolTip(tooltip)
+                logging_layout.addWidget(QLabel(label_text), row, 0)
+                logging_layout.addWidget(combo, row, 1)
+                self.log_level_combos[config_key] = combo
+
+            layout.addWidget(logging_group)
+
+            # --- GroupBox 6: Advanced (FFmpeg/FFprobe Path) ---
             advanced_group = QGroupBox("Advanced")
             advanced_layout = QGridLayout(advanced_group)
             advanced_layout.setColumnStretch(1, 1)
@@ -881,6 +1263,15 @@ class App(QWidget):
             advanced_layout.addWidget(self.ffprobe_path_entry, 1, 1)
             advanced_layout.addWidget(ffprobe_browse_button, 1, 2)
 
+            dedupe_label = QLabel("Duplicate Files:")
+            self.dedupe_mode_combo = QComboBox()
+            for label, mode in DEDUPE_MODE_LABELS.items():
+                self.dedupe_mode_combo.addItem(label, mode)
+            self._select_combo_data(self.dedupe_mode_combo, config_data.get("dedupe_mode", DEFAULT_SETTINGS.get("dedupe_mode", "reflink")))
+            self.dedupe_mode_combo.setToolTip("Byte-identical downloads share one copy on disk. Hard-linked files change together if one is edited; reflinks (btrfs/XFS) don't.")
+            advanced_layout.addWidget(dedupe_label, 2, 0)
+            advanced_layout.addWidget(self.dedupe_mode_combo, 2, 1, 1, 2)
+
             layout.addWidget(advanced_group)
 
 
@@ -915,18 +1306,23 @@ class App(QWidget):
         for button in self.theme_button_group.buttons():
              if button.text().lower() == current_theme: button.setChecked(True); break
         self.check_updates_checkbox.setChecked(config_data.get("check_for_updates_on_startup", DEFAULT_SETTINGS["check_for_updates_on_startup"]))
+        self._select_update_interval(config_data.get("update_check_interval_hours", DEFAULT_SETTINGS.get("update_check_interval_hours", 24)))
         self.clear_console_checkbox.setChecked(config_data.get("clear_console_before_download", DEFAULT_SETTINGS["clear_console_before_download"]))
 
         # Download Defaults
         self.filepath_entry.setText(config_data.get("download_path", DEFAULT_SETTINGS["download_path"]))
         self.open_folder_default_checkbox.setChecked(config_data.get("open_folder_after_download", DEFAULT_SETTINGS["open_folder_after_download"]))
         self.keep_original_default_checkbox.setChecked(config_data.get("default_keep_original", DEFAULT_SETTINGS["default_keep_original"]))
+        self.skip_existing_checkbox.setChecked(config_data.get("skip_existing_downloads", DEFAULT_SETTINGS.get("skip_existing_downloads", True)))
+        self.scratch_path_entry.setText(config_data.get("scratch_path", DEFAULT_SETTINGS.get("scratch_path", "")))
 
         # Metadata & Subtitle Defaults
         self.embed_meta_default_checkbox.setChecked(config_data.get("default_embed_metadata", DEFAULT_SETTINGS["default_embed_metadata"]))
         self.embed_chapters_default_checkbox.setChecked(config_data.get("default_embed_chapters", DEFAULT_SETTINGS["default_embed_chapters"]))
         self.embed_thumb_default_checkbox.setChecked(config_data.get("default_embed_thumbnail", DEFAULT_SETTINGS["default_embed_thumbnail"]))
         self.write_infojson_default_checkbox.setChecked(config_data.get("default_write_infojson", DEFAULT_SETTINGS["default_write_infojson"]))
+        self._select_combo_data(self.infojson_format_combo, config_data.get("infojson_format", DEFAULT_SETTINGS.get("infojson_format", "full")))
+        self.infojson_per_playlist_checkbox.setChecked(config_data.get("infojson_per_playlist", DEFAULT_SETTINGS.get("infojson_per_playlist", False)))
         self.download_subs_default_checkbox.setChecked(config_data.get("default_download_subtitles", DEFAULT_SETTINGS["default_download_subtitles"]))
         self.embed_subs_default_checkbox.setChecked(config_data.get("default_embed_subs", DEFAULT_SETTINGS["default_embed_subs"]))
         self.autosubs_default_checkbox.setChecked(config_data.get("default_autosubs", DEFAULT_SETTINGS["default_autosubs"]))
@@ -937,10 +1333,17 @@ class App(QWidget):
         current_sb = config_data.get("default_sponsorblock", DEFAULT_SETTINGS["default_sponsorblock"])
         sb_index = self.sponsorblock_default_combo.findText(current_sb, Qt.MatchFlag.MatchFixedString | Qt.MatchFlag.MatchCaseSensitive)
         if sb_index >= 0: self.sponsorblock_default_combo.setCurrentIndex(sb_index)
+        self.sponsorblock_smart_cut_checkbox.setChecked(config_data.get("sponsorblock_smart_cut", DEFAULT_SETTINGS.get("sponsorblock_smart_cut", True)))
 
         # Advanced
         self.ffmpeg_path_entry.setText(config_data.get("ffmpeg_path_override", DEFAULT_SETTINGS["ffmpeg_path_override"]))
         self.ffprobe_path_entry.setText(config_data.get("ffprobe_path_override", DEFAULT_SETTINGS["ffprobe_path_override"]))
+        self._select_combo_data(self.dedupe_mode_combo, config_data.get("dedupe_mode", DEFAULT_SETTINGS.get("dedupe_mode", "reflink")))
+
+        # Logging
+        for config_key, combo in self.log_level_combos.items():
+            level_index = combo.findText(config_data.get(config_key, DEFAULT_SETTINGS.get(config_key, "info")), Qt.MatchFlag.MatchFixedString)
+            if level_index >= 0: combo.setCurrentIndex(level_index)
 
     @Slot()
     def _browse_executable(self, executable_type: str):
@@ -1082,9 +1485,14 @@ class App(QWidget):
             self.run_command_button = QPushButton("Run")
             self.run_command_button.clicked.connect(self._run_command_from_input)
 
+            self.startup_report_button = QPushButton("Startup Report")
+            self.startup_report_button.setToolTip("Show where the last launch spent its time, compared with the launch before.")
+            self.startup_report_button.clicked.connect(self._show_startup_report)
+
             cmd_input_layout = QHBoxLayout()
             cmd_input_layout.addWidget(self.command_input)
             cmd_input_layout.addWidget(self.run_command_button)
+            cmd_input_layout.addWidget(self.startup_report_button)
 
             layout.addLayout(cmd_input_layout)
 
@@ -1122,6 +1530,15 @@ class App(QWidget):
         except Exception as e:
             self._append_console_output(f"Error: {e}")
 
+    @Slot()
+    def _show_startup_report(self):
+        """ Prints the latest startup report (and its change against the previous launch) to the console. """
+        reports = load_reports(2)
+        if not reports:
+            self._append_console_output("No startup report yet. Reports are written when ForgeYT is launched via forgeyt.py.")
+            return
+        self._append_console_output(format_report(reports[0], reports[1] if len(reports) > 1 else None))
+
     def _append_console_output(self, text: str):
         if hasattr(self, 'console_output') and self._console_initialized:
             self.console_output.append(text)
@@ -1157,14 +1574,15 @@ class App(QWidget):
             'embed_chapters_checkbox', 'thumbnail_checkbox', 'write_infojson_checkbox',
             'subtitles_checkbox', 'subtitle_langs_entry', 'embed_subs_checkbox',
             'autosubs_checkbox', 'rate_limit_entry', 'sponsorblock_combo',
-            'cookie_browse_button', 'cookie_path_label' # Added label for completeness
+            'cookie_browse_button', 'cookie_path_label', # Added label for completeness
+            'verbose_logging_checkbox', 'extra_formats_entry', 'sections_entry', 'precise_cuts_checkbox',
+            'split_chapters_checkbox', 'size_budget_entry'
         ]
         if not self._home_initialized or not all(hasattr(self, w) for w in essential_widgets):
             self.show_custom_messagebox("Error", "UI elements are not ready.", QMessageBox.Icon.Warning); return
 
         url = self.profile_entry.text().strip()
         filetype_key = self.dropdown_menu.currentText().lower()
-        self._last_download_path = None; self._error_already_handled = False
         open_explorer = self.open_explorer_checkbox.isChecked()
 
         # --- Get Options (Existing & New) ---
@@ -1182,6 +1600,7 @@ class App(QWidget):
         # Metadata
         embed_metadata = self.embed_metadata_checkbox.isChecked()
         embed_chapters = self.embed_chapters_checkbox.isChecked()
+        split_chapters = self.split_chapters_checkbox.isChecked()
         write_infojson = self.write_infojson_checkbox.isChecked()
         # Subtitles
         download_subtitles = self.subtitles_checkbox.isChecked() # Master switch
@@ -1193,6 +1612,15 @@ class App(QWidget):
         cookie_file = getattr(self, '_cookie_file_path', None) # Get path stored by the browser slot, default None
         # YouTube Specific
         sponsorblock_choice = self.sponsorblock_combo.currentText()
+        # Logging
+        verbose_logging = self.verbose_logging_checkbox.isChecked()
+        # Fan-out
+        extra_filetypes = [key for key in re.split(r"[\s,;]+", self.extra_formats_entry.text().strip().lower()) if key]
+        # Sections
+        sections = self.sections_entry.text().strip()
+        precise_cuts = self.precise_cuts_checkbox.isChecked()
+        # Size budget
+        size_budget = self.size_budget_entry.text().strip()
 
 
         # --- Basic Validation (existing) ---
@@ -1200,29 +1628,28 @@ class App(QWidget):
         parsed_url = urlparse(url)
         if not parsed_url.scheme or not parsed_url.netloc:
             self.show_custom_messagebox("Error", "Invalid URL format.", QMessageBox.Icon.Warning); return
-        if self.download_thread and self.download_thread.isRunning():
-            self.show_custom_messagebox("Info", "Download already in progress.", QMessageBox.Icon.Information); return
-
-
-        # --- Setup Thread & Worker ---
-        if self._config.get("clear_console_before_download", DEFAULT_SETTINGS.get("clear_console_before_download", False)) and hasattr(self, 'console_output'):
-            self.console_output.clear()
-
-        self.update_download_controls_visibility(is_downloading=True)
-
-        self.download_thread = QThread(self)
-        # Pass ALL options to the worker
-        self.download_worker = DownloadWorker(
-            url=url,
-            filetype=filetype_key,
+        unknown_filetypes = [key for key in extra_filetypes if key not in filetypes]
+        if unknown_filetypes:
+            self.show_custom_messagebox("Error", f"Unknown file type(s): {', '.join(unknown_filetypes)}", QMessageBox.Icon.Warning); return
+        if sections:
+            try:
+                parse_sections(sections)
+            except ValueError as e:
+                self.show_custom_messagebox("Error", f"Invalid time range:\n{e}", QMessageBox.Icon.Warning); return
+        if size_budget:
+            try:
+                parse_size(size_budget)
+            except ValueError as e:
+                self.show_custom_messagebox("Error", f"Invalid file size:\n{e}", QMessageBox.Icon.Warning); return
+        # --- Queue the Job ---
+        # Everything DownloadWorker needs besides url/filetype is kept with the queued job
+        job_options = dict(
             open_explorer_var=open_explorer,
             # Basic Quality/Format
             video_quality=video_quality,
             audio_quality=audio_quality,
-            # *** ADDED: Pass codecs to worker ***
             video_codec=video_codec if video_codec != "Auto" else None, # Pass codec or None if Auto
             audio_codec=audio_codec if audio_codec != "Auto" else None, # Pass codec or None if Auto
-            # *** END ADDED ***
             embed_thumbnail=embed_thumbnail,
             # Playlist
             playlist_range=playlist_range,
@@ -1243,8 +1670,45 @@ class App(QWidget):
             rate_limit=rate_limit,
             cookie_file=cookie_file,
             # YouTube
-            sponsorblock_choice=sponsorblock_choice
+            sponsorblock_choice=sponsorblock_choice,
+            # Logging
+            verbose_logging=verbose_logging,
+            # Fan-out
+            extra_filetypes=extra_filetypes or None,
+            # Sections
+            sections=sections or None,
+            precise_cuts=precise_cuts,
+            split_chapters=split_chapters,
+            # Size budget
+            size_budget=size_budget or None
         )
+        job_id = self.queue_model.add_job(url, filetype_key, job_options)
+
+        if self.download_thread and self.download_thread.isRunning():
+            waiting = self.queue_model.count_with_status(STATUS_QUEUED)
+            self.update_console_output(f"[queue] Added job #{job_id} ({waiting} waiting).")
+            self.loading_label.setText(f"Processing... ({waiting} queued)")
+            return
+
+        self._start_job(job_id)
+
+    def _start_job(self, job_id: int):
+        """ Creates the worker thread for a queued job and starts it. """
+        job = self.queue_model.job(job_id)
+        if job is None: return
+        self._active_job_id = job_id
+        self._last_download_path = None; self._error_already_handled = False
+        self.queue_model.update_job(job_id, status=STATUS_RUNNING)
+
+        # --- Setup Thread & Worker ---
+        if self._config.get("clear_console_before_download", DEFAULT_SETTINGS.get("clear_console_before_download", False)) and hasattr(self, 'console_output'):
+            self.console_output.clear()
+
+        self.update_download_controls_visibility(is_downloading=True)
+
+        self.download_thread = QThread(self)
+        # Pass ALL options to the worker
+        self.download_worker = DownloadWorker(url=job.url, filetype=job.filetype, **job.options)
         self.download_worker.moveToThread(self.download_thread)
 
         # --- Connect Signals & Start (existing logic) ---
@@ -1300,11 +1764,15 @@ class App(QWidget):
         if not self._home_initialized or not hasattr(self, 'start_button'): return
 
         if is_downloading:
-            self.start_button.hide(); self.loading_label.setText("Processing..."); self.loading_label.show()
+            # Start stays available while downloading; new jobs go to the queue
+            self.start_button.setToolTip("Add to Queue"); self.loading_label.setText("Processing..."); self.loading_label.show()
             self.stop_button.setEnabled(True); self.stop_button.setToolTip("Stop Download"); self.stop_button.show()
             self.progress_bar.setValue(0); self.progress_bar.setFormat("%p%"); self.progress_bar.show()
+            self.thumbnail_preview.clear(); self.thumbnail_preview.hide()
         else:
+            self.start_button.setToolTip("Start Download")
             self.start_button.show(); self.loading_label.hide(); self.stop_button.hide(); self.progress_bar.hide()
+            self.thumbnail_preview.hide()
             self.progress_bar.setValue(0)
         self.update_icons()
 
@@ -1315,10 +1783,18 @@ class App(QWidget):
     def update_console_output(self, text: str):
         """ Appends text to console, handles progress updates. """
 
+        # --- 0. Thumbnail Preview (not shown in the console) ---
+        preview_match = self.preview_regex.match(text)
+        if preview_match:
+            self._show_thumbnail_preview(preview_match.group(1))
+            return
+
         # --- 1. Update Progress Bar (Always attempt if progress_bar exists) ---
         # Use hasattr to ensure the progress bar widget has been created
         if hasattr(self, 'progress_bar'):
-            match = self.progress_regex.search(text)
+            # Prefer the job-level aggregate (whole playlist/batch) over the current file's percentage
+            job_match = self.job_progress_regex.search(text)
+            match = job_match or self.progress_regex.search(text)
             if match:
                 try:
                     percent_str = match.group(1).replace('%', '').strip() # Group 1 has "xx.x%"
@@ -1326,9 +1802,18 @@ class App(QWidget):
                     # Clamp value between 0 and 100 just in case
                     percent_int = max(0, min(100, int(percent)))
                     self.progress_bar.setValue(percent_int)
+                    if self._active_job_id is not None:
+                        # Only the changed cells get repainted, batched by the model
+                        speed_eta = self.speed_eta_regex.search(text)
+                        fields = {"progress": round(percent, 1)}
+                        if speed_eta:
+                            speed_text, eta_text = speed_eta.groups()
+                            fields.update(speed_text=speed_text, eta_text=eta_text, speed=parse_speed(speed_text), eta=parse_eta(eta_text))
+                        self.queue_model.update_job(self._active_job_id, **fields)
                     # Update format only if parsing succeeded, keep %p% otherwise
                     if hasattr(self.progress_bar, 'setFormat'):
-                         self.progress_bar.setFormat("%p%")
+                         # Show item count, throughput and ETA of the whole job next to the percentage
+                         self.progress_bar.setFormat(f"%p%{job_match.group(2)}" if job_match else "%p%")
 
                 except (ValueError, TypeError, IndexError) as e:
                     # Print more detailed error if parsing fails
@@ -1369,6 +1854,14 @@ class App(QWidget):
         """ Handles the download_complete signal from the worker. """
         print(f"Download complete signal: Success={success}, Msg='{message_or_path}'")
         self.cleanup_after_thread() # Reset UI first
+        if self._active_job_id is not None:
+            status = STATUS_FINISHED if success else (STATUS_CANCELLED if "cancelled" in message_or_path.lower() else STATUS_FAILED)
+            self.queue_model.update_job(self._active_job_id, status=status, result=message_or_path,
+                                        **({"progress": 100.0, "speed": None, "eta": None, "speed_text": "", "eta_text": ""} if success else {}))
+        if self.queue_model.next_queued() is not None:
+            # More jobs are waiting: log the result instead of blocking the queue with a dialog
+            self.update_console_output(f"[queue] Job #{self._active_job_id} {'finished' if success else 'ended'}: {message_or_path}")
+            return
 
         if success:
             self._last_download_path = message_or_path
@@ -1396,6 +1889,11 @@ class App(QWidget):
         """ Handles errors emitted by the download worker's error signal. """
         print(f"Download error signal: {error_message}")
         self.cleanup_after_thread() # Reset UI
+        if self._active_job_id is not None:
+            self.queue_model.update_job(self._active_job_id, status=STATUS_FAILED, result=error_message)
+        if self.queue_model.next_queued() is not None:
+            self.update_console_output(f"[queue] Job #{self._active_job_id} failed: {error_message}")
+            return
         self.show_custom_messagebox("Download Error", error_message, QMessageBox.Icon.Critical)
         self._error_already_handled = True # Prevent duplicate message
 
@@ -1406,11 +1904,26 @@ class App(QWidget):
         # Optional: Clear input/dropdown here if desired
 
     @Slot()
+    def _show_thumbnail_preview(self, image_path: str):
+        """ Shows a thumbnail next to the progress bar (the file is in the thumbnail cache, so it stays readable). """
+        if not self._home_initialized or not hasattr(self, 'thumbnail_preview'): return
+        pixmap = QPixmap(image_path)
+        if pixmap.isNull(): return # e.g. webp without the Qt image plugin
+        self.thumbnail_preview.setPixmap(pixmap.scaled(QSize(192, 108), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        self.thumbnail_preview.show()
+
     def _cleanup_download_thread_references(self):
         """ Slot to nullify thread/worker references after thread finishes. """
         self.download_thread = None
         self.download_worker = None
         self._error_already_handled = False
+        self._active_job_id = None
+        self._update_queue_summary()
+        self.refresh_history() # Finished files were added to the library catalog
+        # Move on to the next waiting job, if any
+        next_job = self.queue_model.next_queued()
+        if next_job is not None:
+            self._start_job(next_job.job_id)
 
 
     # --- Settings Actions ---
@@ -1429,6 +1942,14 @@ class App(QWidget):
         if selected_dir and self._settings_initialized and hasattr(self, 'filepath_entry'):
             self.filepath_entry.setText(selected_dir)
 
+    @Slot()
+    def select_scratch_directory(self):
+        """ Opens a dialog to select the scratch folder for intermediate files. """
+        current_path = self.scratch_path_entry.text() if self._settings_initialized else ""
+        selected_dir = QFileDialog.getExistingDirectory(self, "Select Scratch Folder", current_path)
+        if selected_dir:
+            self.scratch_path_entry.setText(selected_dir)
+
     @Slot()
     def save_and_apply_settings(self):
         """ Saves current settings from UI to the config file and internal state. """
@@ -1442,16 +1963,21 @@ class App(QWidget):
             theme = theme_button.text().lower()
 
             check_updates = self.check_updates_checkbox.isChecked()
+            update_interval_hours = self.update_interval_combo.currentData()
             clear_console = self.clear_console_checkbox.isChecked()
 
             filepath = self.filepath_entry.text().strip()
             open_folder_default = self.open_folder_default_checkbox.isChecked()
             keep_original_default = self.keep_original_default_checkbox.isChecked()
+            skip_existing = self.skip_existing_checkbox.isChecked()
+            scratch_path = self.scratch_path_entry.text().strip()
 
             embed_meta_default = self.embed_meta_default_checkbox.isChecked()
             embed_chapters_default = self.embed_chapters_default_checkbox.isChecked()
             embed_thumb_default = self.embed_thumb_default_checkbox.isChecked()
             write_infojson_default = self.write_infojson_default_checkbox.isChecked()
+            infojson_format = self.infojson_format_combo.currentData()
+            infojson_per_playlist = self.infojson_per_playlist_checkbox.isChecked()
             download_subs_default = self.download_subs_default_checkbox.isChecked()
             embed_subs_default = self.embed_subs_default_checkbox.isChecked()
             autosubs_default = self.autosubs_default_checkbox.isChecked()
@@ -1459,9 +1985,13 @@ class App(QWidget):
 
             rate_limit_default = self.rate_limit_default_entry.text().strip()
             sponsorblock_default = self.sponsorblock_default_combo.currentText()
+            sponsorblock_smart_cut = self.sponsorblock_smart_cut_checkbox.isChecked()
 
             ffmpeg_path = self.ffmpeg_path_entry.text().strip()
             ffprobe_path = self.ffprobe_path_entry.text().strip()
+            dedupe_mode = self.dedupe_mode_combo.currentData()
+
+            log_levels = {config_key: combo.currentText() for config_key, combo in self.log_level_combos.items()}
 
             # --- Validation ---
             if not filepath: self.show_custom_messagebox("Error", "Download path required.", QMessageBox.Icon.Warning); return
@@ -1474,6 +2004,14 @@ class App(QWidget):
             except OSError as e: self.show_custom_messagebox("Error", f"Invalid Download Path:\n'{filepath}'\nReason: {e}", QMessageBox.Icon.Warning); return
             except Exception as e: self.show_custom_messagebox("Error", f"Path validation error: {e}", QMessageBox.Icon.Warning); return
 
+            # Validate Scratch Folder (optional)
+            if scratch_path:
+                try:
+                    scratch_path = os.path.abspath(os.path.expanduser(scratch_path))
+                    os.makedirs(scratch_path, exist_ok=True)
+                    if not os.access(scratch_path, os.W_OK | os.X_OK): raise OSError(f"Directory not writable/accessible: {scratch_path}")
+                except OSError as e: self.show_custom_messagebox("Error", f"Invalid Scratch Folder:\n'{scratch_path}'\nReason: {e}", QMessageBox.Icon.Warning); return
+
             # Optional: Validate FFmpeg/FFprobe paths if provided (check if file exists and is executable)
             if ffmpeg_path and (not os.path.isfile(ffmpeg_path) or not os.access(ffmpeg_path, os.X_OK)):
                  self.show_custom_messagebox("Warning", f"FFmpeg path override is set, but file not found or not executable:\n{ffmpeg_path}", QMessageBox.Icon.Warning)
@@ -1486,16 +2024,21 @@ class App(QWidget):
             # --- Update internal config ---
             self._config["theme"] = theme
             self._config["check_for_updates_on_startup"] = check_updates
+            self._config["update_check_interval_hours"] = update_interval_hours
             self._config["clear_console_before_download"] = clear_console
 
             self._config["download_path"] = abs_filepath # Save absolute path
             self._config["open_folder_after_download"] = open_folder_default
             self._config["default_keep_original"] = keep_original_default
+            self._config["skip_existing_downloads"] = skip_existing
+            self._config["scratch_path"] = scratch_path
 
             self._config["default_embed_metadata"] = embed_meta_default
             self._config["default_embed_chapters"] = embed_chapters_default
             self._config["default_embed_thumbnail"] = embed_thumb_default
             self._config["default_write_infojson"] = write_infojson_default
+            self._config["infojson_format"] = infojson_format
+            self._config["infojson_per_playlist"] = infojson_per_playlist
             self._config["default_download_subtitles"] = download_subs_default
             self._config["default_embed_subs"] = embed_subs_default
             self._config["default_autosubs"] = autosubs_default
@@ -1503,14 +2046,17 @@ class App(QWidget):
 
             self._config["default_rate_limit"] = rate_limit_default
             self._config["default_sponsorblock"] = sponsorblock_default
+            self._config["sponsorblock_smart_cut"] = sponsorblock_smart_cut
 
             self._config["ffmpeg_path_override"] = ffmpeg_path
             self._config["ffprobe_path_override"] = ffprobe_path
+            self._config["dedupe_mode"] = dedupe_mode
+
+            self._config.update(log_levels)
 
             # --- Write to file ---
             try:
-                with open(config_file, "w", encoding="utf-8") as f:
-                    json.dump(self._config, f, indent=4)
+                save_config(self._config) # Atomic write, also refreshes the shared in-memory config
                 self.show_custom_messagebox("Success", "Settings saved!")
                 # Re-apply theme immediately if changed
                 self.apply_stylesheet(theme)
@@ -1540,8 +2086,7 @@ class App(QWidget):
 
                 # Save defaults to file
                 try:
-                    with open(config_file, "w", encoding="utf-8") as f:
-                        json.dump(self._config, f, indent=4)
+                    save_config(self._config)
                 except IOError as e:
                     print(f"Error writing config file during reset: {traceback.format_exc()}")
                     self.show_custom_messagebox("Error", f"Failed to write defaults file:\n{e}", QMessageBox.Icon.Critical)
@@ -1613,15 +2158,44 @@ class App(QWidget):
     
     # --- Update Check Actions ---
 
+    def _select_update_interval(self, hours):
+        """ Selects the interval combo entry for hours (added as a custom entry if it isn't a preset). """
+        index = self.update_interval_combo.findData(hours)
+        if index < 0:
+            self.update_interval_combo.addItem(f"Every {hours} hours", hours)
+            index = self.update_interval_combo.count() - 1
+        self.update_interval_combo.setCurrentIndex(index)
+
+    @staticmethod
+    def _select_combo_data(combo: QComboBox, value):
+        index = combo.findData(value)
+        if index >= 0: combo.setCurrentIndex(index)
+
+    def _schedule_update_check(self):
+        """ Runs the update check shortly after startup, once the window is up and idle (if enabled). """
+        if not self._config.get("check_for_updates_on_startup", DEFAULT_SETTINGS.get("check_for_updates_on_startup", True)):
+            print("Update check on startup disabled.")
+            return
+        QTimer.singleShot(UPDATE_CHECK_DELAY_MS, self.start_update_check)
+
     @Slot()
     def start_update_check(self):
-        """ Initiates the asynchronous update check. """
+        """ Initiates the asynchronous update check, or reuses the cached result while it is recent. """
         if self.update_thread and self.update_thread.isRunning(): print("Update check running."); return
         self._clear_update_button() # Clear previous button
 
+        api_url = self._config.get("update_check_url") or DEFAULT_RELEASES_API_URL
+        interval_hours = self._config.get("update_check_interval_hours", DEFAULT_SETTINGS.get("update_check_interval_hours", 24))
+        cache = load_update_cache()
+        if not update_check_due(cache, api_url, interval_hours):
+            print(f"Update check skipped: last result ({cache.get('latest_version')}) is recent.")
+            if is_newer_version(CURRENT_VERSION, cache["latest_version"]):
+                self._show_update_button(cache["latest_version"])
+            return
+
         print("Starting async update check...")
         self.update_thread = QThread(self)
-        self.update_worker = UpdateCheckWorker() # Use imported class
+        self.update_worker = UpdateCheckWorker(api_url=api_url) # Use imported class
         self.update_worker.moveToThread(self.update_thread)
 
         # Connect signals
@@ -1728,6 +2302,13 @@ class App(QWidget):
                     print("Warning: Download thread didn't stop gracefully. Terminating."); self.download_thread.terminate(); self.download_thread.wait()
                     download_stopped_ok = False
 
+        # Stop Deduplication Thread (it stops between files)
+        if self.dedupe_thread and self.dedupe_thread.isRunning():
+            print("Stopping deduplication thread...")
+            self.dedupe_worker.request_stop()
+            self.dedupe_thread.quit()
+            self.dedupe_thread.wait(3000)
+
         # Stop Update Check Thread
         if self.update_thread and self.update_thread.isRunning():
             print("Stopping update check thread...")
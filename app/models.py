@@ -0,0 +1,292 @@
+# app/models.py
+
+import itertools
+import re
+import time
+
+from PySide6.QtCore import (
+    Qt, QAbstractTableModel, QSortFilterProxyModel, QModelIndex, QTimer, QObject
+)
+
+# --- Queue Columns / Statuses ---
+QUEUE_COLUMNS = ["#", "URL", "Format", "Status", "Progress", "Speed", "ETA"]
+COL_ID, COL_URL, COL_FORMAT, COL_STATUS, COL_PROGRESS, COL_SPEED, COL_ETA = range(len(QUEUE_COLUMNS))
+# Fields of a QueueJob shown in each column (the "#" column shows the job id), and the ones sorted on
+_COLUMN_FIELDS = ["job_id", "url", "filetype", "status", "progress", "speed_text", "eta_text"]
+_SORT_FIELDS = ["job_id", "url", "filetype", "status", "progress", "speed", "eta"]
+_FIELD_COLUMNS = {field: col for fields in (_COLUMN_FIELDS, _SORT_FIELDS) for col, field in enumerate(fields)}
+_SPEED_REGEX = re.compile(r"^([\d.]+)\s*([KMGTP]?)(i?)B/s$", re.IGNORECASE)
+_UNIT_POWERS = {"": 0, "k": 1, "m": 2, "g": 3, "t": 4, "p": 5}
+
+STATUS_QUEUED = "Queued"
+STATUS_RUNNING = "Downloading"
+STATUS_FINISHED = "Finished"
+STATUS_FAILED = "Failed"
+STATUS_CANCELLED = "Cancelled"
+QUEUE_STATUSES = [STATUS_QUEUED, STATUS_RUNNING, STATUS_FINISHED, STATUS_FAILED, STATUS_CANCELLED]
+
+
+def parse_speed(text: str) -> float | None:
+    """ Bytes per second from a yt-dlp speed string ("2.31MiB/s"), None for "N/A" or "1.50x". """
+    match = _SPEED_REGEX.match(text.strip())
+    if not match:
+        return None
+    number, unit, binary = match.groups()
+    return float(number) * (1024 if binary else 1000) ** _UNIT_POWERS[unit.lower()]
+
+
+def parse_eta(text: str) -> int | None:
+    """ Seconds from an ETA string ("00:42", "1:02:00"), None for "N/A" or "Unknown". """
+    try:
+        parts = [int(part) for part in text.strip().split(":")]
+    except ValueError:
+        return None
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + part
+    return seconds
+
+
+class QueueJob:
+    """ One row of the queue. Slots keep 50k jobs cheap in memory. """
+    __slots__ = ("job_id", "url", "filetype", "status", "progress", "speed", "eta",
+                 "speed_text", "eta_text", "options", "result", "added_at")
+
+    def __init__(self, job_id: int, url: str, filetype: str, options: dict | None = None):
+        self.job_id = job_id
+        self.url = url
+        self.filetype = filetype
+        self.status = STATUS_QUEUED
+        self.progress = 0.0    # 0..100
+        self.speed = None      # Bytes per second, None if unknown (or an FFmpeg step's "1.50x")
+        self.eta = None        # Seconds, None if unknown
+        self.speed_text = ""   # Display string as reported by yt-dlp, e.g. "2.31MiB/s"
+        self.eta_text = ""     # Display string, e.g. "00:42"
+        self.options = options or {}
+        self.result = None     # Final path or error message
+        self.added_at = time.time()
+
+
+class JobQueueModel(QAbstractTableModel):
+    """
+    Table model for the download queue.
+
+    Updates only record which cells changed; a timer flushes them as one dataChanged
+    per contiguous run of rows in each column. Hundreds of progress lines per second
+    then cost a handful of repaints instead of one per line, and only the visible
+    rows are ever painted, so the view stays smooth with tens of thousands of rows.
+    """
+    def __init__(self, parent: QObject | None = None, flush_interval_ms: int = 100):
+        super().__init__(parent)
+        self._jobs: list[QueueJob] = []
+        self._rows: dict[int, int] = {}      # job_id -> row
+        self._dirty: dict[int, set] = {}      # column -> set of dirty rows
+        self._status_counts = dict.fromkeys(QUEUE_STATUSES, 0)
+        self._queued_cursor = 0               # No job before this row is still queued
+        self._ids = itertools.count(1)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_interval_ms)
+        self._flush_timer.timeout.connect(self.flush)
+
+    # --- Qt Model Interface ---
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._jobs)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(QUEUE_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return QUEUE_COLUMNS[section]
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        job = self._jobs[index.row()]
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == COL_PROGRESS:
+                return f"{job.progress:.1f}%"
+            return getattr(job, _COLUMN_FIELDS[col])
+        if role == Qt.ItemDataRole.UserRole: # Raw value, used for sorting
+            value = getattr(job, _SORT_FIELDS[col])
+            if col in (COL_SPEED, COL_ETA): # Floats throughout: Qt doesn't order mixed int/float values
+                # Unknown speeds sort as the slowest, unknown ETAs as the longest
+                return float(value) if value is not None else (-1.0 if col == COL_SPEED else float("inf"))
+            return value
+        if role == Qt.ItemDataRole.ToolTipRole and col in (COL_URL, COL_STATUS):
+            return job.result or job.url
+        if role == Qt.ItemDataRole.TextAlignmentRole and col in (COL_ID, COL_PROGRESS, COL_SPEED, COL_ETA):
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    # --- Job Management ---
+    def add_job(self, url: str, filetype: str, options: dict | None = None) -> int:
+        """ Appends a queued job and returns its id. """
+        job = QueueJob(next(self._ids), url, filetype, options)
+        row = len(self._jobs)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._jobs.append(job)
+        self._rows[job.job_id] = row
+        self._status_counts[STATUS_QUEUED] += 1
+        self.endInsertRows()
+        return job.job_id
+
+    def job(self, job_id: int) -> QueueJob | None:
+        row = self._rows.get(job_id)
+        return self._jobs[row] if row is not None else None
+
+    def next_queued(self) -> QueueJob | None:
+        """ Oldest job that is still waiting to run. """
+        # Jobs are appended and never return to "Queued", so the scan resumes where it stopped
+        while self._queued_cursor < len(self._jobs):
+            job = self._jobs[self._queued_cursor]
+            if job.status == STATUS_QUEUED:
+                return job
+            self._queued_cursor += 1
+        return None
+
+    def count_with_status(self, status: str) -> int:
+        return self._status_counts.get(status, 0)
+
+    def update_job(self, job_id: int, **fields):
+        """
+        Changes fields of a job (status, progress, speed, eta, speed_text, eta_text, result).
+        Only cells whose value actually changed are marked for the next batched flush.
+        """
+        row = self._rows.get(job_id)
+        if row is None:
+            return
+        job = self._jobs[row]
+        for field, value in fields.items():
+            if getattr(job, field) == value:
+                continue
+            if field == "status":
+                self._status_counts[job.status] -= 1
+                self._status_counts[value] = self._status_counts.get(value, 0) + 1
+            setattr(job, field, value)
+            col = _FIELD_COLUMNS.get(field)
+            if col is not None:
+                self._dirty.setdefault(col, set()).add(row)
+        if self._dirty and not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def remove_finished(self):
+        """ Drops finished, failed and cancelled jobs from the queue. """
+        self.flush()
+        keep = [job for job in self._jobs if job.status in (STATUS_QUEUED, STATUS_RUNNING)]
+        if len(keep) == len(self._jobs):
+            return
+        self.beginResetModel()
+        self._jobs = keep
+        self._rows = {job.job_id: row for row, job in enumerate(keep)}
+        for status in (STATUS_FINISHED, STATUS_FAILED, STATUS_CANCELLED):
+            self._status_counts[status] = 0
+        self._queued_cursor = 0
+        self.endResetModel()
+
+    def flush(self):
+        """ Emits the pending changes as one dataChanged per contiguous row range and column. """
+        dirty, self._dirty = self._dirty, {}
+        roles = [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.UserRole]
+        for col, rows in dirty.items():
+            ordered = sorted(rows)
+            start = prev = ordered[0]
+            for row in itertools.chain(ordered[1:], [None]):
+                if row is not None and row == prev + 1:
+                    prev = row
+                    continue
+                self.dataChanged.emit(self.index(start, col), self.index(prev, col), roles)
+                if row is not None:
+                    start = prev = row
+
+
+class JobFilterProxyModel(QSortFilterProxyModel):
+    """ Sorts on raw values and filters the queue by status and URL text. """
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        self._status_filter = None
+        self._text_filter = ""
+        self.setSortRole(Qt.ItemDataRole.UserRole)
+
+    def set_status_filter(self, status: str | None):
+        """ None (or 'All') shows every status. """
+        self._status_filter = None if status in (None, "All") else status
+        self.invalidateFilter()
+
+    def set_text_filter(self, text: str):
+        self._text_filter = text.strip().lower()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        if self._status_filter is None and not self._text_filter:
+            return True
+        job = self.sourceModel()._jobs[source_row]
+        if self._status_filter is not None and job.status != self._status_filter:
+            return False
+        return not self._text_filter or self._text_filter in job.url.lower() or self._text_filter in job.filetype.lower()
+
+
+# --- Library (History) ---
+LIBRARY_COLUMNS = ["Title", "Uploader", "Format", "Size", "Downloaded", "Path"]
+LIB_COL_TITLE, LIB_COL_UPLOADER, LIB_COL_FORMAT, LIB_COL_SIZE, LIB_COL_DATE, LIB_COL_PATH = range(len(LIBRARY_COLUMNS))
+_LIBRARY_FIELDS = ["title", "uploader", "filetype", "filesize", "downloaded_at", "path"]
+HISTORY_ROW_LIMIT = 1000 # Rows loaded per search; narrow the search to see older entries
+
+
+def format_size(num_bytes: int | None) -> str:
+    if not num_bytes:
+        return ""
+    size = float(num_bytes)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class LibraryModel(QAbstractTableModel):
+    """ Read-only table of library catalog rows (dicts as returned by LibraryCatalog.search). """
+    def __init__(self, parent: QObject | None = None):
+        super().__init__(parent)
+        self._rows: list[dict] = []
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(LIBRARY_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return LIBRARY_COLUMNS[section]
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        col = index.column()
+        value = row.get(_LIBRARY_FIELDS[col])
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == LIB_COL_SIZE:
+                return format_size(value)
+            if col == LIB_COL_DATE:
+                return time.strftime("%Y-%m-%d %H:%M", time.localtime(value)) if value else ""
+            return value or ""
+        if role == Qt.ItemDataRole.UserRole: # Raw value, used for sorting
+            return value if value is not None else ""
+        if role == Qt.ItemDataRole.ToolTipRole and col in (LIB_COL_TITLE, LIB_COL_PATH):
+            return row.get("url") if col == LIB_COL_TITLE else value
+        if role == Qt.ItemDataRole.TextAlignmentRole and col == LIB_COL_SIZE:
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def set_rows(self, rows: list[dict]):
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def row_data(self, row: int) -> dict | None:
+        return self._rows[row] if 0 <= row < len(self._rows) else None
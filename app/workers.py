@@ -3,37 +3,61 @@ import os
 import json
 import re # Import regex for parsing progress
 import threading # Import threading
+import time
 import traceback # For detailed error logging
-import requests # For UpdateCheckWorker
 
 from PySide6.QtCore import QObject, Signal, Slot, QThread
 
 # --- Utility Imports with Fallbacks ---
-try:
-    from utils.dl import download as download, DownloadCancelled
-except ImportError as e:
-    print(f"ERROR in workers.py: Failed importing 'utils.dl': {e}. Using placeholder.")
-    def placeholder_download_fallback(url, filetype_key, progress_callback, open_explorer_flag, stop_event):
-        progress_callback.emit(f"PLACEHOLDER: Simulating download for {url} as {filetype_key}")
-        import time
-        for i in range(101):
-            if stop_event.is_set():
-                progress_callback.emit("PLACEHOLDER: Cancelled.")
-                return None # Indicate cancellation
-            progress_callback.emit(f"\r[download] {i}% of 10MiB")
-            time.sleep(0.02)
-        progress_callback.emit("\nPLACEHOLDER: Done.")
-        return os.path.join(os.path.expanduser("~"), f"placeholder_{filetype_key}.file")
-    download = placeholder_download_fallback
-
-    class DownloadCancelled(Exception):
-        pass
+# utils.dl pulls in all of yt_dlp (and its extractor registry) and requests is only needed
+# for the update check, so both are imported on first use instead of before the window shows.
+HEAVY_MODULES = ("utils.dl", "requests")
+
+def load_download():
+    """ Imports utils.dl on first use. Returns (download, DownloadCancelled), or placeholders if it fails. """
+    try:
+        from utils.dl import download, DownloadCancelled
+        return download, DownloadCancelled
+    except ImportError as e:
+        print(f"ERROR in workers.py: Failed importing 'utils.dl': {e}. Using placeholder.")
+        return placeholder_download_fallback, PlaceholderDownloadCancelled
+
+def placeholder_download_fallback(url, filetype_key, progress_callback, open_explorer_flag, stop_event, **kwargs):
+    progress_callback.emit(f"PLACEHOLDER: Simulating download for {url} as {filetype_key}")
+    import time
+    for i in range(101):
+        if stop_event.is_set():
+            progress_callback.emit("PLACEHOLDER: Cancelled.")
+            return None # Indicate cancellation
+        progress_callback.emit(f"\r[download] {i}% of 10MiB")
+        time.sleep(0.02)
+    progress_callback.emit("\nPLACEHOLDER: Done.")
+    return os.path.join(os.path.expanduser("~"), f"placeholder_{filetype_key}.file")
+
+class PlaceholderDownloadCancelled(Exception):
+    pass
+
+def warm_up_imports():
+    """ Imports the heavy modules in a background thread once the window is up, so the first download doesn't wait for them. """
+    def _import_all():
+        for module_name in HEAVY_MODULES:
+            try:
+                __import__(module_name)
+            except Exception as e:
+                print(f"Warning: Background import of '{module_name}' failed: {e}")
+    thread = threading.Thread(target=_import_all, name="import-warmup", daemon=True)
+    thread.start()
+    return thread
 
 try:
     from utils import CURRENT_VERSION
 except ImportError:
     print("ERROR in workers.py: Failed importing 'CURRENT_VERSION' from utils. Using placeholder.")
     CURRENT_VERSION = "0.0.0-fallback"
+
+from utils.updates import (
+    DEFAULT_RELEASES_API_URL, UPDATE_CACHE_FILE, load_update_cache, save_update_cache, is_newer_version
+)
 # --- End Fallbacks ---
 
 
@@ -65,6 +89,15 @@ class DownloadWorker(QObject):
                  rate_limit: str | None, cookie_file: str | None,
                  # YouTube
                  sponsorblock_choice: str,
+                 # Logging
+                 verbose_logging: bool = False,
+                 # Fan-out
+                 extra_filetypes: list[str] | None = None,
+                 # Sections
+                 sections: str | None = None, precise_cuts: bool = False,
+                 split_chapters: bool = False,
+                 # Size budget
+                 size_budget: str | None = None,
                  parent: QObject | None = None):
         super().__init__(parent)
         # Store all parameters
@@ -92,6 +125,12 @@ class DownloadWorker(QObject):
         self.rate_limit = rate_limit
         self.cookie_file = cookie_file
         self.sponsorblock_choice = sponsorblock_choice
+        self.verbose_logging = verbose_logging
+        self.extra_filetypes = extra_filetypes
+        self.sections = sections
+        self.precise_cuts = precise_cuts
+        self.split_chapters = split_chapters
+        self.size_budget = size_budget
         # --- Stop Event (Existing) ---
         self.stop_event = threading.Event()
 
@@ -99,6 +138,7 @@ class DownloadWorker(QObject):
     def run(self):
         """ Executes the actual download function with all options. """
         final_path = None
+        download, DownloadCancelled = load_download() # Usually already warmed up in the background
         try:
             # *** PASS ALL OPTIONS TO download ***
             final_path = download(
@@ -128,7 +168,13 @@ class DownloadWorker(QObject):
                 autosubs=self.autosubs,
                 rate_limit=self.rate_limit,
                 cookie_file=self.cookie_file,
-                sponsorblock_choice=self.sponsorblock_choice
+                sponsorblock_choice=self.sponsorblock_choice,
+                verbose_logging=self.verbose_logging,
+                extra_filetypes=self.extra_filetypes,
+                sections=self.sections,
+                precise_cuts=self.precise_cuts,
+                split_chapters=self.split_chapters,
+                size_budget=self.size_budget
             )
             # --- Result Handling (Existing - slightly refined) ---
             if final_path and not self.stop_event.is_set():
@@ -164,6 +210,12 @@ class UpdateCheckWorker(QObject):
     check_finished = Signal()      # Emits when done, regardless of result
     check_error = Signal(str)      # Emits on error
 
+    def __init__(self, api_url: str = DEFAULT_RELEASES_API_URL, cache_file: str = UPDATE_CACHE_FILE,
+                 parent: QObject | None = None):
+        super().__init__(parent)
+        self.api_url = api_url       # Overridable, e.g. to point at a local stand-in server
+        self.cache_file = cache_file
+
     @Slot()
     def run(self):
         """ Performs the network request and version comparison. """
@@ -177,16 +229,30 @@ class UpdateCheckWorker(QObject):
             self.check_finished.emit()
 
     def _get_latest_release_sync(self) -> str | None:
-        """ Fetches the latest release tag name from GitHub API. """
-        url = "https://api.github.com/repos/bytewired9/forgeyt/releases/latest"
+        """
+        Fetches the latest release tag name from the GitHub API.
+        Sends the cached ETag, so an unchanged release costs a bodiless 304 (which GitHub doesn't count against the rate limit).
+        """
+        import requests # Imported lazily, see HEAVY_MODULES
+        url = self.api_url
         headers = {'Accept': 'application/vnd.github.v3+json', 'X-GitHub-Api-Version': '2022-11-28'}
+        cache = load_update_cache(self.cache_file)
+        if cache.get("api_url") == url and cache.get("etag") and cache.get("latest_version"):
+            headers['If-None-Match'] = cache["etag"]
         try:
             response = requests.get(url, headers=headers, timeout=10)
+            if response.status_code == 304:
+                cache["checked_at"] = time.time()
+                save_update_cache(cache, self.cache_file)
+                return cache["latest_version"]
             response.raise_for_status()
             data = response.json()
             tag_name = data.get('tag_name')
             if tag_name and isinstance(tag_name, str) and '.' in tag_name:
-                return tag_name.lstrip('v')
+                latest_version = tag_name.lstrip('v')
+                save_update_cache({"api_url": url, "checked_at": time.time(),
+                                   "etag": response.headers.get('ETag'), "latest_version": latest_version}, self.cache_file)
+                return latest_version
             else:
                 print(f"Warning: Unexpected tag_name format received: {tag_name}")
                 return None
@@ -196,24 +262,37 @@ class UpdateCheckWorker(QObject):
         except requests.exceptions.RequestException as e:
             print(f"Update check failed: Network error - {e}")
             raise ConnectionError(f"Network error during update check: {e}")
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, ValueError):
             print("Update check failed: Invalid response from GitHub API.")
             raise ValueError("Invalid JSON response from GitHub API.")
 
     def _is_newer_version_sync(self, current_version: str, latest_version: str) -> bool:
         """ Compares two version strings (e.g., '1.2.3'). Handles 'v' prefix. """
+        return is_newer_version(current_version, latest_version)
+
+class DedupeWorker(QObject):
+    """ Worker object that hashes the library and links duplicate files, off the GUI thread. """
+    progress_update = Signal(str)
+    dedupe_finished = Signal(dict) # Report from utils.dedupe.deduplicate_library
+    error = Signal(str)
+
+    def __init__(self, mode: str = "reflink", parent: QObject | None = None):
+        super().__init__(parent)
+        self.mode = mode
+        self.stop_event = threading.Event()
+
+    @Slot()
+    def run(self):
         try:
-            current_parts = list(map(int, current_version.lstrip('v').split('.')))
-            latest_parts = list(map(int, latest_version.lstrip('v').split('.')))
-
-            for i in range(max(len(current_parts), len(latest_parts))):
-                c_part = current_parts[i] if i < len(current_parts) else 0
-                l_part = latest_parts[i] if i < len(latest_parts) else 0
-                if l_part > c_part:
-                    return True
-                if l_part < c_part:
-                    return False
-            return len(latest_parts) > len(current_parts)
-        except (ValueError, TypeError) as e:
-            print(f"Warning: Could not compare version numbers ('{current_version}', '{latest_version}'). Error: {e}")
-            return False
\ No newline at end of file
+            from utils.catalog import catalog
+            from utils.dedupe import deduplicate_library
+            report = deduplicate_library(catalog, self.mode, progress=self.progress_update.emit,
+                                         should_stop=self.stop_event.is_set)
+            catalog.close() # Connections are per thread; this thread ends now
+            self.dedupe_finished.emit(report)
+        except Exception as e:
+            traceback.print_exc()
+            self.error.emit(f"Deduplication failed: {e}")
+
+    def request_stop(self):
+        self.stop_event.set()
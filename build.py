@@ -1,10 +1,55 @@
 import os
+import sys
 import subprocess
 import urllib.request
 import shutil
 import zipfile
 import tempfile
 
+# Step 0: Make sure the GUI still starts fast (heavy modules must stay lazy)
+STARTUP_BUDGET_MS = 1500 # Import time of app.main_window, best of STARTUP_BUDGET_RUNS
+STARTUP_BUDGET_RUNS = 3
+STARTUP_FORBIDDEN_MODULES = ("yt_dlp", "requests") # Loaded in the background after the window shows
+
+def measure_startup_imports():
+    """Imports app.main_window in a fresh interpreter with -X importtime.
+    Returns (cumulative import time in ms, list of imported module names)."""
+    env = os.environ.copy()
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env.setdefault("APPDATA", tempfile.gettempdir()) # utils.config needs it outside Windows
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main_window"],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                            capture_output=True, text=True, check=True)
+    total_us, modules = None, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue # Header line
+        modules.append(name.strip())
+        if name.strip() == "app.main_window":
+            total_us = int(cumulative)
+    if total_us is None:
+        raise RuntimeError("app.main_window did not show up in the import time report.")
+    return total_us / 1000, modules
+
+def check_startup_budget(budget_ms=STARTUP_BUDGET_MS, runs=STARTUP_BUDGET_RUNS):
+    """Fails the build if GUI cold start regressed: too slow, or a heavy module is imported eagerly again."""
+    timings = []
+    for _ in range(runs):
+        elapsed_ms, modules = measure_startup_imports()
+        timings.append(elapsed_ms)
+    eager = sorted({m for m in modules for f in STARTUP_FORBIDDEN_MODULES if m == f or m.startswith(f + ".")})
+    best = min(timings)
+    print(f"Startup import time: {best:.0f} ms (budget {budget_ms} ms, runs: {', '.join(f'{t:.0f}' for t in timings)})")
+    if eager:
+        print(f"Startup check failed: imported before the window shows: {', '.join(eager[:10])}")
+        raise SystemExit(1)
+    if best > budget_ms:
+        print(f"Startup check failed: {best:.0f} ms exceeds the {budget_ms} ms budget.")
+        raise SystemExit(1)
+
 # Step 1: Install packages from requirements.txt
 def install_requirements():
     if os.path.exists("requirements.txt"):
@@ -131,6 +176,9 @@ def main():
     # Install requirements
     install_requirements()
 
+    # Refuse to package a build whose cold start regressed
+    check_startup_budget()
+
     # Download and extract FFmpeg binaries only if ffmpeg.exe and ffprobe.exe don't exist
     ffmpeg_exe = "./ffmpeg/ffmpeg.exe"
     ffprobe_exe = "./ffmpeg/ffprobe.exe"
@@ -156,4 +204,7 @@ def main():
     run_pyinstaller("forgeyt.spec")
 
 if __name__ == "__main__":
-    main()
+    if "--check-startup" in sys.argv:
+        check_startup_budget()
+    else:
+        main()
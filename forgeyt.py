@@ -1,5 +1,7 @@
 # forgeyt.py (Corrected Launcher)
 """Initiating functions for ForgeYT"""
+import time
+_launch_started = time.perf_counter() # Reference point for the startup report
 import os
 import sys
 import traceback # Added for better error reporting
@@ -12,11 +14,24 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
     print(f"Added project root to sys.path: {project_root}")
 
+# --- Startup Profiling ---
+try:
+    from utils.startup import profiler
+    profiler.start(_launch_started)
+    profiler.mark("import utils", _launch_started) # Everything before the profiler could start
+except Exception as e:
+    print(f"Warning: Startup profiler unavailable: {e}")
+    from contextlib import nullcontext
+    class _NoProfiler:
+        def phase(self, name): return nullcontext()
+    profiler = _NoProfiler()
+
 # --- Import and Run ---
 try:
     # Import the main starter function from the app package
     # This function should reside in app/__init__.py
-    from app import start_app
+    with profiler.phase("import app"):
+        from app import start_app
 except ImportError as e:
     print("Fatal Error: Could not import 'start_app' from the 'app' package.", file=sys.stderr)
     print(f"Details: {e}", file=sys.stderr)
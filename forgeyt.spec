@@ -17,8 +17,8 @@ a = Analysis(
     hooksconfig={},
     runtime_hooks=[],
     excludes=[
-        'tkinter', 'unittest', 'email', 'pydoc', 'doctest', 'http', 'xml',
-        'asyncio', 'sqlite3', 'logging.config', 'distutils'
+        'tkinter', 'unittest', 'email', 'pydoc', 'doctest', 'http',
+        'asyncio', 'logging.config', 'distutils'
     ],
     noarchive=False,
     optimize=2,  # Optimize to remove docstrings and asserts
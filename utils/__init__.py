@@ -1,5 +1,4 @@
 """init.py iguess"""
-from .dl import download
 from .config import (
     appdata_path,
     CURRENT_VERSION,
@@ -9,11 +8,21 @@ from .config import (
     makeconfig,
     DEFAULT_SETTINGS,
     load_config,
+    save_config,
+    config_service,
     config_data,
     download_path,
     windowTheme,
     resource_path)
 from .path import add_pwd_to_path
+
+def __getattr__(name):
+    # 'download' lives in utils.dl, which imports all of yt_dlp; load it only when asked for
+    if name == "download":
+        from .dl import download
+        return download
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = [
     'download',
     'appdata_path',
@@ -24,6 +33,8 @@ __all__ = [
     'makeconfig',
     'DEFAULT_SETTINGS',
     'load_config',
+    'save_config',
+    'config_service',
     'config_data',
     'download_path',
     'windowTheme',
@@ -0,0 +1,205 @@
+"""Library catalog: an indexed SQLite record of every file ForgeYT has downloaded"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from utils.dedupe import hash_file
+
+try:
+    from utils.config import config_folder
+except ImportError:
+    config_folder = os.path.join(tempfile.gettempdir(), "ForgeYT")
+
+CATALOG_FILE = os.path.join(config_folder, "library.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    id            INTEGER PRIMARY KEY,
+    video_id      TEXT,
+    url           TEXT,
+    title         TEXT,
+    uploader      TEXT,
+    extractor     TEXT,
+    filetype      TEXT,
+    format_id     TEXT,
+    vcodec        TEXT,
+    acodec        TEXT,
+    filesize      INTEGER,
+    path          TEXT NOT NULL UNIQUE,
+    sha256        TEXT,
+    linked_to     TEXT,
+    downloaded_at REAL NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_downloads_video ON downloads (video_id, filetype);
+CREATE INDEX IF NOT EXISTS idx_downloads_url ON downloads (url);
+CREATE INDEX IF NOT EXISTS idx_downloads_sha256 ON downloads (sha256);
+CREATE INDEX IF NOT EXISTS idx_downloads_date ON downloads (downloaded_at);
+"""
+
+
+class LibraryCatalog:
+    """
+    Downloads recorded in an SQLite database (one row per output file).
+
+    Lookups by video id, URL and hash use indexes, so checking whether something was
+    already downloaded doesn't touch the download folder. Each thread gets its own
+    connection (the GUI reads while a download thread writes); WAL mode lets them
+    work without blocking each other.
+    """
+    def __init__(self, db_path: str = CATALOG_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            if "linked_to" not in {row["name"] for row in conn.execute("PRAGMA table_info(downloads)")}:
+                conn.execute("ALTER TABLE downloads ADD COLUMN linked_to TEXT") # Catalogs from before links were recorded
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """ Closes the calling thread's connection. """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # --- Writing ---
+    def record(self, info: dict, path: str, filetype: str | None = None, url: str | None = None,
+               sha256: str | None = None, compute_hash: bool = True) -> int | None:
+        """
+        Adds (or refreshes) the entry for a finished file from its yt-dlp info_dict.
+        The content hash is computed unless given (or compute_hash is False).
+        Returns the row id, or None if the file doesn't exist.
+        """
+        try:
+            filesize = os.path.getsize(path)
+        except OSError:
+            return None
+        if sha256 is None and compute_hash:
+            try:
+                sha256 = hash_file(path)
+            except OSError as e:
+                print(f"Warning: Could not hash '{path}' for the library catalog: {e}")
+        now = time.time()
+        row = {
+            "video_id": info.get("id"),
+            "url": info.get("webpage_url") or info.get("original_url") or url,
+            "title": info.get("title"),
+            "uploader": info.get("uploader") or info.get("channel"),
+            "extractor": info.get("extractor_key") or info.get("extractor"),
+            "filetype": filetype or info.get("ext"),
+            "format_id": info.get("format_id"),
+            "vcodec": info.get("vcodec"),
+            "acodec": info.get("acodec"),
+            "filesize": filesize,
+            "path": os.path.abspath(path),
+            "sha256": sha256,
+            "linked_to": None, # A (re)written file shares nothing yet
+            "downloaded_at": now,
+            "updated_at": now,
+        }
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                f"INSERT INTO downloads ({', '.join(row)}) VALUES ({', '.join('?' * len(row))}) "
+                "ON CONFLICT(path) DO UPDATE SET "
+                + ", ".join(f"{k} = excluded.{k}" for k in row if k not in ("path", "downloaded_at")),
+                tuple(row.values()))
+            return conn.execute("SELECT id FROM downloads WHERE path = ?", (row["path"],)).fetchone()[0]
+
+    def set_hash(self, path: str, sha256: str):
+        conn = self._connection()
+        with conn:
+            conn.execute("UPDATE downloads SET sha256 = ?, linked_to = NULL, updated_at = ? WHERE path = ?",
+                         (sha256, time.time(), os.path.abspath(path)))
+
+    def set_linked(self, path: str, original: str):
+        """ Records that path was replaced by a reflink or hard link to original. """
+        conn = self._connection()
+        with conn:
+            conn.execute("UPDATE downloads SET linked_to = ?, updated_at = ? WHERE path = ?",
+                         (original, time.time(), os.path.abspath(path)))
+
+    def remove(self, path: str):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM downloads WHERE path = ?", (os.path.abspath(path),))
+
+    def prune_missing(self) -> int:
+        """ Drops entries whose file no longer exists. Returns how many were removed. """
+        conn = self._connection()
+        missing = [(row["path"],) for row in conn.execute("SELECT path FROM downloads")
+                   if not os.path.exists(row["path"])]
+        if missing:
+            with conn:
+                conn.executemany("DELETE FROM downloads WHERE path = ?", missing)
+        return len(missing)
+
+    # --- Lookups ---
+    def find_existing(self, video_id: str | None = None, filetype: str | None = None,
+                      url: str | None = None) -> dict | None:
+        """
+        Most recent entry for a video (by id, or by URL when there is no id), optionally
+        limited to one output type, whose file is still on disk.
+        """
+        if video_id:
+            query, params = "SELECT * FROM downloads WHERE video_id = ?", [video_id]
+        elif url:
+            query, params = "SELECT * FROM downloads WHERE url = ?", [url]
+        else:
+            return None
+        if filetype:
+            query += " AND filetype = ?"
+            params.append(filetype)
+        query += " ORDER BY downloaded_at DESC"
+        for row in self._connection().execute(query, params):
+            if os.path.exists(row["path"]):
+                return dict(row)
+        return None
+
+    def linked_to(self, path: str) -> str | None:
+        """ The original that path was last linked to by deduplication, if any. """
+        row = self._connection().execute("SELECT linked_to FROM downloads WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        return row["linked_to"] if row else None
+
+    def find_by_hash(self, sha256: str) -> list[dict]:
+        return [dict(row) for row in self._connection().execute(
+            "SELECT * FROM downloads WHERE sha256 = ? ORDER BY downloaded_at", (sha256,))]
+
+    def entries_without_hash(self) -> list[dict]:
+        return [dict(row) for row in self._connection().execute(
+            "SELECT * FROM downloads WHERE sha256 IS NULL ORDER BY downloaded_at")]
+
+    def duplicate_hashes(self) -> list[str]:
+        """ Hashes shared by more than one catalogued file. """
+        return [row[0] for row in self._connection().execute(
+            "SELECT sha256 FROM downloads WHERE sha256 IS NOT NULL GROUP BY sha256 HAVING COUNT(*) > 1")]
+
+    def search(self, text: str = "", limit: int = 500, offset: int = 0) -> list[dict]:
+        """ Entries whose title, uploader, URL, video id or path contain text, newest first. """
+        query, params = "SELECT * FROM downloads", []
+        text = text.strip()
+        if text:
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            fields = ("title", "uploader", "url", "video_id", "path")
+            query += " WHERE " + " OR ".join(f"{f} LIKE ? ESCAPE '\\'" for f in fields)
+            params = [pattern] * len(fields)
+        query += " ORDER BY downloaded_at DESC LIMIT ? OFFSET ?"
+        return [dict(row) for row in self._connection().execute(query, params + [limit, offset])]
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
+
+
+catalog = LibraryCatalog()
@@ -1,6 +1,9 @@
 """Initialize Standard Configurations"""
-from os import path, getenv, makedirs
-from json import load, JSONDecodeError
+import tempfile
+import threading
+import time
+from os import path, getenv, makedirs, stat, replace, remove, fdopen, fsync
+from json import load, dump, JSONDecodeError
 
 appdata_path = getenv("APPDATA")
 CURRENT_VERSION = "3.0.0"
@@ -14,6 +17,8 @@ DEFAULT_SETTINGS = {
     "open_folder_after_download": True, # Default for the HOME page checkbox initial state
     # --- New Defaults ---
     "check_for_updates_on_startup": True,
+    "update_check_interval_hours": 24, # 0 checks on every launch; otherwise the cached result is reused
+    "update_check_url": "", # Empty means the GitHub releases API
     "clear_console_before_download": False,
     # Metadata/Subs Defaults (used to initialize home page controls)
     "default_keep_original": False,
@@ -21,6 +26,8 @@ DEFAULT_SETTINGS = {
     "default_embed_chapters": True,
     "default_embed_thumbnail": True, # Usually desired for video/audio
     "default_write_infojson": False,
+    "infojson_format": "full", # "full" (yt-dlp's .info.json), "compact-gzip", "compact-zstd" or "compact"
+    "infojson_per_playlist": False, # Compact sidecars: one JSON Lines file per playlist instead of one per video
     "default_download_subtitles": False,
     "default_subtitle_langs": "en", # Default language if downloading subs
     "default_embed_subs": False,
@@ -29,24 +36,137 @@ DEFAULT_SETTINGS = {
     "default_rate_limit": "", # Empty means no limit
     # YouTube Defaults
     "default_sponsorblock": "None", # Options: "None", "Skip", "Mark"
+    "sponsorblock_api_url": "https://sponsor.ajay.app", # SponsorBlock server (or a mirror)
+    "sponsorblock_cache_hours": 24, # Segments are re-queried after this; expired entries are used if the API is down
+    "sponsorblock_smart_cut": True, # Skip: re-encode only the GOPs at each cut instead of cutting at keyframes
     # Advanced
+    "scratch_path": "", # Folder for intermediates (e.g. a local SSD); empty works directly in download_path
+    "stream_audio_conversion": True, # Audio formats: pipe progressive downloads straight into FFmpeg
+    "fused_postprocessing": True, # Convert and embed tags/chapters/cover art in one FFmpeg run instead of one per step
+    "parallel_side_assets": True, # Fetch subtitles and thumbnails while the media downloads instead of before
+    "native_subtitle_conversion": True, # Convert subtitles to subtitle_format in-process instead of keeping VTT etc.
+    "subtitle_format": "srt", # "srt" or "ass"
+    "chapter_filename_template": "%(title)s/%(section_number)02d - %(section_title)s.%(ext)s", # Split chapters, relative to the download's folder
+    "size_budget_transcode": True, # Re-encode downloads still over their size budget (when no format fits) to fit it
+    "in_place_tags": True, # Tag downloads that need no conversion in place (mutagen/mkvpropedit) instead of remuxing them
     "ffmpeg_path_override": "", # Empty means use bundled/system path
     "ffprobe_path_override": "", # Empty means use bundled/system path
+    "icon_disk_cache": True, # Keep rendered icons as PNGs in the config folder for faster launches
+    "library_catalog": True, # Record finished downloads in library.sqlite3 (History page)
+    "skip_existing_downloads": True, # Skip videos the catalog already has in the same format
+    "dedupe_mode": "reflink", # Identical outputs: "reflink" (copy-on-write, left alone where unsupported), "auto" (reflink, else hard link), "hardlink" or "off"
+    "thumbnail_cache_mb": 200, # Size limit of the shared thumbnail cache (0 disables it)
+    "prepare_covers": True, # Convert/crop/resize covers in-process (Pillow) while the media downloads
+    "square_audio_covers": False, # Audio formats: center-crop covers to a square
+    "cover_max_size": 0, # Scale covers down to this many pixels per side (0 keeps the original size)
+    # Logging (levels: "quiet", "error", "warning", "info", "debug")
+    "log_level_ytdlp": "warning",
+    "log_level_ffmpeg": "warning",
+    "log_level_forgeyt": "info",
 }
 def makeconfig():
     if not path.exists(config_folder):
         makedirs(config_folder)
 
+class ConfigService:
+    """
+    Shared, in-memory view of config.json.
+
+    The file is read once; later reads only stat it and reload when its mtime changed
+    (e.g. edited by hand or saved by another ForgeYT process). Writes go to a temp file
+    that replaces config.json in one step, so a reader never sees a half-written file.
+    """
+    def __init__(self, file_path: str, defaults: dict):
+        self.file_path = file_path
+        self.defaults = defaults
+        self._data = None
+        self._mtime = None
+        self._dirty = False # Changes that failed to save; they win over the file until written
+        self._lock = threading.RLock()
+
+    # --- Reading ---
+    def _file_mtime(self):
+        try:
+            return stat(self.file_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _ensure_loaded(self):
+        mtime = self._file_mtime()
+        if self._data is not None and (mtime == self._mtime or self._dirty):
+            return # Up to date, or unsaved local changes win until they're written
+        data = {}
+        if mtime is not None:
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    data = load(f)
+            except (OSError, JSONDecodeError) as e:
+                # If there's an error, use the default configuration
+                print(f"Warning: Could not read config file '{self.file_path}': {e}. Using defaults.")
+                data = {}
+        self._data = {**self.defaults, **(data if isinstance(data, dict) else {})}
+        self._mtime = mtime
+
+    def get_all(self) -> dict:
+        """ Returns a copy of the whole configuration (defaults filled in). """
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._data)
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            self._ensure_loaded()
+            return self._data.get(key, default)
+
+    # --- Writing ---
+    def replace(self, data: dict):
+        """ Replaces and writes the whole configuration (e.g. from the settings page or a reset). """
+        with self._lock:
+            self._data = {**self.defaults, **data}
+            self._dirty = True
+            self.save()
+
+    def save(self):
+        """ Writes the configuration atomically. Raises OSError if it can't be written. """
+        with self._lock:
+            if self._data is None:
+                return
+            folder = path.dirname(self.file_path)
+            makedirs(folder, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=folder)
+            try:
+                with fdopen(fd, "w", encoding="utf-8") as f:
+                    dump(self._data, f, indent=4)
+                    f.flush()
+                    fsync(f.fileno())
+                for attempt in range(5):
+                    try:
+                        replace(temp_path, self.file_path)
+                        break
+                    except PermissionError:
+                        # Windows refuses while another process has the file open; it is released quickly
+                        if attempt == 4:
+                            raise
+                        time.sleep(0.05)
+            except BaseException:
+                try:
+                    remove(temp_path)
+                except OSError:
+                    pass
+                raise
+            self._mtime = self._file_mtime()
+            self._dirty = False
+
+config_service = ConfigService(config_file, DEFAULT_SETTINGS)
+
 def load_config():
+    """Returns the configuration, served from memory unless config.json changed on disk."""
     makeconfig()
-    if not path.exists(config_file):
-        return DEFAULT_SETTINGS
-    with open(config_file, "r", encoding="utf-8") as f:
-        try:
-            return load(f)
-        except JSONDecodeError:
-            # If there's an error, return a default configuration
-            return DEFAULT_SETTINGS
+    return config_service.get_all()
+
+def save_config(data: dict):
+    """Replaces and writes the whole configuration (atomically). Raises OSError on failure."""
+    config_service.replace(data)
 
 config_data = load_config()
 download_path = config_data["download_path"]
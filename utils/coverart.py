@@ -0,0 +1,93 @@
+"""Cover art preparation (decode, crop, resize, encode) in-process with Pillow, on a shared thread pool"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image # Optional; without it FFmpeg converts covers while embedding them
+except ImportError:
+    Image = None
+
+COVER_WORKERS = min(4, os.cpu_count() or 1)
+COVER_JPEG_QUALITY = 92
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def cover_art_available() -> bool:
+    return Image is not None
+
+
+def _cover_executor() -> ThreadPoolExecutor:
+    """ One pool for all jobs; Pillow releases the GIL while decoding and encoding. """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=COVER_WORKERS, thread_name_prefix="forgeyt-cover")
+        return _executor
+
+
+def prepare_cover(path: str, square: bool = False, max_size: int = 0) -> str:
+    """
+    Turns the image at path into embeddable cover art: a JPEG (PNG if it has transparency),
+    center-cropped to a square if asked and scaled down to max_size pixels per side (0 = keep).
+    A JPEG/PNG that needs neither is returned as is. The result is written next to path under
+    the matching extension; path itself is only replaced if it already has that extension.
+    Returns the cover's path. Raises OSError for unreadable images.
+    """
+    if Image is None:
+        raise OSError("Pillow is not installed")
+    with Image.open(path) as image:
+        width, height = image.size
+        cropped = square and width != height
+        scaled = bool(max_size) and max(width, height) > max_size
+        if image.format in ("JPEG", "PNG") and not cropped and not scaled:
+            return path
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        if cropped:
+            side = min(width, height)
+            left, top = (width - side) // 2, (height - side) // 2
+            image = image.crop((left, top, left + side, top + side))
+        if scaled:
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+    cover_path = f"{os.path.splitext(path)[0]}.{'png' if has_alpha else 'jpg'}"
+    temp_path = f"{cover_path}.part"
+    try:
+        if has_alpha:
+            image.save(temp_path, format="PNG", optimize=True)
+        else:
+            image.save(temp_path, format="JPEG", quality=COVER_JPEG_QUALITY, optimize=True)
+        os.replace(temp_path, cover_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return cover_path
+
+
+class CoverArtJobs:
+    """
+    Covers of one download job being prepared in the background, by thumbnail path.
+
+    submit() is called as soon as a thumbnail is on disk, so for playlists the work runs
+    on the shared pool while the media downloads; collect() waits for the result right
+    before the cover is embedded.
+    """
+    def __init__(self, square: bool = False, max_size: int = 0):
+        self.square = square
+        self.max_size = max_size
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, path: str):
+        with self._lock:
+            if path not in self._futures:
+                self._futures[path] = _cover_executor().submit(prepare_cover, path, self.square, self.max_size)
+
+    def collect(self, path: str) -> str:
+        """ The prepared cover for path (path itself if it wasn't submitted). Raises OSError like prepare_cover. """
+        with self._lock:
+            future = self._futures.pop(path, None)
+        return path if future is None else future.result()
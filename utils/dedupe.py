@@ -0,0 +1,162 @@
+"""Content hashing and deduplication of downloaded files via reflinks or hard links"""
+import hashlib
+import mmap
+import os
+import sys
+
+HASH_CHUNK_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024   # Files at least this large are hashed through a memory map
+MMAP_WINDOW = 16 * 1024 * 1024      # Bytes handed to hashlib per update() on a mapped file
+
+# Setting values -> which link types may replace a duplicate
+DEDUPE_MODES = {
+    "off": (),
+    "auto": ("reflink", "hardlink"),    # Copy-on-write clone where the filesystem supports it
+    "reflink": ("reflink",),
+    "hardlink": ("hardlink",),
+}
+# Choices offered on the settings page (label -> setting value)
+DEDUPE_MODE_LABELS = {"Reflink only": "reflink", "Reflink, else hard link": "auto", "Hard link only": "hardlink", "Keep copies": "off"}
+FICLONE = 0x40049409 # Linux ioctl: share all extents of one file with another (btrfs, XFS, bcachefs)
+
+
+def hash_file(path: str) -> str:
+    """
+    SHA-256 of a file without reading it into memory.
+    Large files are memory-mapped, so hashing doesn't copy every block through a read buffer.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                for offset in range(0, size, MMAP_WINDOW):
+                    digest.update(view[offset:offset + MMAP_WINDOW])
+        else:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- Linking ---
+def _reflink(source: str, target: str) -> bool:
+    """ Creates target as a copy-on-write clone of source. False if the platform/filesystem can't. """
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    try:
+        with open(source, "rb") as src, open(target, "xb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+        return False
+
+
+def replace_with_link(original: str, duplicate: str, mode: str = "reflink") -> str | None:
+    """
+    Replaces duplicate with a reflink or hard link to original.
+
+    The link is made next to the duplicate and then renamed over it, so the duplicate's
+    path always holds a complete file. Returns the link type used, or None.
+    """
+    methods = DEDUPE_MODES.get(mode, ())
+    if not methods:
+        return None
+    temp_path = os.path.join(os.path.dirname(duplicate), f".dedupe-{os.getpid()}-{os.path.basename(duplicate)}")
+    for method in methods:
+        try:
+            if method == "reflink":
+                if not _reflink(original, temp_path):
+                    continue
+                os.chmod(temp_path, os.stat(duplicate).st_mode)
+            else:
+                os.link(original, temp_path)
+            os.replace(temp_path, duplicate)
+            return method
+        except OSError as e:
+            print(f"Warning: Could not {method} '{duplicate}' to '{original}': {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+    return None
+
+
+def _already_linked(path_a: str, path_b: str) -> bool:
+    """ True for hard links to the same inode (nothing left to reclaim). """
+    try:
+        return os.path.samefile(path_a, path_b)
+    except OSError:
+        return False
+
+
+def deduplicate_file(catalog, path: str, sha256: str | None = None, mode: str = "reflink") -> dict | None:
+    """
+    Links path to an earlier catalogued file with identical content, if there is one.
+
+    Candidates must match the hash and size and be on the same filesystem. Files already
+    linked to the candidate (hard links share the inode; reflinks are recorded in the catalog
+    as they can't be told apart from copies) are left alone. Returns {"original", "method",
+    "bytes"} for a replaced file, otherwise None.
+    """
+    if not DEDUPE_MODES.get(mode):
+        return None
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if sha256 is None:
+        sha256 = hash_file(path)
+        catalog.set_hash(path, sha256)
+    linked_to = catalog.linked_to(path)
+    for entry in catalog.find_by_hash(sha256):
+        original = entry["path"]
+        if original == path:
+            continue
+        try:
+            original_stat = os.stat(original)
+        except OSError:
+            continue # Moved or deleted since it was catalogued
+        if original_stat.st_size != stat.st_size or original_stat.st_dev != stat.st_dev:
+            continue
+        if linked_to == original or _already_linked(original, path):
+            return None
+        method = replace_with_link(original, path, mode)
+        if method:
+            catalog.set_linked(path, original)
+            return {"original": original, "method": method, "bytes": stat.st_size}
+    return None
+
+
+def deduplicate_library(catalog, mode: str = "reflink", progress=None, should_stop=None) -> dict:
+    """
+    Hashes catalogued files that have no hash yet, then links every duplicate to the
+    oldest copy of its content. progress(message) is called per step; should_stop()
+    is polled between files. Returns counts and the bytes reclaimed.
+    """
+    report = {"hashed": 0, "linked": 0, "bytes": 0, "failed": 0}
+    for entry in catalog.entries_without_hash():
+        if should_stop and should_stop():
+            return report
+        try:
+            catalog.set_hash(entry["path"], hash_file(entry["path"]))
+            report["hashed"] += 1
+            if progress: progress(f"Hashed {os.path.basename(entry['path'])}")
+        except OSError as e:
+            report["failed"] += 1
+            if progress: progress(f"Could not hash {entry['path']}: {e}")
+    for sha256 in catalog.duplicate_hashes():
+        for entry in catalog.find_by_hash(sha256)[1:]: # Oldest copy stays the original
+            if should_stop and should_stop():
+                return report
+            result = deduplicate_file(catalog, entry["path"], sha256, mode)
+            if result:
+                report["linked"] += 1
+                report["bytes"] += result["bytes"]
+                if progress: progress(f"Linked {os.path.basename(entry['path'])} ({result['method']})")
+    return report
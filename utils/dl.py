@@ -2,8 +2,35 @@ import os
 import sys
 import threading
 import re
+import json
 import subprocess
-from yt_dlp import YoutubeDL, DownloadError
+import sqlite3
+from yt_dlp import DownloadError
+from yt_dlp.utils import download_range_func
+from yt_dlp.postprocessor import EmbedThumbnailPP, FFmpegEmbedSubtitlePP, FFmpegMetadataPP, ModifyChaptersPP
+from yt_dlp.postprocessor.ffmpeg import ACODECS
+
+from utils.loglevels import (
+    JobLogger, resolve_log_levels, level_enabled, message_category, FFMPEG_LOGLEVEL_ARGS
+)
+from utils.progress import JobProgress, format_eta
+from utils.ffprogress import FFmpegProgressWatcher
+from utils.thumbcache import ThumbnailCache
+from utils.coverart import CoverArtJobs, cover_art_available
+from utils.postprocessors import (
+    ThumbnailCacheLookupPP, ThumbnailCacheStorePP, MetadataSidecarPP, StreamingAudioPP, MoveIntoLibraryPP, FanOutPP,
+    CachedSponsorBlockPP, SmartCutChaptersPP, PrepareCoverPP, CollectCoverPP, ConvertSubtitlesPP, AwaitSideAssetsPP,
+    ParallelSplitChaptersPP, DEFAULT_CHAPTER_TEMPLATE, EstimateFormatSizesPP, SizeBudgetTranscodePP
+)
+from utils.sideassets import CachedThumbnailsYoutubeDL, SideAssetsYoutubeDL
+from utils.subtitles import SUBTITLE_TARGET_FORMATS
+from utils.scratch import create_job_folder, remove_job_folder, prune_stale_job_folders
+from utils.sidecars import INFOJSON_FORMATS
+from utils.catalog import catalog
+from utils.dedupe import hash_file, deduplicate_file
+from utils.sections import parse_sections, section_label
+from utils.sizebudget import SizeBudgetSelector, parse_size
+from utils.sponsorcache import SponsorSegmentCache, DEFAULT_SPONSORBLOCK_API_URL, DEFAULT_SPONSORBLOCK_CACHE_HOURS
 
 try:
     # Attempt to import from your project structure
@@ -33,17 +60,28 @@ audio_bitrate_map = {
 }
 
 class FFmpegLogger:
-    def __init__(self, progress_callback):
+    """
+    yt-dlp logger that filters by category level before emitting.
+    yt-dlp sends both screen and debug output to debug(); real debug lines carry a '[debug] ' prefix.
+    """
+    def __init__(self, progress_callback, ytdlp_level: str = "warning", ffmpeg_level: str = "warning"):
         self.progress_callback = progress_callback
+        self.levels = {"ytdlp": ytdlp_level, "ffmpeg": ffmpeg_level}
+
+    def _emit(self, message_level, msg):
+        category = message_category(msg)
+        if level_enabled(self.levels[category], message_level):
+            prefix = "ffmpeg" if category == "ffmpeg" else "yt-dlp"
+            self.progress_callback.emit(f"[{prefix}-{message_level}] {msg}")
 
     def debug(self, msg):
-        self.progress_callback.emit(f"[ffmpeg-debug] {msg}")
+        self._emit("debug" if msg.startswith("[debug] ") else "info", msg)
     def info(self, msg):
-        self.progress_callback.emit(f"[ffmpeg-info] {msg}")
+        self._emit("info", msg)
     def warning(self, msg):
-        self.progress_callback.emit(f"[ffmpeg-warning] {msg}")
+        self._emit("warning", msg)
     def error(self, msg):
-        self.progress_callback.emit(f"[ffmpeg-error] {msg}")
+        self._emit("error", msg)
 
 # --- Custom Exception for Cancellation ---
 class DownloadCancelled(Exception):
@@ -133,7 +171,13 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
              autosubs: bool = False,
              rate_limit: str | None = None,
              cookie_file: str | None = None,
-             sponsorblock_choice: str = 'None' # Options: 'None', 'Skip Sponsor Segments', 'Mark Sponsor Segments'
+             sponsorblock_choice: str = 'None', # Options: 'None', 'Skip Sponsor Segments', 'Mark Sponsor Segments'
+             verbose_logging: bool = False,
+             extra_filetypes: list[str] | None = None,
+             sections: str | None = None,
+             precise_cuts: bool = False,
+             split_chapters: bool = False,
+             size_budget: str | None = None
              ):
     """
     Downloads video/audio using yt-dlp with extensive options and progress reporting.
@@ -163,6 +207,13 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
         rate_limit (str | None): Download speed limit (e.g., '50K', '1M').
         cookie_file (str | None): Path to a cookies file for accessing restricted content.
         sponsorblock_choice (str): How to handle SponsorBlock segments.
+        verbose_logging (bool): Force 'debug' log level for yt-dlp, FFmpeg and ForgeYT output for this job only.
+        extra_filetypes (list[str] | None): More `filetypes` keys to produce from the same download (one FFmpeg pass).
+        sections (str | None): Only download these parts, e.g. '1:02:00-1:04:00, *intro' (see utils.sections.parse_sections).
+        precise_cuts (bool): Re-encode section downloads so they start and end exactly at the given times, not at keyframes.
+        split_chapters (bool): Also save every chapter as its own file (named by the chapter_filename_template setting).
+        size_budget (str | None): Largest file to produce, e.g. '50MB' (see utils.sizebudget.parse_size): the best formats
+            that fit are downloaded, and the result is re-encoded to a fitting bitrate only if none do.
 
     Returns:
         str | None: The absolute path to the final downloaded file, or None if cancelled or failed critically.
@@ -176,6 +227,22 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
     """
     final_filepath = None
     max_percentage_reported = 0.0 # Track max progress for potential resets
+    job_progress = JobProgress() # Byte-weighted progress over all entries (postprocessing weight set once the postprocessors are known)
+    ffmpeg_watcher = None # Follows FFmpeg's -progress output while postprocessing steps run
+    current_pp_info = {} # info_dict of the entry currently being postprocessed
+    thumbnail_cache = None # Set when thumbnails are embedded and the thumbnail cache is enabled
+    cover_jobs = None # Set when covers are prepared in-process (Pillow) instead of by FFmpeg
+    use_catalog = True # Record finished files in the library catalog (from config)
+    dedupe_mode = "off" # How duplicates of catalogued files are replaced (see utils.dedupe.DEDUPE_MODES)
+    job_folder = None # This job's folder in the scratch directory, if one is configured
+
+    def on_ffmpeg_progress(step_name, percent, speed, eta):
+        """Called from the watcher thread with the running step's progress."""
+        if percent is not None:
+            job_progress.update_postprocess(current_pp_info, percent / 100)
+        percent_str = f"{percent:5.1f}%" if percent is not None else "  N/A"
+        speed_str = f"{speed:.2f}x" if speed else "N/A"
+        progress_callback.emit(f"\r[PostProcessing] '{step_name}' {percent_str} at {speed_str} ETA {format_eta(eta)} | {job_progress.summary()}")
 
     # --- Progress Hook for yt-dlp ---
     def progress_hook(d):
@@ -187,6 +254,8 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
 
         status = d.get('status')
 
+        job_progress.update_download(d)
+
         if status == 'downloading':
             percent_str = strip_ansi(d.get('_percent_str', '0.0%')).strip()
             try:
@@ -219,7 +288,8 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
                 frag_info = f" (frag {d['fragment_index']}/{d['fragment_count']})"
 
             # Emit formatted progress line - use \r for single-line updating
-            progress_line = f"\r[download] {display_percentage_str:>6} of ~{total_bytes_str} at {speed_str} ETA {eta_str}{frag_info}"
+            # The job summary after '|' drives the progress bar; the part before it describes the current file
+            progress_line = f"\r[download] {display_percentage_str:>6} of ~{total_bytes_str} at {speed_str} ETA {eta_str}{frag_info} | {job_progress.summary()}"
             progress_callback.emit(progress_line)
 
         elif status == 'finished':
@@ -227,7 +297,7 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
             final_filepath = d.get('filename') or d.get('info_dict', {}).get('_filename')
             # Ensure 100% is shown on completion
             final_max = max(max_percentage_reported, 100.0)
-            final_progress_line = f"\r[download] {final_max:>6.1f}% of ~{strip_ansi(d.get('_total_bytes_str', 'N/A'))} completed."
+            final_progress_line = f"\r[download] {final_max:>6.1f}% of ~{strip_ansi(d.get('_total_bytes_str', 'N/A'))} completed. | {job_progress.summary()}"
             progress_callback.emit(final_progress_line)
             progress_callback.emit("") # New line after progress bar
             progress_callback.emit(strip_ansi(f"Source download finished: {os.path.basename(final_filepath or 'Unknown file')}"))
@@ -240,6 +310,7 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
     # --- Postprocessor Hook for yt-dlp ---
     def postprocessor_hook(d):
         nonlocal final_filepath
+        nonlocal current_pp_info
         if stop_event.is_set():
             raise DownloadCancelled("Download cancelled during postprocessing.")
 
@@ -247,17 +318,73 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
         pp_name = d.get('postprocessor', 'step')
 
         if status == 'started':
-             progress_callback.emit(strip_ansi(f"[PostProcessing] Starting '{pp_name}'..."))
+             log.info(strip_ansi(f"[PostProcessing] Starting '{pp_name}'..."))
+             if ffmpeg_watcher is not None:
+                 # Rebound rather than cleared and refilled: the watcher thread may read it at any moment
+                 current_pp_info = dict(d.get('info_dict') or {})
+                 ffmpeg_watcher.begin(pp_name, current_pp_info.get('duration'))
         elif status == 'processing':
-             # yt-dlp doesn't usually provide detailed progress for FFmpeg steps here
-             # You could emit a generic "processing" message if needed
-             pass # progress_callback.emit(strip_ansi(f"[PostProcessing] Processing '{pp_name}'..."))
+             # yt-dlp doesn't report progress for FFmpeg steps; FFmpegProgressWatcher reads it from FFmpeg directly
+             pass
         elif status == 'finished':
+             if ffmpeg_watcher is not None: ffmpeg_watcher.end()
              # Update final_filepath if postprocessor modifies it (e.g., conversion changes extension)
              final_filepath = d.get('info_dict', {}).get('filepath') or final_filepath # Use 'filepath' if available after PP
-             progress_callback.emit(strip_ansi(f"[PostProcessing] Finished '{pp_name}'."))
+             log.info(strip_ansi(f"[PostProcessing] Finished '{pp_name}'."))
+             # MoveFiles always runs last for an entry, so the entry is complete once it finishes
+             if pp_name == 'MoveFiles':
+                 job_progress.finish_entry(d.get('info_dict') or {})
+                 if use_catalog: record_in_catalog(d.get('info_dict') or {})
+                 progress_callback.emit(f"Entry complete. {job_progress.summary()}")
         elif status == 'error':
-             progress_callback.emit(strip_ansi(f"\n[PostProcessing] Error occurred during '{pp_name}'."))
+             if ffmpeg_watcher is not None: ffmpeg_watcher.end()
+             log.error(strip_ansi(f"\n[PostProcessing] Error occurred during '{pp_name}'."))
+
+    # --- Library Catalog ---
+    def record_in_catalog(info):
+        filepath = info.get('filepath')
+        if not filepath: return
+        record_file_in_catalog(info, filepath, filetype_key)
+        # Further formats of a fan-out job sit next to the primary file
+        for name, extra_filetype in (info.get('__forgeyt_outputs') or {}).items():
+            record_file_in_catalog(info, os.path.join(os.path.dirname(filepath), name), extra_filetype)
+        # Chapter files mustn't count as the whole video when skipping existing downloads
+        for chapter_path in info.get('__forgeyt_chapter_files') or []:
+            record_file_in_catalog(info, chapter_path, f"{filetype_key} chapter")
+
+    def record_file_in_catalog(info, filepath, filetype):
+        if info.get('section_start') is not None or info.get('section_end') is not None:
+            filetype = f"{filetype} clip" # A clip mustn't count as the whole video when skipping existing downloads
+        try:
+            sha256 = hash_file(filepath)
+            catalog.record(info, filepath, filetype=filetype, url=url, sha256=sha256)
+        except (sqlite3.Error, OSError) as e:
+            log.warning(f"Could not add '{os.path.basename(filepath)}' to the library catalog: {e}")
+            return
+        # Byte-identical output of an earlier job: share its storage instead of keeping a second copy
+        try:
+            linked = deduplicate_file(catalog, filepath, sha256, dedupe_mode)
+        except (sqlite3.Error, OSError) as e:
+            log.warning(f"Duplicate check failed for '{os.path.basename(filepath)}': {e}")
+            return
+        if linked:
+            progress_callback.emit(f"[dedupe] Identical to {linked['original']}; replaced with a {linked['method']}, "
+                                   f"reclaimed {linked['bytes'] / (1024 * 1024):.1f} MiB")
+
+    def skip_if_catalogued(info, *, incomplete=False):
+        """ yt-dlp match_filter: skips entries already downloaded in this format (returns the skip reason). """
+        nonlocal final_filepath
+        if incomplete: return None # Playlist-level info has no usable id yet
+        try:
+            existing = catalog.find_existing(info.get('id'), filetype_key, url=info.get('webpage_url'))
+        except sqlite3.Error as e:
+            log.warning(f"Library catalog lookup failed: {e}")
+            return None
+        if existing is None: return None
+        final_filepath = existing['path']
+        job_progress.finish_entry(info)
+        progress_callback.emit(f"Already in library: {existing['path']}")
+        return "already downloaded in this format"
 
     # --- Main Download Logic ---
     try:
@@ -265,18 +392,39 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
 
         # --- Load Config and Setup Paths ---
         config_data = load_config()
+        # Per-category log levels, applied before anything is emitted
+        log_levels = resolve_log_levels(config_data, verbose_logging)
+        log = JobLogger(progress_callback, log_levels["forgeyt"])
+        use_catalog = config_data.get("library_catalog", True)
+        # Clips are always fetched: the catalog only knows whole videos
+        skip_existing = use_catalog and config_data.get("skip_existing_downloads", True) and not sections and not size_budget
+        dedupe_mode = config_data.get("dedupe_mode", "reflink")
+        # Compact sidecars replace yt-dlp's own .info.json (which carries every format and thumbnail)
+        sidecar_compression = INFOJSON_FORMATS.get(config_data.get("infojson_format", "full")) if write_infojson else None
         # Ensure download_path from config is absolute
         download_path = _convert_to_absolute(config_data["download_path"])
 
         if not os.path.isdir(download_path):
-            progress_callback.emit(f"Download directory does not exist. Creating: {download_path}")
+            log.info(f"Download directory does not exist. Creating: {download_path}")
             try:
                 os.makedirs(download_path, exist_ok=True)
-                progress_callback.emit(f"Successfully created directory: {download_path}")
+                log.info(f"Successfully created directory: {download_path}")
             except OSError as e:
                 # Raise a more specific OSError if directory creation fails
                 raise OSError(f"Failed to create download directory '{download_path}': {e}")
 
+        # Intermediates (.part files, separate streams, thumbnails, pre-conversion originals) go to the
+        # scratch folder; only finished files are moved into download_path
+        scratch_path = (config_data.get("scratch_path") or "").strip()
+        if scratch_path:
+            scratch_path = _convert_to_absolute(scratch_path)
+            try:
+                prune_stale_job_folders(scratch_path)
+                job_folder = create_job_folder(scratch_path)
+                log.info(f"Scratch folder: {job_folder}")
+            except OSError as e:
+                log.warning(f"Scratch folder '{scratch_path}' is not usable ({e}); working in the download folder.")
+
         # --- Get Format Details ---
         format_info = filetypes.get(filetype_key)
         if not format_info:
@@ -287,129 +435,204 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
         # target_codec_from_filetype is the *default* codec from filetypes, may be overridden by passed audio/video_codec args
         target_codec_from_filetype = format_info.get("codec")
 
+        # Fan-out: further formats made from the same download (the selected one stays the primary output)
+        extra_keys = [key for key in dict.fromkeys(extra_filetypes or []) if key != filetype_key]
+        for key in extra_keys:
+            if key not in filetypes:
+                raise ValueError(f"Invalid additional file type key: '{key}'. Check `filetypes` definition.")
+        # Fused postprocessing: a single target goes through FanOutPP too, which converts and writes
+        # tags, chapters and cover art in one FFmpeg run instead of one full rewrite per step
+        fused_postprocessing = config_data.get("fused_postprocessing", True)
+        fanout_targets = None
+        if extra_keys or fused_postprocessing:
+            fanout_targets = [dict(format_info, filetype=filetype_key, video_codec_override=video_codec, audio_codec_override=audio_codec)]
+            fanout_targets += [dict(filetypes[key], filetype=key) for key in extra_keys]
+
         # Get preferred audio quality bitrate (string)
         preferred_audio_quality_k = audio_bitrate_map.get(audio_quality)
         if not preferred_audio_quality_k:
-             progress_callback.emit(f"Warning: Audio quality '{audio_quality}' not found in map. Using default '192k'.")
+             log.warning(f"Warning: Audio quality '{audio_quality}' not found in map. Using default '192k'.")
              preferred_audio_quality_k = '192' # Fallback bitrate
 
         # --- Log Selected Options ---
-        progress_callback.emit(f"Selected format: {filetype_key.upper()} ({'Audio Only' if audio_only else 'Video'})")
-        progress_callback.emit(f"Target file extension: .{fileext}")
-        progress_callback.emit(f"Download path: {download_path}")
+        log.info(f"Selected format: {filetype_key.upper()} ({'Audio Only' if audio_only else 'Video'})")
+        log.info(f"Target file extension: .{fileext}")
+        log.info(f"Download path: {download_path}")
 
         if not audio_only:
-            progress_callback.emit(f"Video Quality Preference: {video_quality}")
+            log.info(f"Video Quality Preference: {video_quality}")
             if video_codec: # Log the specifically requested codec
-                progress_callback.emit(f"Requested Video Codec: {video_codec}")
+                log.info(f"Requested Video Codec: {video_codec}")
             elif target_codec_from_filetype: # Log the default if no specific one requested
-                 progress_callback.emit(f"Default Video Codec (from filetype): {target_codec_from_filetype}")
+                 log.info(f"Default Video Codec (from filetype): {target_codec_from_filetype}")
             else:
-                 progress_callback.emit("Video Codec: Default (Let FFmpeg/yt-dlp decide)")
+                 log.info("Video Codec: Default (Let FFmpeg/yt-dlp decide)")
         else:
-            progress_callback.emit(f"Audio Quality Preference: {audio_quality} (Target Bitrate: {preferred_audio_quality_k}k)")
+            log.info(f"Audio Quality Preference: {audio_quality} (Target Bitrate: {preferred_audio_quality_k}k)")
             if audio_codec: # Log the specifically requested codec
-                progress_callback.emit(f"Requested Audio Codec: {audio_codec}")
+                log.info(f"Requested Audio Codec: {audio_codec}")
             elif target_codec_from_filetype: # Log the default if no specific one requested
-                progress_callback.emit(f"Default Audio Codec (from filetype): {target_codec_from_filetype}")
+                log.info(f"Default Audio Codec (from filetype): {target_codec_from_filetype}")
             else:
-                 progress_callback.emit("Audio Codec: Default (Let FFmpeg decide based on extension/quality)")
-
-
-        if playlist_range: progress_callback.emit(f"Playlist Items: {playlist_range}")
-        if playlist_reverse: progress_callback.emit("Playlist Order: Reversed")
-        if filename_template: progress_callback.emit(f"Filename Template: {filename_template}")
-        else: progress_callback.emit("Filename Template: Default (uploader - title.ext)")
-        if keep_original: progress_callback.emit("Option: Keep Original Enabled")
-        if embed_metadata: progress_callback.emit("Option: Embed Metadata Enabled")
-        if embed_chapters: progress_callback.emit("Option: Embed Chapters Enabled")
-        if write_infojson: progress_callback.emit("Option: Write info.json Enabled")
-        if embed_thumbnail: progress_callback.emit("Option: Embed Thumbnail Enabled") # Log always if checked
+                 log.info("Audio Codec: Default (Let FFmpeg decide based on extension/quality)")
+
+
+        if playlist_range: log.info(f"Playlist Items: {playlist_range}")
+        if playlist_reverse: log.info("Playlist Order: Reversed")
+        section_chapters, section_ranges = parse_sections(sections) if sections else ([], [])
+        if section_chapters or section_ranges:
+            log.info(f"Sections: {', '.join([section_label(*r) for r in section_ranges] + [f'chapters matching {c!r}' for c in section_chapters])}"
+                     f" ({'precise cuts' if precise_cuts else 'cut at keyframes'})")
+        if split_chapters: log.info("Option: Split into chapter files")
+        size_budget_bytes = parse_size(size_budget) if size_budget else None
+        if size_budget_bytes: log.info(f"Size Budget: {size_budget} ({size_budget_bytes:,} bytes)")
+        if extra_keys: log.info(f"Also producing: {', '.join(key.upper() for key in extra_keys)} (from the same download)")
+        if filename_template: log.info(f"Filename Template: {filename_template}")
+        else: log.info("Filename Template: Default (uploader - title.ext)")
+        if keep_original: log.info("Option: Keep Original Enabled")
+        if embed_metadata: log.info("Option: Embed Metadata Enabled")
+        if embed_chapters: log.info("Option: Embed Chapters Enabled")
+        if write_infojson: log.info("Option: Write info.json Enabled")
+        if embed_thumbnail: log.info("Option: Embed Thumbnail Enabled") # Log always if checked
         if download_subtitles:
-            progress_callback.emit(f"Option: Download Subs Enabled (Langs: {subtitle_langs}, AutoSubs: {autosubs}, Embed: {embed_subs})")
-        if rate_limit: progress_callback.emit(f"Option: Rate Limit: {rate_limit}")
-        if cookie_file: progress_callback.emit(f"Option: Using Cookie File: {os.path.basename(cookie_file)}")
-        if sponsorblock_choice != 'None': progress_callback.emit(f"Option: SponsorBlock: {sponsorblock_choice}")
+            log.info(f"Option: Download Subs Enabled (Langs: {subtitle_langs}, AutoSubs: {autosubs}, Embed: {embed_subs})")
+        if rate_limit: log.info(f"Option: Rate Limit: {rate_limit}")
+        if cookie_file: log.info(f"Option: Using Cookie File: {os.path.basename(cookie_file)}")
+        if sponsorblock_choice != 'None': log.info(f"Option: SponsorBlock: {sponsorblock_choice}")
+
+        # Subtitles are converted in-process to SRT or ASS; the FFmpeg-free converter can be turned off
+        subtitle_format = config_data.get("subtitle_format", "srt")
+        if subtitle_format not in SUBTITLE_TARGET_FORMATS:
+            subtitle_format = "srt"
+        native_subtitles = download_subtitles and config_data.get("native_subtitle_conversion", True)
 
         # --- Build yt-dlp Options Dictionary ---
         ydl_opts = {
             "ignoreerrors": False, # Stop on error for single downloads; consider True for playlists if needed
-            "no_warnings": False, # Show warnings from yt-dlp
+            "no_warnings": False, # Show warnings from yt-dlp (overridden by the yt-dlp log level below)
             "progress_hooks": [progress_hook],
             "postprocessor_hooks": [postprocessor_hook],
             "quiet": True, # Suppress yt-dlp console output (we handle it via hooks)
             "no_mtime": True, # Don't modify file timestamps
-            "outtmpl": os.path.join(download_path, '%(uploader)s - %(title)s.%(ext)s'), # Default template
+            "paths": {"home": download_path, "temp": job_folder or ""}, # yt-dlp moves finished files from temp to home
+            "outtmpl": '%(uploader)s - %(title)s.%(ext)s', # Default template (relative to "paths")
             "playlistreverse": playlist_reverse,
             "playlist_items": playlist_range if playlist_range else None,
             "noplaylist": False if playlist_range or ('list=' in url and '/watch?' in url) else True, # Handle single video from playlist URL better
             "keepvideo": keep_original,
             "restrictfilenames": True,
-            "embedmetadata": embed_metadata,
-            "embedchapters": embed_chapters,
             "writethumbnail": embed_thumbnail, # Tell yt-dlp to download the thumbnail if needed for embedding
-            "writeinfojson": write_infojson,
+            "writeinfojson": write_infojson and sidecar_compression is None,
             "writesubtitles": download_subtitles,
             "writeautomaticsub": download_subtitles and autosubs,
             "subtitleslangs": subtitle_langs.split(',') if download_subtitles and subtitle_langs else None,
-            "subtitlesformat": "srt/best", # Common subtitle format
-            "embedsubtitles": download_subtitles and embed_subs and not audio_only, # Only embed in video
+            # Anything else is converted in-process (ConvertSubtitlesPP below)
+            "subtitlesformat": f"{subtitle_format}/vtt/best" if native_subtitles else "srt/best",
             "ratelimit": rate_limit,
             "cookiefile": cookie_file,
-            "sponsorblock_remove": ['sponsor'] if sponsorblock_choice == 'Skip Sponsor Segments' else None, # Specify category if needed
-            "sponsorblock_mark": ['sponsor'] if sponsorblock_choice == 'Mark Sponsor Segments' else None, # Specify category if needed
+            "match_filter": skip_if_catalogued if skip_existing else None, # Dedupe against the library catalog
             "postprocessors": [], # Initialize postprocessors list
             'postprocessor_args': {}, # Initialize as dict for easier merging later
             # 'ffmpeg_location': '/path/to/ffmpeg', # Optional: if ffmpeg/ffprobe aren't in PATH
         }
 
-        # Initialize FFmpeg logger and verbose logging
-        ydl_opts['logger'] = FFmpegLogger(progress_callback)
-        ydl_opts.setdefault('postprocessor_args', {}).setdefault('ffmpeg', []).extend(['-loglevel', 'verbose']) # Use dict structure
+        # Initialize level-filtered logger; only ask yt-dlp for output we would actually emit
+        ydl_opts['logger'] = FFmpegLogger(progress_callback, log_levels["ytdlp"], log_levels["ffmpeg"])
+        ydl_opts['verbose'] = "debug" in (log_levels["ytdlp"], log_levels["ffmpeg"]) # yt-dlp only builds debug lines when verbose
+        ydl_opts['no_warnings'] = not level_enabled(log_levels["ytdlp"], "warning")
+        ffmpeg_loglevel = FFMPEG_LOGLEVEL_ARGS[log_levels["ffmpeg"]]
+        ydl_opts.setdefault('postprocessor_args', {}).setdefault('ffmpeg', []).extend(['-loglevel', ffmpeg_loglevel]) # Use dict structure
+        # Machine-readable progress (out_time, speed) for every FFmpeg postprocessing step
+        ffmpeg_watcher = FFmpegProgressWatcher(on_ffmpeg_progress)
+        ydl_opts['postprocessor_args']['ffmpeg'].extend(ffmpeg_watcher.ffmpeg_args())
 
         # Apply custom filename template if provided
         if filename_template:
-            ydl_opts["outtmpl"] = os.path.join(download_path, filename_template)
+            ydl_opts["outtmpl"] = filename_template
+
+        # --- Sections ---
+        if section_chapters or section_ranges:
+            # yt-dlp has FFmpeg fetch only the requested parts: byte ranges of progressive formats, segments of HLS/DASH
+            ydl_opts["download_ranges"] = download_range_func(section_chapters, section_ranges)
+            ydl_opts["force_keyframes_at_cuts"] = precise_cuts
+            if "%(section_" not in ydl_opts["outtmpl"]:
+                # Each section is its own file; name them by their start and end time
+                base, ext_field, rest = ydl_opts["outtmpl"].rpartition(".%(ext)s")
+                suffix = " [%(section_start>%H-%M-%S)s-%(section_end>%H-%M-%S)s]"
+                ydl_opts["outtmpl"] = f"{base}{suffix}{ext_field}{rest}" if ext_field else ydl_opts["outtmpl"] + suffix
+
+        if split_chapters:
+            # Chapter files are named relative to the entry's folder (see ParallelSplitChaptersPP)
+            ydl_opts["outtmpl"] = {"default": ydl_opts["outtmpl"],
+                                   "chapter": config_data.get("chapter_filename_template") or DEFAULT_CHAPTER_TEMPLATE}
 
         # --- Configure Postprocessors and Format Selection ---
-
-        # Add thumbnail embedder if requested (works for audio formats supporting it)
+        # Only audio is downloaded when every output is audio (one file type, or all fan-out targets)
+        all_audio = all(target["audio"] for target in fanout_targets) if fanout_targets is not None else audio_only
+
+        if embed_thumbnail and config_data.get("prepare_covers", True) and cover_art_available():
+            # Square covers only when every output is audio; a video's cover keeps the thumbnail's shape
+            cover_jobs = CoverArtJobs(square=all_audio and config_data.get("square_audio_covers", False),
+                                      max_size=int(config_data.get("cover_max_size", 0) or 0))
+        # Subtitles and thumbnails download alongside the media; whatever reads them then runs after
+        # AwaitSideAssetsPP at the start of postprocessing instead of before the download
+        parallel_side_assets = (download_subtitles or embed_thumbnail) and config_data.get("parallel_side_assets", True)
+        side_asset_stage = 'post_process' if parallel_side_assets else 'before_dl'
+        # After SponsorBlock cuts (or once the prepared cover and side assets are in) the thumbnail
+        # embedder is added later, so the cover goes into the final file
+        embed_thumbnail_late = sponsorblock_choice != 'None' or cover_jobs is not None or parallel_side_assets
         if embed_thumbnail:
-            ydl_opts['postprocessors'].append({
-                'key': 'EmbedThumbnail',
-                'already_have_thumbnail': False # Let yt-dlp handle fetching if needed
-            })
-
-        if audio_only:
+            # Thumbnails are shared across formats and jobs; 0 MB disables the cache
+            thumbnail_cache_mb = config_data.get("thumbnail_cache_mb", 200)
+            if thumbnail_cache_mb and thumbnail_cache_mb > 0:
+                thumbnail_cache = ThumbnailCache(max_bytes=int(thumbnail_cache_mb * 1024 * 1024))
+
+        quality_filter = ""
+        max_height = None
+        if video_quality != "Best":
+            height = "".join(filter(str.isdigit, video_quality))
+            if height:
+                quality_filter = f"[height<=?{height}]"
+                max_height = int(height)
+        # Prefer mp4 container for video, then webm, then best overall
+        # This format string tries to get compatible streams first
+        video_format = (
+             f"bestvideo{quality_filter}[ext=mp4][vcodec^=avc]+bestaudio[ext=m4a]/bestvideo{quality_filter}[ext=webm][vcodec^=vp9]+bestaudio[ext=opus]/bestvideo{quality_filter}+bestaudio/best{quality_filter}"
+        )
+
+        needs_conversion = False # Video container/codec conversion (set below for video formats)
+        if fanout_targets is not None:
+            # One source for every target: video if any target needs it. FanOutPP replaces the per-format converters
+            ydl_opts["format"] = "bestaudio/best" if all_audio else video_format
+            needs_conversion = len(fanout_targets) > 1 or (fileext not in ['mp4', 'mkv', 'webm']) or video_codec is not None
+            if audio_only and len(fanout_targets) == 1:
+                # The download may arrive converted already (StreamingAudioPP); FanOutPP then only adds tags and cover
+                preferred_codec = audio_codec if audio_codec else (target_codec_from_filetype if target_codec_from_filetype else fileext)
+                if preferred_codec in ACODECS:
+                    ydl_opts["final_ext"] = ACODECS[preferred_codec][0]
+        elif audio_only:
             ydl_opts["format"] = "bestaudio/best"
             # *** MODIFIED: Use passed audio_codec if available ***
             preferred_codec = audio_codec if audio_codec else (target_codec_from_filetype if target_codec_from_filetype else fileext)
-            progress_callback.emit(f"Using audio codec for FFmpeg: {preferred_codec}") # Log actual codec used
+            log.info(f"Using audio codec for FFmpeg: {preferred_codec}") # Log actual codec used
             pp_audio = {
                 "key": "FFmpegExtractAudio",
                 "preferredcodec": preferred_codec,
                 "preferredquality": preferred_audio_quality_k,
             }
             ydl_opts['postprocessors'].append(pp_audio)
+            if preferred_codec in ACODECS:
+                # Extension FFmpegExtractAudio produces; lets yt-dlp recognise an already converted file
+                ydl_opts["final_ext"] = ACODECS[preferred_codec][0]
         else: # Video
-            quality_filter = ""
-            if video_quality != "Best":
-                height = "".join(filter(str.isdigit, video_quality))
-                if height:
-                    quality_filter = f"[height<=?{height}]"
-
-            # Prefer mp4 container for video, then webm, then best overall
-            # This format string tries to get compatible streams first
-            ydl_opts["format"] = (
-                 f"bestvideo{quality_filter}[ext=mp4][vcodec^=avc]+bestaudio[ext=m4a]/bestvideo{quality_filter}[ext=webm][vcodec^=vp9]+bestaudio[ext=opus]/bestvideo{quality_filter}+bestaudio/best{quality_filter}"
-            )
+            ydl_opts["format"] = video_format
 
             # Determine if conversion is needed (extension mismatch OR specific codec requested)
             # This check is heuristic. yt-dlp might still convert if merged streams aren't compatible with the container.
             needs_conversion = (fileext not in ['mp4', 'mkv', 'webm']) or video_codec is not None # Trigger conversion if specific codec is requested
 
             if needs_conversion:
-                progress_callback.emit("Video conversion postprocessor will be used.")
+                log.info("Video conversion postprocessor will be used.")
                 pp_video = {
                     'key': 'FFmpegVideoConvertor',
                     'preferedformat': fileext, # Note: yt-dlp uses 'preferedformat' spelling
@@ -421,7 +644,7 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
 
                 # *** MODIFIED: Use passed video_codec if available ***
                 if video_codec:
-                    progress_callback.emit(f"Adding FFmpeg argument: -c:v {video_codec}")
+                    log.info(f"Adding FFmpeg argument: -c:v {video_codec}")
                     ffmpeg_args.extend(['-c:v', video_codec])
                 # else: # If converting container but not codec, copy video stream
                 #     ffmpeg_args.extend(['-c:v', 'copy'])
@@ -429,24 +652,35 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
                 # Handle audio codec during video conversion
                 audio_codec_for_video = audio_codec if audio_codec else 'aac' # Default to AAC for compatibility
                 if audio_codec_for_video == 'copy':
-                     progress_callback.emit("Adding FFmpeg argument: -c:a copy")
+                     log.info("Adding FFmpeg argument: -c:a copy")
                      ffmpeg_args.extend(['-c:a', 'copy'])
                 else:
-                     progress_callback.emit(f"Adding FFmpeg arguments: -c:a {audio_codec_for_video} -b:a {preferred_audio_quality_k}k")
+                     log.info(f"Adding FFmpeg arguments: -c:a {audio_codec_for_video} -b:a {preferred_audio_quality_k}k")
                      ffmpeg_args.extend(['-c:a', audio_codec_for_video, '-b:a', f'{preferred_audio_quality_k}k'])
 
+        if fanout_targets is None:
+            # Separate postprocessors, each rewriting the whole file (after the conversion above)
+            if (embed_metadata or embed_chapters) and sponsorblock_choice == 'None': # Otherwise added after the cuts
+                ydl_opts['postprocessors'].append({
+                    'key': 'FFmpegMetadata',
+                    'add_metadata': embed_metadata,
+                    'add_chapters': embed_chapters,
+                })
+            if embed_thumbnail and not embed_thumbnail_late:
+                ydl_opts['postprocessors'].append({
+                    'key': 'EmbedThumbnail',
+                    'already_have_thumbnail': False # Let yt-dlp handle fetching if needed
+                })
+
+        # Conversions take noticeably longer than remuxing; weigh postprocessing accordingly in the job progress
+        job_progress.postprocess_weight = 0.3 if (audio_only or needs_conversion) else 0.05
+
         # --- Final Cleanup of Options (using dict for postprocessor_args) ---
-        # Convert postprocessor_args dict back to list format expected by yt-dlp >= 2023.06.22
+        # The Python API takes postprocessor_args as {key: [args]}; a list would be passed to FFmpeg verbatim
         if 'postprocessor_args' in ydl_opts and ydl_opts['postprocessor_args']:
-             args_list = []
-             for pp_key, pp_args in ydl_opts['postprocessor_args'].items():
-                  if pp_args: # Only add if there are args for this key
-                    # Use subprocess.list2cmdline for robust quoting on Windows
-                    # Use ' '.join for Linux/macOS (less robust but common)
-                    cmd_line = subprocess.list2cmdline(pp_args) if sys.platform == 'win32' else ' '.join(map(str, pp_args))
-                    args_list.append(f"{pp_key}:{cmd_line}") # Format as KEY:ARGS_STRING
-             if args_list:
-                  ydl_opts['postprocessor_args'] = args_list
+             args_dict = {pp_key.lower(): list(map(str, pp_args)) for pp_key, pp_args in ydl_opts['postprocessor_args'].items() if pp_args}
+             if args_dict:
+                  ydl_opts['postprocessor_args'] = args_dict
              else:
                   del ydl_opts['postprocessor_args'] # Remove if empty
         elif 'postprocessor_args' in ydl_opts: # Ensure removal if initialized but remained empty
@@ -468,27 +702,86 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
 
 
         # --- Execute Download ---
-        progress_callback.emit("Starting yt-dlp download process...")
-        # For debugging: print the final options being passed
-        try:
-            # Attempt to serialize, converting non-serializable items to strings
-            opts_str = json.dumps(final_ydl_opts, indent=2, default=lambda o: f"<<non-serializable: {type(o).__name__}>>")
-            progress_callback.emit(f"Final yt-dlp Options:\n{opts_str}")
-        except Exception as json_err:
-            progress_callback.emit(f"Could not serialize final options for logging: {json_err}")
-            progress_callback.emit(f"Options (raw): {final_ydl_opts}")
+        log.info("Starting yt-dlp download process...")
+        # For debugging: print the final options being passed (only serialized when debug output is wanted)
+        if log.enabled("debug"):
+            try:
+                # Attempt to serialize, converting non-serializable items to strings
+                opts_str = json.dumps(final_ydl_opts, indent=2, default=lambda o: f"<<non-serializable: {type(o).__name__}>>")
+                log.debug(f"Final yt-dlp Options:\n{opts_str}")
+            except Exception as json_err:
+                log.debug(f"Could not serialize final options for logging: {json_err}")
+                log.debug(f"Options (raw): {final_ydl_opts}")
 
 
-        with YoutubeDL(final_ydl_opts) as ydl:
+        with (SideAssetsYoutubeDL if parallel_side_assets else CachedThumbnailsYoutubeDL)(final_ydl_opts) as ydl:
             if stop_event.is_set():
                 raise DownloadCancelled("Download cancelled just before starting yt-dlp.")
 
+            if size_budget_bytes:
+                # The best formats that fit, by their sizes (estimated from the bitrate where yt-dlp has none)
+                ydl.add_post_processor(EstimateFormatSizesPP(), when='pre_process')
+                ydl.format_selector = SizeBudgetSelector(size_budget_bytes, audio_only=all_audio,
+                                                         max_height=max_height, fallback=ydl.format_selector, report=ydl.to_screen)
+            if parallel_side_assets:
+                ydl.add_post_processor(AwaitSideAssetsPP(), when='post_process')
+            if thumbnail_cache is not None:
+                ydl.add_post_processor(ThumbnailCacheLookupPP(thumbnail_cache), when='video')
+                ydl.add_post_processor(ThumbnailCacheStorePP(thumbnail_cache, on_preview=lambda path: progress_callback.emit(f"[preview] {path}")), when=side_asset_stage)
+            if cover_jobs is not None:
+                ydl.add_post_processor(PrepareCoverPP(cover_jobs), when=side_asset_stage) # After the cache stored the original
+            if native_subtitles:
+                ydl.add_post_processor(ConvertSubtitlesPP(subtitle_format), when=side_asset_stage)
+            if audio_only and config_data.get("stream_audio_conversion", True) and ydl_opts.get("final_ext"):
+                # Progressive audio is converted while it downloads, without an intermediate file
+                ydl.add_post_processor(StreamingAudioPP(preferred_codec, preferred_audio_quality_k, progress_hook, downloader=ydl), when='before_dl')
+            if sponsorblock_choice != 'None':
+                # Segments come from the local cache when possible; cuts happen before fan-out so every format gets them
+                sponsor_cache = SponsorSegmentCache(ttl_hours=config_data.get("sponsorblock_cache_hours", DEFAULT_SPONSORBLOCK_CACHE_HOURS))
+                sponsor_api = config_data.get("sponsorblock_api_url") or DEFAULT_SPONSORBLOCK_API_URL
+                ydl.add_post_processor(CachedSponsorBlockPP(ydl, ['sponsor'], sponsor_api, sponsor_cache), when='after_filter')
+                cut_pp = SmartCutChaptersPP if config_data.get("sponsorblock_smart_cut", True) else ModifyChaptersPP
+                remove_segments = ['sponsor'] if sponsorblock_choice == 'Skip Sponsor Segments' else []
+                ydl.add_post_processor(cut_pp(ydl, remove_sponsor_segments=remove_segments), when='post_process')
+                metadata_chapters = embed_chapters or sponsorblock_choice == 'Mark Sponsor Segments'
+                if fanout_targets is None and (embed_metadata or metadata_chapters):
+                    # Tags and chapters go in after the cuts, which would drop them or leave their times wrong
+                    ydl.add_post_processor(FFmpegMetadataPP(ydl, add_chapters=metadata_chapters, add_metadata=embed_metadata), when='post_process')
+            if cover_jobs is not None:
+                ydl.add_post_processor(CollectCoverPP(cover_jobs), when='post_process')
+            if fanout_targets is not None:
+                # Conversion, tags, chapters and cover art in one FFmpeg run
+                fanout_pp = FanOutPP(fanout_targets, preferred_audio_quality_k, add_metadata=embed_metadata,
+                                     add_chapters=embed_chapters or sponsorblock_choice == 'Mark Sponsor Segments',
+                                     embed_thumbnail=embed_thumbnail,
+                                     tags_in_place=config_data.get("in_place_tags", True), downloader=ydl)
+                ydl.add_post_processor(fanout_pp, when='post_process')
+            elif embed_thumbnail and embed_thumbnail_late:
+                ydl.add_post_processor(EmbedThumbnailPP(ydl, already_have_thumbnail=False), when='post_process')
+            if download_subtitles and embed_subs and not audio_only:
+                # Into the finished video (only embedding into video); the subtitle files are kept
+                ydl.add_post_processor(FFmpegEmbedSubtitlePP(ydl, already_have_subtitle=True), when='post_process')
+            if size_budget_bytes and config_data.get("size_budget_transcode", True):
+                # Only re-encodes when no format fit; before the chapter split, so the chapters are small too
+                budget_vcodec = None if audio_only else (video_codec if video_codec not in (None, 'copy') else format_info.get("codec"))
+                budget_acodec = audio_codec if audio_codec not in (None, 'copy') else format_info.get("audio_codec")
+                ydl.add_post_processor(SizeBudgetTranscodePP(size_budget_bytes, budget_vcodec, budget_acodec, downloader=ydl), when='post_process')
+            if split_chapters:
+                # Cut from the finished file, so every chapter has the tags, cover art and subtitles
+                ydl.add_post_processor(ParallelSplitChaptersPP(ydl, add_metadata=embed_metadata), when='post_process')
+            if sidecar_compression is not None:
+                ydl.add_post_processor(MetadataSidecarPP(sidecar_compression, config_data.get("infojson_per_playlist", False)), when='after_move')
+            if job_folder is not None:
+                # Last of the post_process stage, so yt-dlp's MoveFiles has nothing left to copy non-atomically
+                ydl.add_post_processor(MoveIntoLibraryPP(), when='post_process')
+
             # Ensure directory exists one last time (might be redundant but safe)
             os.makedirs(download_path, exist_ok=True)
 
             # Start the download and processing
+            job_progress.started_at = job_progress.clock() # Throughput counts from the actual transfer
             return_code = ydl.download([url])
-            progress_callback.emit(f"yt-dlp download() returned: {return_code}") # Log return code
+            log.debug(f"yt-dlp download() returned: {return_code}") # Log return code
 
         # --- Post-Download Handling ---
         if stop_event.is_set():
@@ -547,3 +840,7 @@ def download(url: str, filetype_key: str, progress_callback: 'Signal', # Assumin
         progress_callback.emit(f"Traceback:\n{err_trace}") # Log the traceback for debugging
         # Wrap in a generic Exception to signal unexpected failure
         raise Exception(f"An unexpected error occurred during download: {clean_error_msg}") from e
+    finally:
+        if ffmpeg_watcher is not None:
+            ffmpeg_watcher.close()
+        remove_job_folder(job_folder) # Finished files have been moved out; anything left is an intermediate
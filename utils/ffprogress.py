@@ -0,0 +1,144 @@
+"""Progress reporting for FFmpeg postprocessing steps, read from FFmpeg's machine-readable -progress output"""
+import os
+import re
+import tempfile
+import threading
+
+_SPEED_REGEX = re.compile(r"([\d.]+)x")
+
+
+def parse_out_time(values: dict) -> float | None:
+    """Returns the processed media time in seconds from one -progress block."""
+    for key in ("out_time_us", "out_time_ms"): # out_time_ms is (despite its name) also in microseconds
+        raw = values.get(key)
+        if raw and raw.lstrip("-").isdigit() and int(raw) >= 0:
+            return int(raw) / 1_000_000
+    raw = values.get("out_time")
+    if raw and ":" in raw and not raw.startswith("-"):
+        try:
+            hours, minutes, seconds = raw.split(":")
+            return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        except ValueError:
+            return None
+    return None
+
+
+def parse_speed(values: dict) -> float | None:
+    """Returns the encoding speed multiplier (media seconds per wall second), e.g. 2.5 for '2.5x'."""
+    match = _SPEED_REGEX.search(values.get("speed") or "")
+    return float(match.group(1)) if match and float(match.group(1)) > 0 else None
+
+
+def parse_progress_blocks(text: str) -> list[dict]:
+    """
+    Splits -progress output into complete key=value blocks.
+    Each block ends with 'progress=continue' or 'progress=end'; an unfinished trailing block is ignored.
+    """
+    blocks, current = [], {}
+    for line in text.splitlines():
+        key, sep, value = line.partition("=")
+        if not sep:
+            continue
+        current[key.strip()] = value.strip()
+        if key.strip() == "progress":
+            blocks.append(current)
+            current = {}
+    return blocks
+
+
+class FFmpegProgressWatcher:
+    """
+    Follows the -progress file FFmpeg writes while a postprocessing step runs.
+
+    FFmpeg truncates the file for every invocation, so one file serves all steps of a job.
+    The callback receives (step_name, percent, speed, eta_seconds); percent and eta are None
+    when the media duration is unknown, speed is None until FFmpeg reports it.
+    """
+    def __init__(self, callback, poll_interval: float = 0.5):
+        self.callback = callback
+        self.poll_interval = poll_interval
+        fd, self.progress_file = tempfile.mkstemp(prefix="forgeyt-ffprogress-", suffix=".txt")
+        os.close(fd)
+        self._offset = 0
+        self._pending = ""
+        self._step = None
+        self._duration = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def ffmpeg_args(self) -> list[str]:
+        """Arguments that make FFmpeg write its progress to our file."""
+        return ["-progress", self.progress_file, "-nostats"]
+
+    def begin(self, step_name: str, duration: float | None):
+        """Starts following a new postprocessing step."""
+        with self._lock:
+            self._step = step_name
+            self._duration = duration if duration and duration > 0 else None
+            self._offset, self._pending = 0, ""
+            try:
+                open(self.progress_file, "w").close() # Drop the previous step's output
+            except OSError:
+                pass
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ffmpeg-progress", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def end(self):
+        """Stops reporting for the current step (reads whatever is left first)."""
+        self._poll()
+        with self._lock:
+            self._step = None
+
+    def close(self):
+        """Stops the watcher thread and removes the progress file."""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        try:
+            os.remove(self.progress_file)
+        except OSError:
+            pass
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._step is not None:
+                self._poll()
+
+    def _poll(self):
+        with self._lock:
+            step, duration = self._step, self._duration
+            if step is None:
+                return
+            try:
+                if os.path.getsize(self.progress_file) < self._offset:
+                    self._offset, self._pending = 0, "" # New FFmpeg invocation truncated the file
+                with open(self.progress_file, "r", encoding="utf-8", errors="replace") as f:
+                    f.seek(self._offset)
+                    chunk = f.read()
+                    self._offset = f.tell()
+            except OSError:
+                return
+            text = self._pending + chunk
+            # Keep an unfinished trailing block for the next poll
+            cut = text.rfind("progress=")
+            cut = text.find("\n", cut) if cut >= 0 else -1
+            self._pending = text[cut + 1:] if cut >= 0 else text
+            blocks = parse_progress_blocks(text[:cut + 1] if cut >= 0 else "")
+        if not blocks:
+            return
+        latest = blocks[-1]
+        out_time = parse_out_time(latest)
+        speed = parse_speed(latest)
+        percent = eta = None
+        if duration and out_time is not None:
+            percent = 100.0 if latest.get("progress") == "end" else min(100.0, out_time / duration * 100)
+            if speed:
+                eta = max(0.0, (duration - out_time) / speed)
+        self.callback(step, percent, speed, eta)
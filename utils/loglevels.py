@@ -0,0 +1,107 @@
+"""Log level handling for ForgeYT, yt-dlp and FFmpeg output"""
+import re
+
+# --- Ordered log levels (lower = quieter) ---
+LOG_LEVELS = {
+    "quiet": 0,
+    "error": 1,
+    "warning": 2,
+    "info": 3,
+    "debug": 4,
+}
+LOG_LEVEL_NAMES = list(LOG_LEVELS.keys())
+
+# Categories and the config keys holding their level
+LOG_CATEGORIES = {
+    "ytdlp": "log_level_ytdlp",
+    "ffmpeg": "log_level_ffmpeg",
+    "forgeyt": "log_level_forgeyt",
+}
+
+# FFmpeg's own -loglevel value for each of our levels
+FFMPEG_LOGLEVEL_ARGS = {
+    "quiet": "quiet",
+    "error": "error",
+    "warning": "warning",
+    "info": "info",
+    "debug": "verbose",
+}
+
+# yt-dlp prefixes messages from FFmpeg based postprocessors with the PP name
+FFMPEG_MESSAGE_TAGS = {
+    "ffmpeg", "ExtractAudio", "VideoConvertor", "VideoRemuxer", "Merger",
+    "EmbedThumbnail", "EmbedSubtitle", "Metadata", "ThumbnailsConvertor",
+    "SubtitlesConvertor", "SplitChapters", "ModifyChapters", "ForceKeyframes",
+    "FixupM3u8", "FixupM4a", "FixupStretched", "FixupTimestamp", "FixupDuration",
+    "FixupDuplicateMoov", "ConcatPlaylist",
+}
+_MESSAGE_TAG_REGEX = re.compile(r"^\[(?:debug\] \[)?([A-Za-z0-9_]+)\]")
+
+
+def normalize_level(level_name: str | None, default: str = "info") -> str:
+    """Returns a known level name, falling back to default for unknown values."""
+    if isinstance(level_name, str) and level_name.lower() in LOG_LEVELS:
+        return level_name.lower()
+    return default
+
+
+def resolve_log_levels(config: dict, verbose: bool = False) -> dict:
+    """
+    Builds the per-category level map for a job.
+
+    Args:
+        config (dict): Loaded configuration (see DEFAULT_SETTINGS).
+        verbose (bool): Per-job override that switches every category to 'debug'.
+
+    Returns:
+        dict: {'ytdlp': level, 'ffmpeg': level, 'forgeyt': level}
+    """
+    if verbose:
+        return {category: "debug" for category in LOG_CATEGORIES}
+    return {
+        category: normalize_level(config.get(config_key), "info" if category == "forgeyt" else "warning")
+        for category, config_key in LOG_CATEGORIES.items()
+    }
+
+
+def level_enabled(threshold: str, message_level: str) -> bool:
+    """True if a message of message_level passes the threshold level."""
+    if message_level == "quiet":
+        return False
+    return LOG_LEVELS.get(message_level, LOG_LEVELS["info"]) <= LOG_LEVELS.get(threshold, LOG_LEVELS["info"])
+
+
+def message_category(msg: str) -> str:
+    """Classifies a yt-dlp logger message as 'ffmpeg' or 'ytdlp' output."""
+    if msg.startswith("[debug] ffmpeg command line") or msg.startswith("[debug] ffmpeg version"):
+        return "ffmpeg"
+    match = _MESSAGE_TAG_REGEX.match(msg)
+    if match and match.group(1) in FFMPEG_MESSAGE_TAGS:
+        return "ffmpeg"
+    return "ytdlp"
+
+
+class JobLogger:
+    """
+    Level-filtered emitter for ForgeYT's own messages during a job.
+    Messages below the level are dropped before crossing the thread boundary.
+    """
+    def __init__(self, progress_callback, level: str = "info"):
+        self.progress_callback = progress_callback
+        self.level = normalize_level(level)
+
+    def enabled(self, message_level: str) -> bool:
+        return level_enabled(self.level, message_level)
+
+    def debug(self, msg):
+        if self.enabled("debug"):
+            self.progress_callback.emit(msg)
+    def info(self, msg):
+        if self.enabled("info"):
+            self.progress_callback.emit(msg)
+    def warning(self, msg):
+        if self.enabled("warning"):
+            self.progress_callback.emit(msg)
+    def error(self, msg):
+        if self.enabled("error"):
+            self.progress_callback.emit(msg)
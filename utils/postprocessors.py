@@ -0,0 +1,1041 @@
+"""ForgeYT's own yt-dlp postprocessors (registered in download() with YoutubeDL.add_post_processor)"""
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from yt_dlp.networking import Request
+from yt_dlp.networking.exceptions import RequestError
+from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.postprocessor.embedthumbnail import EmbedThumbnailPP
+from yt_dlp.postprocessor.ffmpeg import (
+    ACODECS, FFmpegExtractAudioPP, FFmpegMetadataPP, FFmpegPostProcessor, FFmpegSplitChaptersPP,
+    FFmpegThumbnailsConvertorPP
+)
+from yt_dlp.postprocessor.modify_chapters import ModifyChaptersPP
+from yt_dlp.postprocessor.sponsorblock import SponsorBlockPP
+from yt_dlp.utils import (
+    PostProcessingError, Popen, determine_ext, float_or_none, format_bytes, prepend_extension, replace_extension
+)
+
+from utils.scratch import move_into_place
+from utils.sideassets import PENDING_SIDE_ASSETS_KEY
+from utils.sidecars import compact_info, resolve_compression, write_sidecar
+from utils.sizebudget import budget_bitrates, estimate_missing_sizes
+from utils.sponsorcache import DEFAULT_SPONSORBLOCK_API_URL
+from utils.subtitles import SUBTITLE_SOURCE_FORMATS, SubtitleError, convert_subtitles
+from utils.tagwriter import TagWriteError, can_write_tags, tags_from_info, write_tags
+
+
+def _thumbnail_ext(thumbnail: dict) -> str:
+    """ Extension yt-dlp gives a thumbnail file (same rule as YoutubeDL._write_thumbnails). """
+    return thumbnail.get('ext') or determine_ext(thumbnail['url'], 'jpg')
+
+
+# --- Side Assets ---
+class AwaitSideAssetsPP(PostProcessor):
+    """
+    Runs first in the 'post_process' stage: waits for the subtitles and thumbnail that
+    SideAssetsYoutubeDL fetched alongside the media, and registers them for the final move.
+    A failed subtitle download fails the entry, as it would have before the media download.
+    """
+    def run(self, info):
+        futures = info.pop(PENDING_SIDE_ASSETS_KEY, None) or []
+        if not all(future.done() for future in futures):
+            self.to_screen('Waiting for subtitles and thumbnails')
+        files_to_move = info.setdefault('__files_to_move', {})
+        for future in futures:
+            files_to_move.update(dict(future.result() or []))
+        return [], info
+
+
+# --- Thumbnail Cache ---
+class ThumbnailCacheLookupPP(PostProcessor):
+    """
+    Runs at the 'video' stage, before yt-dlp writes thumbnails.
+    If the thumbnail yt-dlp is about to fetch is cached, it is placed at the expected
+    filename and becomes the thumbnail's 'filepath'; CachedThumbnailsYoutubeDL then keeps
+    it instead of downloading the thumbnail.
+    """
+    def __init__(self, cache, downloader=None):
+        super().__init__(downloader)
+        self.cache = cache
+
+    def run(self, info):
+        thumbnails = info.get('thumbnails') or []
+        if not thumbnails or not self._downloader.params.get('writethumbnail'):
+            return [], info
+        thumbnail = thumbnails[-1] # yt-dlp tries the preferred (last) thumbnail first
+        ext = _thumbnail_ext(thumbnail)
+        cached_path = self.cache.get(info.get('id'), thumbnail['url'], ext)
+        if not cached_path:
+            return [], info
+        target = replace_extension(self._downloader.prepare_filename(info, 'temp'), ext, info.get('ext'))
+        if self.cache.copy_to(cached_path, target):
+            thumbnail['filepath'] = target
+            self.to_screen(f"Using cached thumbnail for {info.get('id')}")
+        return [], info
+
+
+class ThumbnailCacheStorePP(PostProcessor):
+    """
+    Runs once the thumbnails are written (before EmbedThumbnail can delete them): after
+    AwaitSideAssetsPP at the 'post_process' stage, or at 'before_dl' without parallel side assets.
+    Adds them to the cache and reports the cached copy for the GUI preview.
+    """
+    def __init__(self, cache, on_preview=None, downloader=None):
+        super().__init__(downloader)
+        self.cache = cache
+        self.on_preview = on_preview
+
+    def run(self, info):
+        for thumbnail in info.get('thumbnails') or []:
+            path = thumbnail.get('filepath')
+            if not path or not os.path.exists(path):
+                continue
+            cached_path = self.cache.put(info.get('id'), thumbnail['url'], _thumbnail_ext(thumbnail), path)
+            if cached_path and self.on_preview:
+                self.on_preview(cached_path)
+        return [], info
+
+
+# --- Cover Art ---
+class PrepareCoverPP(PostProcessor):
+    """
+    Runs once the thumbnails are written (after AwaitSideAssetsPP at the 'post_process' stage,
+    or at 'before_dl' without parallel side assets) and hands them to the cover art pool
+    (utils.coverart), so converting and cropping overlaps the other postprocessing (or the download).
+    """
+    def __init__(self, jobs, downloader=None):
+        super().__init__(downloader)
+        self.jobs = jobs
+
+    def run(self, info):
+        for thumbnail in info.get('thumbnails') or []:
+            path = thumbnail.get('filepath')
+            if path and os.path.exists(path):
+                self.jobs.submit(path)
+        return [], info
+
+
+class CollectCoverPP(PostProcessor):
+    """
+    Runs at the 'post_process' stage, right before the cover is embedded: swaps each
+    thumbnail for its prepared cover. Thumbnails that failed are left to FFmpeg.
+    """
+    def __init__(self, jobs, downloader=None):
+        super().__init__(downloader)
+        self.jobs = jobs
+
+    def run(self, info):
+        for thumbnail in info.get('thumbnails') or []:
+            path = thumbnail.get('filepath')
+            if not path:
+                continue
+            try:
+                cover_path = self.jobs.collect(path)
+            except OSError as e:
+                self.report_warning(f'Could not prepare the cover from "{os.path.basename(path)}": {e}')
+                continue
+            if cover_path != path:
+                _remove_file(path)
+                thumbnail['filepath'] = cover_path
+        return [], info
+
+
+# --- Metadata Sidecars ---
+class MetadataSidecarPP(PostProcessor):
+    """
+    Runs at the 'after_move' stage and writes a compact metadata sidecar next to the final
+    file (or appends to the playlist's sidecar), in place of yt-dlp's full .info.json.
+    """
+    def __init__(self, compression: str = "gzip", per_playlist: bool = False, downloader=None):
+        super().__init__(downloader)
+        self.compression = resolve_compression(compression) # Warns once if zstd isn't available
+        self.per_playlist = per_playlist
+
+    def run(self, info):
+        filepath = info.get('filepath')
+        if not filepath:
+            return [], info
+        record = compact_info(self._downloader.sanitize_info(info, remove_private_keys=True))
+        try:
+            path = write_sidecar(record, filepath, self.compression, self.per_playlist)
+        except OSError as e:
+            self.report_warning(f"Could not write metadata sidecar: {e}")
+        else:
+            self.to_screen(f"Metadata written to {os.path.basename(path)}")
+        return [], info
+
+
+# --- Subtitles ---
+SUBTITLE_WORKERS = 4
+
+
+class ConvertSubtitlesPP(PostProcessor):
+    """
+    Runs once the subtitles are written (after AwaitSideAssetsPP at the 'post_process' stage,
+    or at 'before_dl' without parallel side assets) and converts them to SRT or ASS in-process
+    (utils.subtitles) instead of one FFmpeg run per language. Languages are converted in
+    parallel; auto-generated captions lose their rolling repeated lines.
+    """
+    def __init__(self, target: str = 'srt', downloader=None):
+        super().__init__(downloader)
+        self.target = target
+
+    def _convert(self, path: str, ext: str, rolling: bool) -> str:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            data = convert_subtitles(f.read(), ext, self.target, rolling=rolling)
+        new_path = replace_extension(path, self.target)
+        with open(new_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        return new_path
+
+    def run(self, info):
+        manual = info.get('subtitles') or {}
+        subs = [(lang, sub) for lang, sub in (info.get('requested_subtitles') or {}).items()
+                if sub.get('filepath') and sub.get('ext') != self.target and sub.get('ext') in SUBTITLE_SOURCE_FORMATS]
+        if not subs:
+            return [], info
+        self.to_screen(f'Converting subtitles ({", ".join(lang for lang, _ in subs)}) to {self.target}')
+        files_to_delete = []
+        with ThreadPoolExecutor(max_workers=min(len(subs), SUBTITLE_WORKERS)) as pool:
+            futures = {lang: pool.submit(self._convert, sub['filepath'], sub['ext'], lang not in manual) for lang, sub in subs}
+        for lang, sub in subs:
+            try:
+                new_path = futures[lang].result()
+            except (SubtitleError, OSError) as e:
+                self.report_warning(f'Could not convert {lang} subtitles: {e}')
+                continue
+            old_path = sub['filepath']
+            final_path = info.get('__files_to_move', {}).get(old_path)
+            if final_path:
+                info['__files_to_move'][new_path] = replace_extension(final_path, self.target)
+            sub.pop('data', None)
+            sub.update(ext=self.target, filepath=new_path)
+            if new_path != old_path:
+                files_to_delete.append(old_path)
+        return files_to_delete, info
+
+
+# --- Streaming Audio Conversion ---
+STREAM_BLOCK_SIZE = 256 * 1024
+STREAMABLE_PROTOCOLS = ("http", "https")
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _normalise_acodec(acodec: str | None) -> str | None:
+    """ Format metadata codec name (e.g. 'mp4a.40.2') -> FFmpegExtractAudioPP's name ('aac'). """
+    if not acodec or acodec == "none":
+        return None
+    acodec = acodec.lower()
+    if acodec.startswith("mp4a"):
+        return "aac"
+    for name in ("opus", "vorbis", "mp3", "flac", "alac"):
+        if acodec.startswith(name):
+            return name
+    return acodec
+
+
+def _extract_audio_encoding(downloader, source: str | None, target: str, quality=None) -> tuple[str, str | None, list] | None:
+    """
+    (extension, encoder, extra args) FFmpegExtractAudio uses to turn audio in the source
+    codec (None if unknown) into target, or None if target isn't one of its codecs.
+    """
+    if target not in ACODECS:
+        return None
+    if source == 'aac' and target == 'm4a':
+        extension, _, more_opts = ACODECS['m4a']
+        return extension, 'copy', list(more_opts)
+    if source == target:
+        extension, _, more_opts = ACODECS[source]
+        return extension, 'copy', list(more_opts)
+    extension, encoder, more_opts = ACODECS[target]
+    if encoder is not None:
+        more_opts = FFmpegExtractAudioPP(downloader, target, quality)._quality_args(encoder)
+    return extension, encoder, list(more_opts)
+
+
+class StreamingAudioPP(FFmpegPostProcessor):
+    """
+    Runs at the 'before_dl' stage of audio-only jobs.
+
+    A single progressive (plain HTTP) audio format is piped straight into FFmpeg's stdin
+    while it downloads, producing the converted file yt-dlp would otherwise create
+    afterwards with FFmpegExtractAudio. yt-dlp then finds the converted file (final_ext),
+    skips its own download, and FFmpegExtractAudio sees the target format and does nothing.
+    Anything that can't be streamed, or a failed stream, falls back to the normal download.
+    """
+    def __init__(self, preferredcodec: str, preferredquality=None, progress_hook=None, downloader=None):
+        super().__init__(downloader)
+        self.preferredcodec = preferredcodec
+        self.preferredquality = preferredquality
+        self.progress_hook = progress_hook or (lambda d: None)
+
+    def _encoding(self, info) -> tuple[str, str | None, list] | None:
+        """ (extension, encoder, extra args) FFmpegExtractAudio would use for this format. """
+        source = _normalise_acodec(info.get('acodec'))
+        if source is None: # Unknown codec: can't tell whether FFmpegExtractAudio would copy or convert
+            return None
+        return _extract_audio_encoding(self._downloader, source, self.preferredcodec, self.preferredquality)
+
+    def _streamable(self, info) -> bool:
+        return (self.available
+                and info.get('protocol') in STREAMABLE_PROTOCOLS
+                and info.get('url')
+                and not info.get('requested_formats')
+                and not info.get('fragments')
+                and not info.get('is_live')
+                and info.get('section_start') is None and info.get('section_end') is None
+                and not self._downloader.params.get('keepvideo'))
+
+    def run(self, info):
+        if not self._streamable(info):
+            return [], info
+        encoding = self._encoding(info)
+        if encoding is None:
+            return [], info
+        extension, encoder, more_opts = encoding
+        if extension != self._downloader.params.get('final_ext'):
+            return [], info # yt-dlp wouldn't recognise the result as already converted
+        target = replace_extension(self._downloader.prepare_filename(info, 'temp'), extension, info.get('ext'))
+        if os.path.exists(target):
+            return [], info
+        part_path = prepend_extension(target, 'part')
+        codec_args = ['-acodec', encoder] if encoder else []
+        cmd = [self.executable, '-y', '-loglevel', 'error', '-i', 'pipe:0', '-vn', *codec_args, *more_opts, part_path]
+        self.to_screen(f'Streaming {info.get("format_id")} into FFmpeg: {target}')
+
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr_file)
+            error = None
+            try:
+                downloaded = self._pipe_download(info, proc.stdin, target)
+                proc.stdin.close()
+                returncode = proc.wait()
+            except (RequestError, OSError) as e: # Network failure, or FFmpeg exited early (broken pipe)
+                proc.kill()
+                returncode = proc.wait()
+                error = str(e)
+            except BaseException: # Cancelled
+                proc.kill()
+                proc.wait()
+                _remove_file(part_path)
+                raise
+            if error is not None or returncode != 0:
+                stderr_file.seek(0)
+                ffmpeg_error = stderr_file.read().decode('utf-8', 'replace').strip().splitlines()
+                reason = ffmpeg_error[-1] if ffmpeg_error else (error or f'exit code {returncode}')
+                _remove_file(part_path)
+                self.report_warning(f'Streaming conversion failed ({reason}); downloading normally')
+                self.progress_hook({'status': 'downloading', 'downloaded_bytes': 0, 'filename': target, 'info_dict': info,
+                                    '_percent_str': '0.0%'}) # Undo the streamed bytes in the job total
+                return [], info
+        os.replace(part_path, target)
+        info['acodec'] = 'aac' if self.preferredcodec == 'm4a' else self.preferredcodec # What the file now holds
+        self.progress_hook({'status': 'finished', 'downloaded_bytes': downloaded, 'total_bytes': downloaded,
+                            'filename': target, 'info_dict': info, '_total_bytes_str': format_bytes(downloaded)})
+        return [], info
+
+    def _pipe_download(self, info, sink, target) -> int:
+        """
+        Downloads the format into sink and returns the byte count. Uses ranged requests
+        of the format's http_chunk_size if it has one (YouTube throttles unranged requests).
+        """
+        chunk_size = (info.get('downloader_options') or {}).get('http_chunk_size')
+        total = info.get('filesize') or info.get('filesize_approx')
+        exact_total = None # The size the server reported; a stream ending before it is truncated
+        position, started = 0, time.monotonic()
+        while True:
+            headers = dict(info.get('http_headers') or {})
+            if chunk_size:
+                headers['Range'] = f'bytes={position}-{position + chunk_size - 1}'
+            response = self._downloader.urlopen(Request(info['url'], headers=headers))
+            try:
+                ranged = response.status == 206 # Servers may ignore Range and send the whole file
+                content_range = re.search(r'/(\d+)$', response.headers.get('Content-Range') or '')
+                if content_range:
+                    exact_total = int(content_range.group(1))
+                elif not ranged and response.headers.get('Content-Length'):
+                    exact_total = position + int(response.headers['Content-Length'])
+                total = exact_total or total
+                received = 0
+                while block := response.read(STREAM_BLOCK_SIZE):
+                    sink.write(block)
+                    received += len(block)
+                    position += len(block)
+                    self._report(info, target, position, total, started)
+            finally:
+                response.close()
+            if exact_total is not None:
+                if position >= exact_total:
+                    return position
+                if not ranged or not received: # Servers may also send shorter ranges than asked for
+                    raise OSError(f'The stream ended after {position} of {exact_total} bytes')
+            elif not ranged or received < chunk_size:
+                return position
+
+    def _report(self, info, target, downloaded, total, started):
+        """ Progress in the same shape as yt-dlp's own download progress (also raises on cancellation). """
+        elapsed = max(time.monotonic() - started, 1e-6)
+        speed = downloaded / elapsed
+        eta = (total - downloaded) / speed if total and speed else None
+        self.progress_hook({
+            'status': 'downloading', 'downloaded_bytes': downloaded, 'total_bytes': total, 'filename': target,
+            'info_dict': info, 'speed': speed, 'eta': eta,
+            '_percent_str': f'{downloaded * 100 / total:5.1f}%' if total else '0.0%',
+            '_total_bytes_str': format_bytes(total) if total else 'N/A',
+            '_speed_str': f'{format_bytes(speed)}/s',
+            '_eta_str': time.strftime('%M:%S', time.gmtime(eta)) if eta is not None else 'N/A',
+        })
+
+
+# --- Scratch Folder ---
+class MoveIntoLibraryPP(PostProcessor):
+    """
+    Runs last at the 'post_process' stage when intermediates live in a scratch folder.
+
+    Does the job of yt-dlp's MoveFiles (which follows it and then finds nothing left to
+    move), but moves each file with move_into_place(): a copy across filesystems goes to a
+    hidden name first, so the library never shows a half-copied file.
+    """
+    def run(self, info):
+        filepath = info.get('filepath')
+        files_to_move = info.get('__files_to_move')
+        if not filepath or files_to_move is None:
+            return [], info
+        final_dir = info.get('__finaldir', os.path.dirname(filepath))
+        files_to_move.setdefault(filepath, os.path.join(final_dir, os.path.basename(filepath)))
+        moved = {}
+        for old_path, new_path in files_to_move.items():
+            new_path = new_path or os.path.join(final_dir, os.path.basename(old_path))
+            if (os.path.abspath(old_path) == os.path.abspath(new_path) or not os.path.exists(old_path)
+                    or (os.path.exists(new_path) and not self.get_param('overwrites', True))):
+                moved[old_path] = new_path # Left for MoveFiles, which reports it
+                continue
+            self.to_screen(f'Moving "{os.path.basename(old_path)}" into {os.path.dirname(new_path)}')
+            try:
+                move_into_place(old_path, new_path)
+            except OSError as e:
+                raise PostProcessingError(f'Unable to move "{old_path}" to "{new_path}": {e}') from e
+            moved[new_path] = new_path
+            if old_path == filepath:
+                info['filepath'] = new_path
+        info['__files_to_move'] = moved
+        return [], info
+
+
+# --- Multi-Format Fan-Out ---
+# Codecs each video container can take without re-encoding (None: anything)
+CONTAINER_CODECS = {
+    "mp4": ({"h264", "hevc", "av1", "vp9"}, {"aac", "mp3", "opus", "alac", "flac", "ac3"}),
+    "mov": ({"h264", "hevc"}, {"aac", "alac", "mp3"}),
+    "webm": ({"vp8", "vp9", "av1"}, {"opus", "vorbis"}),
+    "mkv": (None, None),
+    "flv": ({"h264"}, {"aac", "mp3"}),
+    "avi": ({"h264", "mpeg4"}, {"mp3", "ac3"}),
+}
+VIDEO_ENCODERS = {"h264": "libx264", "h265": "libx265", "hevc": "libx265", "vp8": "libvpx", "vp9": "libvpx-vp9",
+                  "av1": "libaom-av1", "mpeg4": "mpeg4"}
+AUDIO_ENCODERS = {"aac": "aac", "mp3": "libmp3lame", "opus": "libopus", "vorbis": "libvorbis", "flac": "flac",
+                  "alac": "alac", "ac3": "ac3", "pcm_s16le": "pcm_s16le", "pcm_s16be": "pcm_s16be"}
+# Containers FFmpeg can write cover art into while converting; the rest go through EmbedThumbnailPP afterwards
+COVER_ART_CONTAINERS = {"mp3", "m4a", "mp4", "m4v", "mov", "flac", "mkv", "mka"}
+
+
+def _normalise_vcodec(vcodec: str | None) -> str | None:
+    """ Format metadata codec name (e.g. 'avc1.640028', 'vp09.00.40.08') -> short name ('h264', 'vp9'). """
+    if not vcodec or vcodec == "none":
+        return None
+    vcodec = vcodec.lower()
+    for prefixes, name in ((("avc", "h264"), "h264"), (("hev", "hvc", "h265"), "hevc"), (("vp09", "vp9"), "vp9"),
+                           (("vp08", "vp8"), "vp8"), (("av01", "av1"), "av1"), (("mp4v",), "mpeg4")):
+        if vcodec.startswith(prefixes):
+            return name
+    return vcodec
+
+
+def _can_copy(codec: str | None, allowed: set | None) -> bool:
+    return allowed is None or codec in allowed
+
+
+def _copies_only(args: list) -> bool:
+    """ True if FFmpeg output args only remux (every -c:v / -c:a is 'copy'). """
+    return all(args[i + 1] == 'copy' for i, arg in enumerate(args) if arg in ('-c:v', '-c:a'))
+
+
+class FanOutPP(FFmpegPostProcessor):
+    """
+    Runs at the 'post_process' stage in place of FFmpegExtractAudio / FFmpegVideoConvertor,
+    FFmpegMetadata and EmbedThumbnail.
+
+    Every target (a vars.filetypes entry, optionally with "video_codec_override" /
+    "audio_codec_override") is produced from the one downloaded file by a single FFmpeg
+    run with one output per target, so the source is read and each stream decoded once.
+    Streams a container can hold are copied instead of re-encoded. Tags, chapters and
+    cover art are written by the same run. A download that already is the target gets
+    them in place (tags_in_place, utils.tagwriter) instead of a remux of the whole file;
+    cover art for containers FFmpeg can't embed into (Ogg, Opus) is added the same way,
+    or left to EmbedThumbnailPP. The first
+    target becomes the entry's filepath; the others are moved into the library alongside
+    it and listed in info['__forgeyt_outputs'] (file name -> filetype key).
+    """
+    def __init__(self, targets: list[dict], preferredquality=None, add_metadata=False, add_chapters=False,
+                 embed_thumbnail=False, tags_in_place=False, downloader=None):
+        super().__init__(downloader)
+        self.targets = targets
+        self.preferredquality = preferredquality
+        self.add_metadata = add_metadata
+        self.add_chapters = add_chapters
+        self.embed_thumbnail = embed_thumbnail
+        self.tags_in_place = tags_in_place
+
+    def _output(self, target: dict, source: dict) -> tuple[str, list] | None:
+        """
+        (extension, FFmpeg output args) for one target, or None if the source can't provide it.
+        source has the downloaded file's ext, has_video/has_audio and codecs (None if unknown).
+        """
+        source_vcodec, source_acodec = source['vcodec'], source['acodec']
+        if target.get("audio"):
+            codec = target.get("audio_codec_override") or target.get("codec")
+            if not source['has_audio']:
+                return None
+            audio_args = ['-map', '0:a:0', '-vn', '-sn', '-dn']
+            if codec == 'copy':
+                return ACODECS[source_acodec][0] if source_acodec in ACODECS else 'mka', [*audio_args, '-c:a', 'copy']
+            encoding = _extract_audio_encoding(self._downloader, source_acodec, codec, self.preferredquality)
+            if encoding is None: # Codecs FFmpegExtractAudio doesn't know (e.g. PCM for AIFF)
+                return target["fileext"], [*audio_args, '-c:a', AUDIO_ENCODERS.get(codec, codec)]
+            extension, encoder, more_opts = encoding
+            if extension == 'm4a' and more_opts[:2] == ['-f', 'adts']:
+                more_opts = more_opts[2:] # A real MP4 container instead of raw ADTS, so tags and cover art fit
+            return extension, [*audio_args, *(['-c:a', encoder] if encoder else []), *more_opts]
+
+        if not source['has_video']:
+            return None
+        extension = target["fileext"]
+        allowed_video, allowed_audio = CONTAINER_CODECS.get(extension, (set(), set()))
+        if extension == source['ext']:
+            allowed_video = allowed_audio = None # Whatever the download holds fits its own container
+        video_codec = target.get("video_codec_override")
+        if video_codec == 'copy' or (video_codec is None and _can_copy(source_vcodec, allowed_video)):
+            video_args = ['-c:v', 'copy']
+        else:
+            video_codec = video_codec or target.get("codec")
+            video_args = ['-c:v', VIDEO_ENCODERS.get(video_codec, video_codec)]
+        audio_codec = target.get("audio_codec_override")
+        if not source['has_audio']:
+            audio_args = []
+        elif audio_codec == 'copy' or (audio_codec is None and _can_copy(source_acodec, allowed_audio)):
+            audio_args = ['-c:a', 'copy']
+        else:
+            audio_codec = audio_codec or target.get("audio_codec")
+            audio_args = ['-c:a', AUDIO_ENCODERS.get(audio_codec, audio_codec)]
+            if self.preferredquality and audio_codec not in ('flac', 'alac') and not audio_codec.startswith('pcm_'):
+                audio_args += ['-b:a', f'{self.preferredquality}k']
+        return extension, ['-map', '0:v:0', '-map', '0:a:0?', '-sn', '-dn', *video_args, *audio_args]
+
+    def _thumbnail(self, info) -> str | None:
+        """ The downloaded thumbnail to embed (a WebP with a wrong extension is renamed first), or None. """
+        thumbnails = info.get('thumbnails') or []
+        idx = next((-i for i, t in enumerate(thumbnails[::-1], 1) if t.get('filepath')), None)
+        if idx is None or not os.path.exists(thumbnails[idx]['filepath']):
+            return None
+        FFmpegThumbnailsConvertorPP(self._downloader).fixup_webp(info, idx)
+        return info['thumbnails'][idx]['filepath']
+
+    def _cover_args(self, extension: str, thumbnail: str, input_index: int, picture_index: int) -> list | None:
+        """
+        Output args embedding thumbnail (FFmpeg input input_index) as cover art, or None if
+        FFmpeg can't for this container. picture_index is the cover's index among the output's video streams.
+        """
+        if extension not in COVER_ART_CONTAINERS:
+            return None
+        thumbnail_ext = os.path.splitext(thumbnail)[1][1:].lower()
+        if extension in ('mkv', 'mka'):
+            mimetype = f'image/{thumbnail_ext.replace("jpg", "jpeg")}'
+            return ['-attach', self._ffmpeg_filename_argument(thumbnail),
+                    '-metadata:s:t', f'mimetype={mimetype}', '-metadata:s:t', f'filename=cover.{thumbnail_ext}']
+        codec = 'copy' if thumbnail_ext in ('jpg', 'jpeg', 'png') else 'png' # Other formats (WebP) aren't valid cover art
+        args = ['-map', f'{input_index}:v:0', f'-c:v:{picture_index}', codec, f'-disposition:v:{picture_index}', 'attached_pic']
+        if extension == 'mp3':
+            args += ['-id3v2_version', '3', f'-metadata:s:v:{picture_index}', 'title=Album cover',
+                     f'-metadata:s:v:{picture_index}', 'comment=Cover (front)']
+        return args
+
+    def _tag_inputs(self, info, source) -> tuple[list, list, str | None]:
+        """ (extra FFmpeg inputs, output args) for tags and chapters, and the chapter file to delete afterwards. """
+        inputs, args, metadata_path = [], [], None
+        if self.add_chapters:
+            self._fixup_chapters(info)
+            if info.get('chapters'):
+                metadata_path = replace_extension(source, 'meta')
+                for _ in FFmpegMetadataPP._get_chapter_opts(info['chapters'], metadata_path):
+                    pass # Writes the FFMETADATA file; the input index is our own
+                args += ['-map_metadata', '1', '-map_chapters', '1']
+                inputs.append((metadata_path, []))
+        if self.add_metadata:
+            args += [arg for option in FFmpegMetadataPP(self._downloader)._get_metadata_opts(info) for arg in option]
+        return inputs, args, metadata_path
+
+    def _write_tags_in_place(self, path, info, thumbnail) -> bool:
+        """ Tags, chapters and cover written straight into path (see utils.tagwriter); False if that failed. """
+        chapters = info.get('chapters') if self.add_chapters else None
+        try:
+            write_tags(path, tags_from_info(info) if self.add_metadata else {}, chapters, thumbnail)
+        except TagWriteError as e:
+            self.report_warning(f'Could not write tags in place ({e}); remuxing instead')
+            return False
+        self.to_screen(f'Wrote tags into "{os.path.basename(path)}" in place')
+        return True
+
+    @PostProcessor._restrict_to(images=False)
+    def run(self, info):
+        source = info['filepath']
+        source_info = {
+            'ext': os.path.splitext(source)[1][1:], 'has_video': info.get('vcodec') != 'none', 'has_audio': info.get('acodec') != 'none',
+            'vcodec': _normalise_vcodec(info.get('vcodec')), 'acodec': _normalise_acodec(info.get('acodec')),
+        }
+        tag_inputs, tag_args, metadata_path = self._tag_inputs(info, source)
+        inputs = [(source, []), *tag_inputs]
+        thumbnail = self._thumbnail(info) if self.embed_thumbnail else None
+        if thumbnail:
+            thumbnail_input = len(inputs)
+            inputs.append((thumbnail, []))
+        has_chapters = bool(self.add_chapters and info.get('chapters'))
+
+        # path: final file; write_path: where FFmpeg writes it; args: output args, None if FFmpeg has nothing to do;
+        # in_place: tags go straight into the unchanged download, args are the remux to fall back on
+        outputs, used_paths = [], set()
+        for target in self.targets:
+            output = self._output(target, source_info)
+            if output is None:
+                self.report_warning(f'Skipping {target["filetype"]}: the downloaded file has no usable '
+                                    f'{"audio" if target.get("audio") else "video"} stream')
+                continue
+            extension, args = output
+            path = replace_extension(source, extension)
+            cover_args = self._cover_args(extension, thumbnail, thumbnail_input, 0 if target.get("audio") else 1) if thumbnail else None
+            write_path, in_place = path, False
+            if path == source and path not in used_paths and _copies_only(args):
+                if not (tag_args or cover_args):
+                    args = None # The download already is this output
+                else:
+                    write_path = prepend_extension(source, 'temp') # Remux with tags, then replace the download
+                    in_place = self.tags_in_place and can_write_tags(source, has_chapters, thumbnail)
+            elif path == source and path not in used_paths:
+                write_path = prepend_extension(source, 'temp') # Re-encoded from the download, then replaces it
+            elif path in used_paths:
+                path = write_path = replace_extension(source, f'{target["filetype"]}.{extension}')
+            if args is not None:
+                args = [*args, *tag_args]
+                if cover_args:
+                    args = [arg for arg in args if arg != '-vn'] + cover_args # -vn would also drop the mapped cover
+            used_paths.add(path)
+            outputs.append({'filetype': target["filetype"], 'path': path, 'write_path': write_path, 'args': args,
+                            'in_place': in_place, 'cover': args is not None and bool(cover_args)})
+        if not outputs:
+            if metadata_path:
+                _remove_file(metadata_path)
+            raise PostProcessingError('None of the requested formats can be made from the downloaded file')
+
+        try:
+            # Tags for the unchanged download first, so a failure can still join the FFmpeg run as a remux
+            for output in outputs:
+                if output['in_place']:
+                    output['in_place'] = self._write_tags_in_place(output['path'], info, thumbnail)
+                    output['cover'] = output['cover'] or output['in_place'] and bool(thumbnail)
+            conversions = [(output['write_path'], output['args']) for output in outputs
+                           if output['args'] is not None and not output['in_place']]
+            if conversions:
+                verb = 'Remuxing' if all(_copies_only(args) for _, args in conversions) else 'Converting'
+                self.to_screen(f'{verb} "{os.path.basename(source)}" to '
+                               f'{", ".join(output["filetype"] for output in outputs if output["args"] is not None and not output["in_place"])}'
+                               ' in one pass')
+                for path, _ in conversions:
+                    _remove_file(path) # Leftovers of an interrupted run
+                try:
+                    self.real_run_ffmpeg(inputs, conversions)
+                except BaseException:
+                    for path, _ in conversions:
+                        _remove_file(path)
+                    raise
+        finally:
+            if metadata_path:
+                _remove_file(metadata_path)
+        for output in outputs:
+            if output['args'] is not None and not output['in_place'] and output['write_path'] != output['path']:
+                os.replace(output['write_path'], output['path'])
+
+        primary = outputs[0]
+        for output in outputs[1:]:
+            info['__files_to_move'].setdefault(output['path'], '') # Moved to the entry's final folder
+        info['filepath'] = primary['path']
+        info['ext'] = os.path.splitext(primary['path'])[1][1:]
+        info['__forgeyt_outputs'] = {os.path.basename(output['path']): output['filetype'] for output in outputs[1:]}
+        source_kept = any(output['path'] == source for output in outputs)
+        files_to_delete = [] if source_kept else [source]
+        if thumbnail and not primary['cover'] and self.tags_in_place and can_write_tags(primary['path'], cover=thumbnail):
+            # Containers FFmpeg can't embed into (Ogg, Opus): the cover alone, in place
+            try:
+                write_tags(primary['path'], {}, cover=thumbnail)
+                primary['cover'] = True
+            except TagWriteError as e:
+                self.report_warning(f'Could not embed the thumbnail in place ({e})')
+        if thumbnail and primary['cover']:
+            files_to_delete.append(thumbnail)
+        elif thumbnail: # Otherwise the regular postprocessor (AtomicParsley, or an error for unsupported containers)
+            thumbnail_files, info = EmbedThumbnailPP(self._downloader, already_have_thumbnail=False).run(info)
+            files_to_delete += thumbnail_files
+        return files_to_delete, info
+
+
+# --- Chapter Split ---
+CHAPTER_SPLIT_WORKERS = max(1, min(8, os.cpu_count() or 1))
+DEFAULT_CHAPTER_TEMPLATE = "%(title)s/%(section_number)02d - %(section_title)s.%(ext)s"
+
+
+class ParallelSplitChaptersPP(FFmpegSplitChaptersPP):
+    """
+    Runs at the 'post_process' stage once the file is finished (converted, tagged, with cover
+    art) and cuts it into one file per chapter, several FFmpeg runs at a time. Each cut is a
+    stream copy, since the finished file already has the target codecs; tags, cover art and
+    attachments carry over, with the chapter's title and track number on top.
+
+    Files are named by the 'chapter' output template, relative to the entry's folder, and
+    moved along with the entry. The whole file is kept, as with yt-dlp's --split-chapters.
+    """
+    def __init__(self, downloader=None, add_metadata=False, workers: int = CHAPTER_SPLIT_WORKERS):
+        super().__init__(downloader)
+        self.add_metadata = add_metadata
+        self.workers = workers
+
+    @classmethod
+    def pp_key(cls):
+        return 'SplitChapters'
+
+    def _configuration_args(self, exe, *args, **kwargs):
+        # The job's -progress file follows one FFmpeg run at a time; parallel cuts would garble it
+        config_args = super()._configuration_args(exe, *args, **kwargs)
+        return [arg for i, arg in enumerate(config_args)
+                if arg != '-progress' and (i == 0 or config_args[i - 1] != '-progress')]
+
+    def _cut(self, source, destination, chapter, number, total, info):
+        args = list(self.stream_copy_opts(ext=info.get('ext')))
+        if self.add_metadata:
+            args += ['-metadata', f'title={chapter.get("title") or f"Chapter {number}"}',
+                     '-metadata', f'track={number}/{total}']
+            if info.get('title'):
+                args += ['-metadata', f'album={info["title"]}']
+        os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+        self.real_run_ffmpeg(
+            [(source, ['-ss', str(chapter['start_time']), '-t', str(chapter['end_time'] - chapter['start_time'])])],
+            [(destination, args)])
+
+    @PostProcessor._restrict_to(images=False)
+    def run(self, info):
+        self._fixup_chapters(info)
+        chapters = info.get('chapters') or []
+        if len(chapters) < 2:
+            self.to_screen('Not splitting: the video has no chapters' if not chapters else 'Not splitting: the video is a single chapter')
+            return [], info
+
+        source = info['filepath']
+        source_dir = os.path.dirname(source)
+        final_dir = info.get('__finaldir', source_dir)
+        cuts = []
+        for number, chapter in enumerate(chapters, 1):
+            chapter_info = dict(info, section_number=number, section_title=chapter.get('title'),
+                                section_start=chapter.get('start_time'), section_end=chapter.get('end_time'))
+            name = self._downloader._prepare_filename(chapter_info, tmpl_type='chapter')
+            cuts.append((number, chapter, os.path.join(source_dir, name), os.path.join(final_dir, name)))
+
+        self.to_screen(f'Splitting "{os.path.basename(source)}" into {len(chapters)} chapters, '
+                       f'{min(self.workers, len(chapters))} at a time')
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(chapters))) as pool:
+            futures = [pool.submit(self._cut, source, destination, chapter, number, len(chapters), info)
+                       for number, chapter, destination, _ in cuts]
+        failed = [number for (number, *_), future in zip(cuts, futures) if future.exception() is not None]
+        if failed:
+            for _, _, destination, _ in cuts:
+                _remove_file(destination)
+            raise PostProcessingError(f'Splitting into chapters failed (chapter {failed[0]}): '
+                                      f'{futures[failed[0] - 1].exception()}')
+
+        for _, chapter, destination, final_path in cuts:
+            chapter['filepath'] = destination
+            info.setdefault('__files_to_move', {})[destination] = final_path
+        info['__forgeyt_chapter_files'] = [final_path for *_, final_path in cuts]
+        return [], info
+
+
+# --- Size Budget ---
+# Audio codecs without a bitrate to target
+LOSSLESS_ACODECS = {"flac", "alac", "wav", "pcm_s16le", "pcm_s16be"}
+# Encoder settings beyond the bitrate (libvpx-vp9's defaults are very slow)
+BUDGET_ENCODER_ARGS = {"libvpx-vp9": ["-row-mt", "1", "-cpu-used", "4"]}
+BUDGET_ATTEMPTS = 2 # A second encode, at a bitrate scaled by the first one's overshoot, if that didn't fit
+
+
+class EstimateFormatSizesPP(PostProcessor):
+    """
+    Runs at the 'pre_process' stage, before format selection: gives HLS/DASH formats a size
+    estimate from their bitrate and the duration (yt-dlp only estimates progressive ones),
+    so SizeBudgetSelector can weigh them as well.
+    """
+    def run(self, info):
+        estimated = estimate_missing_sizes(info.get('formats') or [], info.get('duration'))
+        if estimated:
+            self.write_debug(f'Estimated the size of {estimated} formats from their bitrate')
+        return [], info
+
+
+class SizeBudgetTranscodePP(FFmpegPostProcessor):
+    """
+    Runs at the 'post_process' stage once the file is converted and tagged: re-encodes it to
+    a bitrate that fits budget bytes if it is still larger, which only happens when no format
+    fit (or the size estimates were off). Video gets what the audio leaves and is scaled down
+    to what that bitrate can carry; tags, chapters, cover art and subtitles are copied.
+    vcodec/acodec name the codecs to encode to (keys of VIDEO_ENCODERS / AUDIO_ENCODERS).
+    """
+    def __init__(self, budget: int, vcodec: str | None = None, acodec: str | None = None, downloader=None):
+        super().__init__(downloader)
+        self.budget = budget
+        self.vcodec = vcodec
+        self.acodec = acodec
+
+    @classmethod
+    def pp_key(cls):
+        return 'SizeBudget'
+
+    def _configuration_args(self, exe, *args, **kwargs):
+        # The job's codec and bitrate arguments are for the conversion; here the budget decides
+        config_args = super()._configuration_args(exe, *args, **kwargs)
+        encoding = ('-c:v', '-c:a', '-b:v', '-b:a', '-vcodec', '-acodec')
+        return [arg for i, arg in enumerate(config_args)
+                if arg not in encoding and (i == 0 or config_args[i - 1] not in encoding)]
+
+    def _encoding_args(self, budget, duration, video_stream, audio_streams, extension):
+        video_kbps, audio_kbps, height = budget_bitrates(budget, duration, video_stream is not None, audio_streams)
+        args = ['-map', '0', '-dn', '-c', 'copy'] # V: video streams except cover art, which is copied
+        if video_stream is not None:
+            encoder = VIDEO_ENCODERS[self.vcodec]
+            args += ['-c:V', encoder, '-b:V', f'{video_kbps}k', '-maxrate:V', f'{video_kbps * 3 // 2}k',
+                     '-bufsize:V', f'{video_kbps * 2}k', '-pix_fmt:V', 'yuv420p', *BUDGET_ENCODER_ARGS.get(encoder, [])]
+            if height and (video_stream.get('height') or 0) > height:
+                args += ['-filter:V', f'scale=-2:{height}']
+        if audio_streams:
+            args += ['-c:a', AUDIO_ENCODERS[self.acodec], '-b:a', f'{audio_kbps}k']
+        if extension == 'mp3':
+            args += ['-id3v2_version', '3']
+        description = ', '.join(filter(None, (
+            video_kbps and f'video {video_kbps}k{f" at {height}p" if "-filter:V" in args else ""}',
+            audio_streams and f'audio {audio_kbps}k')))
+        return args, description
+
+    @PostProcessor._restrict_to(images=False)
+    def run(self, info):
+        path = info['filepath']
+        size = os.path.getsize(path)
+        if size <= self.budget:
+            return [], info
+
+        metadata = self.get_metadata_object(path)
+        streams = metadata.get('streams') or []
+        video_stream = next((stream for stream in streams if stream.get('codec_type') == 'video'
+                             and not (stream.get('disposition') or {}).get('attached_pic')), None)
+        audio_streams = sum(stream.get('codec_type') == 'audio' for stream in streams)
+        duration = float_or_none((metadata.get('format') or {}).get('duration')) or info.get('duration')
+        problem = (
+            'its duration is unknown' if not duration
+            else f'no encoder for {self.vcodec or "its"} video' if video_stream is not None and self.vcodec not in VIDEO_ENCODERS
+            else f'{self.acodec} audio has no bitrate to target' if audio_streams and (self.acodec not in AUDIO_ENCODERS or self.acodec in LOSSLESS_ACODECS)
+            else None)
+        if problem:
+            self.report_warning(f'"{os.path.basename(path)}" ({format_bytes(size)}) exceeds the size budget of '
+                                f'{format_bytes(self.budget)}, but can\'t be re-encoded to fit: {problem}')
+            return [], info
+
+        extension = os.path.splitext(path)[1][1:].lower()
+        temp_path = prepend_extension(path, 'temp')
+        budget, new_size, previous_args = self.budget, None, None
+        for _ in range(BUDGET_ATTEMPTS):
+            args, description = self._encoding_args(budget, duration, video_stream, audio_streams, extension)
+            if args == previous_args:
+                break # Already at the minimum bitrates
+            previous_args = args
+            self.to_screen(f'Re-encoding "{os.path.basename(path)}" ({format_bytes(size)}) to fit '
+                           f'{format_bytes(self.budget)}: {description}')
+            try:
+                self.real_run_ffmpeg([(path, [])], [(temp_path, args)])
+            except BaseException:
+                _remove_file(temp_path)
+                raise
+            new_size = os.path.getsize(temp_path)
+            if new_size <= self.budget:
+                break
+            budget = int(budget * self.budget / new_size * 0.97)
+        if new_size >= size:
+            _remove_file(temp_path)
+            self.report_warning(f'Re-encoding made "{os.path.basename(path)}" no smaller; keeping it at {format_bytes(size)}')
+            return [], info
+        os.replace(temp_path, path)
+        if new_size > self.budget:
+            self.report_warning(f'"{os.path.basename(path)}" is {format_bytes(new_size)} after re-encoding, '
+                                f'over the size budget of {format_bytes(self.budget)}')
+        return [], info
+
+
+# --- SponsorBlock ---
+class CachedSponsorBlockPP(SponsorBlockPP):
+    """
+    yt-dlp's SponsorBlockPP with a SponsorSegmentCache in front of the API.
+    A fresh cache entry answers without a request; if the API fails, an expired entry is used.
+    """
+    def __init__(self, downloader=None, categories=None, api=DEFAULT_SPONSORBLOCK_API_URL, cache=None):
+        super().__init__(downloader, categories, api)
+        self.cache = cache
+
+    @classmethod
+    def pp_key(cls):
+        return 'SponsorBlock'
+
+    def _get_sponsor_segments(self, video_id, service):
+        if self.cache is None:
+            return super()._get_sponsor_segments(video_id, service)
+        cached = self.cache.get(self._API_URL, service, video_id, self._categories)
+        if cached is not None:
+            self.to_screen('Using cached SponsorBlock segments')
+            return cached
+        try:
+            segments = super()._get_sponsor_segments(video_id, service)
+        except PostProcessingError as e:
+            stale = self.cache.get(self._API_URL, service, video_id, self._categories, allow_stale=True)
+            if stale is None:
+                raise
+            self.report_warning(f'{e}; using SponsorBlock segments cached earlier')
+            return stale
+        self.cache.put(self._API_URL, service, video_id, self._categories, segments)
+        return segments
+
+
+# Encoders for re-encoding the cut edges; the middle of each kept part is copied
+SMART_CUT_ENCODERS = {"h264": "libx264", "hevc": "libx265", "vp9": "libvpx-vp9", "vp8": "libvpx"}
+H264_PROFILES = {"Baseline": "baseline", "Constrained Baseline": "baseline", "Main": "main", "High": "high",
+                 "High 10": "high10", "High 4:2:2": "high422", "High 4:4:4 Predictive": "high444"}
+KEYFRAME_TOLERANCE = 0.001
+
+
+class SmartCutChaptersPP(ModifyChaptersPP):
+    """
+    ModifyChapters that removes segments without re-encoding the whole video.
+
+    Each kept part is split at its first and last keyframe: the stretch between them is
+    stream-copied, only the partial GOPs at the edges are re-encoded (with the source's
+    codec), and the pieces are joined again. Audio and subtitles are cut by stream copy,
+    which is exact for audio. Videos it can't handle (other codecs, audio only, failed
+    probes) are cut the way ModifyChapters does.
+    """
+    @classmethod
+    def pp_key(cls):
+        return 'ModifyChapters'
+
+    def remove_chapters(self, filename, ranges_to_cut, concat_opts, force_keyframes=False):
+        if force_keyframes:
+            return super().remove_chapters(filename, ranges_to_cut, concat_opts, force_keyframes)
+        try:
+            video = next((s for s in self.get_metadata_object(filename)['streams'] if s.get('codec_type') == 'video'
+                          and not (s.get('disposition') or {}).get('attached_pic')), None)
+        except PostProcessingError:
+            video = None
+        if video is None or video.get('codec_name') not in SMART_CUT_ENCODERS:
+            return super().remove_chapters(filename, ranges_to_cut, concat_opts, force_keyframes)
+        out_file = prepend_extension(filename, 'temp')
+        work_dir = tempfile.mkdtemp(prefix='.smartcut-', dir=os.path.dirname(os.path.abspath(filename)))
+        try:
+            self.to_screen(f'Removing chapters from {filename} (re-encoding only at the cuts)')
+            self._smart_cut(filename, out_file, concat_opts, video, work_dir)
+        except PostProcessingError as e:
+            self.report_warning(f'Smart cut failed ({e}); cutting at keyframes instead')
+            _remove_file(out_file)
+            return super().remove_chapters(filename, ranges_to_cut, concat_opts, force_keyframes)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return out_file
+
+    def _keyframes(self, filename) -> list[tuple[float, float]]:
+        """ (pts, dts) of the video keyframes, read from packet flags (nothing is decoded). """
+        if not self.probe_available:
+            raise PostProcessingError('ffprobe is needed to find keyframes')
+        stdout, stderr, returncode = Popen.run(
+            [self.probe_executable, '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'packet=pts_time,dts_time,flags',
+             '-of', 'csv=p=0', filename], text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if returncode != 0:
+            raise PostProcessingError(stderr.strip() or 'ffprobe failed')
+        keyframes = {}
+        for line in stdout.splitlines():
+            pts_time, dts_time, flags = (line.split(',') + ['', ''])[:3]
+            if 'K' in flags and pts_time not in ('', 'N/A'):
+                pts = float(pts_time)
+                keyframes[pts] = float(dts_time) if dts_time not in ('', 'N/A') else pts
+        return sorted(keyframes.items())
+
+    def _smart_cut(self, filename, out_file, concat_opts, video, work_dir):
+        duration = self._get_real_video_duration(filename)
+        keyframes = self._keyframes(filename)
+        codec = video['codec_name']
+        encode_args = ['-c:v', SMART_CUT_ENCODERS[codec], '-pix_fmt', video.get('pix_fmt') or 'yuv420p']
+        if codec == 'h264' and video.get('profile') in H264_PROFILES:
+            encode_args += ['-profile:v', H264_PROFILES[video['profile']]]
+        encode_args += ['-crf', '18'] if codec in ('h264', 'hevc') else ['-crf', '24', '-b:v', '0']
+
+        # Pieces keep the source's timestamps (-copyts), so every cut below is in source time
+        copied = os.path.join(work_dir, 'video.mkv')
+        self.real_run_ffmpeg([(filename, [])], [(copied, ['-map', '0:v:0', '-c:v', 'copy'])])
+        pieces, piece_opts = [], []
+        def add_piece(start, end, copy, outpoint=None):
+            if end - start <= KEYFRAME_TOLERANCE:
+                return
+            if copy:
+                piece = copied
+            else:
+                piece = os.path.join(work_dir, f'{len(pieces):04d}.mkv')
+                self.real_run_ffmpeg(
+                    [(filename, ['-ss', f'{start:.6f}', '-to', f'{end:.6f}'])],
+                    [(piece, ['-map', '0:v:0', *encode_args, '-copyts'])])
+            pieces.append(piece)
+            piece_opts.append({'inpoint': f'{start:.6f}', 'outpoint': f'{end if outpoint is None else outpoint:.6f}',
+                               'duration': f'{end - start:.6f}'})
+
+        for opts in concat_opts:
+            start, end = float(opts.get('inpoint', 0)), float(opts.get('outpoint', duration))
+            inner = [k for k in keyframes if start - KEYFRAME_TOLERANCE <= k[0] <= end + KEYFRAME_TOLERANCE]
+            if len(inner) < 2:
+                add_piece(start, end, copy=False) # No whole GOP inside: re-encode the part
+                continue
+            (first, _), (last, last_dts) = inner[0], inner[-1]
+            add_piece(start, first, copy=False)
+            # The concat demuxer cuts by decode time; stop before the closing keyframe is decoded
+            add_piece(first, last, copy=True, outpoint=last_dts)
+            add_piece(last, end, copy=False)
+
+        # Join the video pieces; take audio/subtitles from the original, cut by stream copy
+        video_spec = os.path.join(work_dir, 'video.concat')
+        with open(video_spec, 'w', encoding='utf-8') as f:
+            f.writelines(self._concat_spec(pieces, piece_opts))
+        other_spec = os.path.join(work_dir, 'other.concat')
+        with open(other_spec, 'w', encoding='utf-8') as f:
+            f.writelines(self._concat_spec([filename] * len(concat_opts), concat_opts))
+        concat_input = ['-hide_banner', '-nostdin', '-f', 'concat', '-safe', '0']
+        self.real_run_ffmpeg(
+            [(video_spec, concat_input), (other_spec, concat_input)],
+            [(out_file, ['-map', '0:v:0', '-map', '1:a?', '-map', '1:s?', '-c', 'copy', '-map_metadata', '1'])])
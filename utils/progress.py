@@ -0,0 +1,180 @@
+"""Job-level progress aggregated over every entry of a download (single video, playlist or batch)"""
+import time
+import threading
+
+
+def format_bytes(num_bytes: float | None) -> str:
+    """Formats a byte count like yt-dlp does (e.g. '12.34MiB')."""
+    if num_bytes is None:
+        return "N/A"
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(num_bytes) < 1024.0 or unit == "TiB":
+            return f"{num_bytes:.2f}{unit}"
+        num_bytes /= 1024.0
+
+
+def format_eta(seconds: float | None) -> str:
+    """Formats seconds as HH:MM:SS (or MM:SS under an hour)."""
+    if seconds is None or seconds < 0:
+        return "N/A"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+def estimate_entry_bytes(info: dict) -> int | None:
+    """
+    Estimates the source size of one entry from its info dict.
+    Uses every requested format (video+audio merges) and falls back to bitrate x duration.
+    """
+    formats = info.get("requested_formats") or [info]
+    total = 0
+    for fmt in formats:
+        size = fmt.get("filesize") or fmt.get("filesize_approx")
+        if not size and fmt.get("tbr") and info.get("duration"):
+            size = fmt["tbr"] * 1000 / 8 * info["duration"]
+        if not size:
+            return None
+        total += size
+    return int(total) or None
+
+
+class JobProgress:
+    """
+    Byte-weighted progress across all entries of a job.
+
+    Every entry counts with its (known or estimated) byte size, plus a share of that size
+    for postprocessing. Entries that have not started yet are assumed to be as large as the
+    average known entry. Running sums keep each update O(1) even for very large playlists.
+    """
+    def __init__(self, postprocess_weight: float = 0.1, clock=time.monotonic):
+        self.postprocess_weight = max(0.0, postprocess_weight)
+        self.clock = clock
+        self.started_at = clock()
+        self.entry_count = 1
+        self._entries = {}        # key -> {"total", "downloaded", "postprocess", "finished"}
+        self._files = {}          # filename -> (entry key, downloaded bytes, total bytes)
+        self._known_total = 0     # sum of entry totals that are known
+        self._known_count = 0     # number of entries with a known total
+        self._downloaded = 0      # bytes downloaded across the whole job
+        self._postprocessed = 0.0 # byte-equivalents of finished postprocessing
+        self._current_key = None
+        self._lock = threading.RLock() # Postprocessing progress arrives from a watcher thread
+
+    # --- Entry bookkeeping ---
+    @staticmethod
+    def entry_key(info: dict):
+        return info.get("playlist_autonumber") or info.get("playlist_index") or info.get("id") or "single"
+
+    def _entry(self, info: dict) -> dict:
+        key = self.entry_key(info)
+        self._current_key = key
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = {"total": None, "downloaded": 0, "postprocess": 0.0, "finished": False,
+                     "position": info.get("playlist_autonumber") or info.get("playlist_index") or 1}
+            self._entries[key] = entry
+            self.entry_count = max(self.entry_count, info.get("n_entries") or info.get("playlist_count") or 1)
+            self._set_total(entry, estimate_entry_bytes(info))
+        return entry
+
+    def _set_total(self, entry: dict, total: int | None):
+        if not total or total == entry["total"]:
+            return
+        if entry["total"] is None:
+            self._known_count += 1
+        self._known_total += total - (entry["total"] or 0)
+        entry["total"] = total
+
+    # --- Updates from yt-dlp hooks ---
+    def update_download(self, d: dict):
+        """Feeds a yt-dlp progress hook dict ('downloading' or 'finished')."""
+        with self._lock:
+            self._update_download(d)
+
+    def _update_download(self, d: dict):
+        info = d.get("info_dict") or {}
+        entry = self._entry(info)
+        filename = d.get("filename") or d.get("tmpfilename") or "current"
+        file_total = d.get("total_bytes") or d.get("total_bytes_estimate")
+        downloaded = d.get("downloaded_bytes") or 0
+        if d.get("status") == "finished":
+            downloaded = file_total or downloaded
+
+        _, old_downloaded, _ = self._files.get(filename, (None, 0, None))
+        self._files[filename] = (self.entry_key(info), downloaded, file_total)
+        delta = downloaded - old_downloaded
+        entry["downloaded"] += delta
+        self._downloaded += delta
+
+        # Without metadata sizes, grow the entry total from what the streams report
+        if entry["total"] is None or entry["downloaded"] > entry["total"]:
+            files_total = sum(t or dl for k, dl, t in self._files.values() if k == self.entry_key(info))
+            self._set_total(entry, max(files_total, entry["downloaded"]))
+
+    def update_postprocess(self, info: dict, fraction: float):
+        """Raises the postprocessing completion (0..1) of the entry described by info; it never moves backwards."""
+        with self._lock:
+            entry = self._entry(info)
+            fraction = max(entry["postprocess"], min(1.0, fraction))
+            weight = (entry["total"] or 0) * self.postprocess_weight
+            self._postprocessed += (fraction - entry["postprocess"]) * weight
+            entry["postprocess"] = fraction
+
+    def finish_entry(self, info: dict):
+        """Marks an entry as completely downloaded and postprocessed."""
+        with self._lock:
+            entry = self._entry(info)
+            if entry["total"] and entry["downloaded"] < entry["total"]:
+                delta = entry["total"] - entry["downloaded"]
+                entry["downloaded"] += delta
+                self._downloaded += delta
+            self.update_postprocess(info, 1.0)
+            entry["finished"] = True
+
+    # --- Derived figures ---
+    def estimated_bytes(self) -> float:
+        """Estimated source bytes of the whole job."""
+        average = (self._known_total / self._known_count) if self._known_count else 0
+        unseen = max(0, self.entry_count - len(self._entries))
+        return self._known_total + unseen * average
+
+    def estimated_total(self) -> float:
+        """Estimated work of the whole job in byte-equivalents (source bytes plus postprocessing share)."""
+        return self.estimated_bytes() * (1 + self.postprocess_weight)
+
+    def fraction(self) -> float:
+        total = self.estimated_total()
+        if total <= 0:
+            return 0.0
+        return max(0.0, min(1.0, (self._downloaded + self._postprocessed) / total))
+
+    def throughput(self) -> float | None:
+        """Average download rate of the whole job in bytes/s."""
+        elapsed = self.clock() - self.started_at
+        return self._downloaded / elapsed if elapsed > 0 and self._downloaded else None
+
+    def eta(self) -> float | None:
+        speed = self.throughput()
+        total = self.estimated_total()
+        if not speed or total <= 0:
+            return None
+        remaining = total - self._downloaded - self._postprocessed
+        return max(0.0, remaining / speed)
+
+    def current_position(self) -> int:
+        entry = self._entries.get(self._current_key)
+        return entry["position"] if entry else 1
+
+    def summary(self) -> str:
+        """One-line summary, appended to progress lines as '[job] ...'."""
+        with self._lock:
+            return self._summary()
+
+    def _summary(self) -> str:
+        items = f" (item {self.current_position()}/{self.entry_count})" if self.entry_count > 1 else ""
+        speed = self.throughput()
+        speed_str = f"{format_bytes(speed)}/s" if speed else "N/A"
+        return (f"[job] {self.fraction() * 100:5.1f}% of ~{format_bytes(self.estimated_bytes())}{items}"
+                f" at {speed_str} ETA {format_eta(self.eta())}")
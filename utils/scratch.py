@@ -0,0 +1,68 @@
+"""Scratch folder for a job's intermediate files, and moving finished files into the library"""
+import errno
+import os
+import shutil
+import tempfile
+import time
+
+JOB_FOLDER_PREFIX = "forgeyt-job-"
+STALE_JOB_HOURS = 24 # Job folders older than this were left behind by a crash and are removed
+
+
+def create_job_folder(scratch_path: str) -> str:
+    """ A new, empty folder for one job's intermediates, so parallel jobs never share files. """
+    os.makedirs(scratch_path, exist_ok=True)
+    return tempfile.mkdtemp(prefix=JOB_FOLDER_PREFIX, dir=scratch_path)
+
+
+def remove_job_folder(job_folder: str | None):
+    """ Deletes a job folder with whatever is left in it (partial downloads, unmerged streams). """
+    if job_folder:
+        shutil.rmtree(job_folder, ignore_errors=True)
+
+
+def prune_stale_job_folders(scratch_path: str, max_age_hours: float = STALE_JOB_HOURS) -> int:
+    """ Removes job folders left behind by earlier runs. Returns how many were removed. """
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    try:
+        entries = list(os.scandir(scratch_path))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.name.startswith(JOB_FOLDER_PREFIX) and entry.is_dir(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def move_into_place(source: str, target: str):
+    """
+    Moves a finished file to target so that target never exists half-written.
+
+    On the same filesystem this is a rename. Across filesystems (scratch on a local disk,
+    library on a network share) the file is copied next to target under a hidden name
+    and then renamed over it; the source is removed only once target is complete.
+    """
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    try:
+        os.replace(source, target)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    temp_path = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.{os.getpid()}.part")
+    try:
+        shutil.copyfile(source, temp_path)
+        shutil.copymode(source, temp_path)
+        os.replace(temp_path, target)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    os.remove(source)
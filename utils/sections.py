@@ -0,0 +1,72 @@
+"""Parsing of time ranges / chapter sections to download instead of whole videos"""
+import math
+import re
+
+_UNIT_DURATION = re.compile(r"^(?:(\d+(?:\.\d+)?)h)?(?:(\d+(?:\.\d+)?)m)?(?:(\d+(?:\.\d+)?)s?)?$")
+
+
+def parse_timestamp(text: str) -> float:
+    """
+    Seconds from '1:02:03.5', '62:03', '3723', '1h2m3s' or '-30' (negative: from the end).
+    Raises ValueError for anything else.
+    """
+    text = text.strip().lower()
+    sign = -1 if text.startswith("-") else 1
+    text = text.lstrip("-").strip()
+    if ":" in text:
+        parts = text.split(":")
+        if len(parts) > 3 or not all(re.fullmatch(r"\d+(?:\.\d+)?", p) for p in parts):
+            raise ValueError(f"Invalid timestamp: '{text}'")
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+        return sign * seconds
+    match = _UNIT_DURATION.match(text)
+    if not text or not match or not any(match.groups()):
+        raise ValueError(f"Invalid timestamp: '{text}'")
+    hours, minutes, seconds = (float(g) if g else 0.0 for g in match.groups())
+    return sign * (hours * 3600 + minutes * 60 + seconds)
+
+
+def parse_sections(text: str) -> tuple[list[str], list[tuple[float, float]]]:
+    """
+    Splits a comma-separated section list into chapter title regexes and time ranges.
+
+    "1:02:00-1:04:00, 2:10:00-" -> ([], [(3720, 3840), (7800, inf)])
+    "*intro, -5:00"             -> (["intro"], [(0, 300)])
+    An omitted start means the beginning, an omitted end the end of the video.
+    Raises ValueError for an invalid entry.
+    """
+    chapters, ranges = [], []
+    for item in (part.strip() for part in (text or "").split(",")):
+        if not item:
+            continue
+        if item.startswith("*"):
+            regex = item[1:].strip()
+            try:
+                re.compile(regex)
+            except re.error as e:
+                raise ValueError(f"Invalid chapter pattern '{regex}': {e}") from e
+            chapters.append(regex)
+            continue
+        # The range separator is a '-' that isn't the sign of the end timestamp ('1:00--30' = 1:00 to 30s before the end)
+        match = re.fullmatch(r"(-?[^-]*)-(-?[^-]*)", item)
+        if not match:
+            raise ValueError(f"Invalid time range '{item}' (expected start-end, e.g. 1:02:00-1:04:00)")
+        start_text, end_text = match.groups()
+        start = parse_timestamp(start_text) if start_text.strip() else 0.0
+        end = parse_timestamp(end_text) if end_text.strip() else math.inf
+        if start >= 0 and 0 <= end <= start:
+            raise ValueError(f"Time range '{item}' ends before it starts")
+        ranges.append((start, end))
+    return chapters, ranges
+
+
+def section_label(start: float, end: float) -> str:
+    """ Short display form of a range, e.g. '1:02:00-1:04:00' or '10:00-end'. """
+    def fmt(seconds):
+        seconds = int(seconds)
+        sign = "-" if seconds < 0 else ""
+        hours, rest = divmod(abs(seconds), 3600)
+        return f"{sign}{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{sign}{rest // 60}:{rest % 60:02d}"
+    return f"{fmt(start)}-{'end' if math.isinf(end) else fmt(end)}"
@@ -0,0 +1,82 @@
+"""Fetching subtitles and thumbnails on a small pool while the main media stream downloads"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from yt_dlp import YoutubeDL
+from yt_dlp.downloader import get_suitable_downloader
+from yt_dlp.utils import replace_extension
+
+SIDE_ASSET_WORKERS = 3
+# Futures of an entry's side assets, in its info dict; AwaitSideAssetsPP collects them
+PENDING_SIDE_ASSETS_KEY = '__forgeyt_side_assets'
+
+
+class CachedThumbnailsYoutubeDL(YoutubeDL):
+    """
+    YoutubeDL that keeps a thumbnail ThumbnailCacheLookupPP placed from the cache (it sets the
+    thumbnail's 'filepath') instead of deleting and fetching it again. Every other file
+    follows the job's overwrite setting.
+    """
+    def _write_thumbnails(self, label, info_dict, filename, thumb_filename_base=None):
+        if label == 'video' and not self.params.get('write_all_thumbnails'):
+            for thumbnail in reversed(info_dict.get('thumbnails') or []):
+                path = thumbnail.get('filepath')
+                if path and os.path.exists(path):
+                    self.to_screen('[info] Video thumbnail is already present')
+                    final_path = replace_extension(thumb_filename_base or filename, os.path.splitext(path)[1][1:], info_dict.get('ext'))
+                    return [(path, final_path)]
+        return super()._write_thumbnails(label, info_dict, filename, thumb_filename_base)
+
+
+class SideAssetsYoutubeDL(CachedThumbnailsYoutubeDL):
+    """
+    YoutubeDL that writes an entry's subtitles (one task per language) and thumbnail in the
+    background instead of before the media download, so their latency hides behind the main
+    stream. The files are registered with the entry once AwaitSideAssetsPP, the first
+    post_process step, has waited for them; everything that reads them has to run after it.
+    Background subtitle downloads don't report progress, which follows the main stream.
+    """
+    def __init__(self, params=None, auto_init=True, workers: int = SIDE_ASSET_WORKERS):
+        self._side_asset_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="forgeyt-assets")
+        self._side_asset_thread = threading.local()
+        super().__init__(params, auto_init)
+        self.add_close_hook(lambda: self._side_asset_pool.shutdown(wait=False, cancel_futures=True))
+
+    def _submit_side_asset(self, info_dict, func, *args):
+        def run():
+            self._side_asset_thread.active = True
+            try:
+                return func(*args)
+            finally:
+                self._side_asset_thread.active = False
+        info_dict.setdefault(PENDING_SIDE_ASSETS_KEY, []).append(self._side_asset_pool.submit(run))
+        return [] # Registered by AwaitSideAssetsPP instead
+
+    def _write_subtitles(self, info_dict, filename):
+        subtitles = info_dict.get('requested_subtitles')
+        if not subtitles or not (self.params.get('writesubtitles') or self.params.get('writeautomaticsub')):
+            return super()._write_subtitles(info_dict, filename)
+        for lang, sub_info in subtitles.items():
+            # A view of the entry with one language; yt-dlp sets sub_info['filepath'] on the shared dict
+            single = dict(info_dict, requested_subtitles={lang: sub_info})
+            single.pop(PENDING_SIDE_ASSETS_KEY, None)
+            self._submit_side_asset(info_dict, super()._write_subtitles, single, filename)
+        return []
+
+    def _write_thumbnails(self, label, info_dict, filename, thumb_filename_base=None):
+        wanted = self.params.get('writethumbnail') or self.params.get('write_all_thumbnails')
+        if label != 'video' or not wanted or not info_dict.get('thumbnails'):
+            return super()._write_thumbnails(label, info_dict, filename, thumb_filename_base)
+        return self._submit_side_asset(info_dict, super()._write_thumbnails, label, info_dict, filename, thumb_filename_base)
+
+    def dl(self, name, info, subtitle=False, test=False):
+        if not getattr(self._side_asset_thread, 'active', False):
+            return super().dl(name, info, subtitle, test)
+        # YoutubeDL.dl without the progress hooks, which would mistake the subtitle for the media file
+        params = dict(self.params, noprogress=True) # Its console progress would interleave with the media's
+        fd = get_suitable_downloader(info, params)(self, params)
+        new_info = self._copy_infodict(info)
+        if new_info.get('http_headers') is None:
+            new_info['http_headers'] = self._calc_headers(new_info)
+        return fd.download(name, new_info, subtitle)
@@ -0,0 +1,141 @@
+"""Compact metadata sidecars: trimmed, compressed info.json files and a reader for them"""
+import gzip
+import io
+import json
+import os
+import re
+import threading
+
+try:
+    import zstandard # Optional; without it zstd sidecars fall back to gzip
+except ImportError:
+    zstandard = None
+
+# Fields of yt-dlp's info dict that make up most of an .info.json but are rarely needed afterwards
+BULKY_FIELDS = (
+    "formats", "requested_formats", "requested_downloads", "thumbnails", "automatic_captions",
+    "subtitles", "requested_subtitles", "heatmap", "http_headers", "fragments", "storyboards",
+    "_format_sort_fields", "_has_drm", "__files_to_move", "__postprocessors",
+)
+SIDECAR_COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+# Setting values of "infojson_format" -> compression of the compact sidecar ("full" keeps yt-dlp's own .info.json)
+INFOJSON_FORMATS = {"compact-gzip": "gzip", "compact-zstd": "zstd", "compact": "none"}
+# Choices offered on the settings page (label -> setting value)
+INFOJSON_FORMAT_LABELS = {"Full .info.json": "full", "Compact, gzip": "compact-gzip",
+                          "Compact, zstd": "compact-zstd", "Compact, plain JSON": "compact"}
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_append_lock = threading.Lock() # Playlist files are appended to, one record per line
+
+
+def compact_info(info: dict) -> dict:
+    """
+    The info dict without its bulky lists. What they held is summarised:
+    subtitle languages and the preferred thumbnail URL stay available.
+    """
+    compact = {k: v for k, v in info.items() if k not in BULKY_FIELDS and not k.startswith("__")}
+    if info.get("subtitles"):
+        compact["subtitle_languages"] = sorted(info["subtitles"])
+    if info.get("automatic_captions"):
+        compact["automatic_caption_languages"] = sorted(info["automatic_captions"])
+    if not compact.get("thumbnail") and info.get("thumbnails"):
+        compact["thumbnail"] = info["thumbnails"][-1].get("url")
+    return compact
+
+
+def resolve_compression(compression: str) -> str:
+    if compression == "zstd" and zstandard is None:
+        print("Warning: 'zstandard' is not installed; writing gzip sidecars instead.")
+        return "gzip"
+    return compression if compression in SIDECAR_COMPRESSIONS else "gzip"
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return data
+
+
+def _encode(record: dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+# --- Writing ---
+def sidecar_path(media_path: str, compression: str) -> str:
+    """ <media name>.info.json[.gz|.zst] next to the media file. """
+    return f"{os.path.splitext(media_path)[0]}.info.json{SIDECAR_COMPRESSIONS[compression]}"
+
+
+def playlist_sidecar_path(folder: str, info: dict, compression: str) -> str:
+    """ One JSON Lines file per playlist: <playlist title> [<playlist id>].info.jsonl[.gz|.zst] """
+    title = re.sub(r'[\\/:*?"<>|\x00-\x1f]+', "_", str(info.get("playlist_title") or info.get("playlist") or "playlist")).strip(" .")
+    return os.path.join(folder, f"{title[:100]} [{info.get('playlist_id')}].info.jsonl{SIDECAR_COMPRESSIONS[compression]}")
+
+
+def write_sidecar(record: dict, media_path: str, compression: str = "gzip", per_playlist: bool = False) -> str:
+    """
+    Writes a (compacted) info dict and returns the file it went to.
+
+    With per_playlist, playlist entries are appended as one line each to the playlist's
+    file. Compressed data is appended as a new gzip member / zstd frame, which readers
+    decode as one continuous stream, so nothing already written is rewritten.
+    """
+    compression = resolve_compression(compression)
+    if per_playlist and record.get("playlist_id"):
+        path = playlist_sidecar_path(os.path.dirname(media_path), record, compression)
+        with _append_lock, open(path, "ab") as f:
+            f.write(_compress(_encode(record) + b"\n", compression))
+        return path
+    path = sidecar_path(media_path, compression)
+    temp_path = f"{path}.part"
+    with open(temp_path, "wb") as f:
+        f.write(_compress(_encode(record), compression))
+    os.replace(temp_path, path)
+    return path
+
+
+# --- Reading ---
+def _open_text(path: str) -> io.TextIOBase:
+    """ Opens a sidecar for reading text, detecting the compression from its first bytes. """
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if magic == ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError(f"'{path}' is zstd-compressed; install 'zstandard' to read it.")
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_sidecar(path: str):
+    """
+    Yields the info dicts stored in a sidecar: one for a per-video file, one per line for
+    a playlist file. Plain yt-dlp .info.json files are read too.
+    """
+    with _open_text(path) as f:
+        if ".info.jsonl" in os.path.basename(path):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield json.load(f)
+
+
+def load_sidecar(path: str) -> dict | list[dict]:
+    """ The info dict of a per-video sidecar, or the list of entries of a playlist sidecar. """
+    records = list(iter_sidecar(path))
+    return records if ".info.jsonl" in os.path.basename(path) else records[0]
+
+
+if __name__ == "__main__":
+    # Decompress a sidecar to stdout: python -m utils.sidecars <file>
+    import sys
+    for sidecar in sys.argv[1:]:
+        for entry in iter_sidecar(sidecar):
+            print(json.dumps(entry, ensure_ascii=False, indent=2))
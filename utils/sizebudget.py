@@ -0,0 +1,150 @@
+"""Size-budgeted downloads: the best formats that fit a byte cap, and bitrates for transcoding into it"""
+import re
+
+_SIZE = re.compile(r"^(\d+(?:\.\d+)?)\s*(?:([kmgt])(i?)b?|b)?$")
+_UNITS = {"k": 1, "m": 2, "g": 3, "t": 4}
+# Container, index and stream overhead kept free when targeting a bitrate
+CONTAINER_OVERHEAD = 0.03
+MIN_VIDEO_KBPS = 64
+MIN_AUDIO_KBPS = 24
+MAX_AUDIO_KBPS = 128
+# Tallest picture worth encoding at a video bitrate (kbps); less bitrate is better spent on fewer pixels
+BITRATE_HEIGHTS = ((4000, None), (2000, 1080), (1000, 720), (500, 480), (250, 360), (0, 240))
+
+
+def parse_size(text: str) -> int:
+    """
+    Bytes from '50M', '50 MB', '1.5G', '700k' or '48MiB' (decimal units unless 'i' is given);
+    a bare number is megabytes. Raises ValueError for anything else.
+    """
+    match = _SIZE.match(text.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid size: '{text}' (e.g. 50MB, 1.5G)")
+    number, unit, binary = match.groups()
+    if unit is None and not text.strip().lower().endswith("b"):
+        unit = "m"
+    size = float(number) * ((1024 if binary else 1000) ** _UNITS[unit] if unit else 1)
+    if size < 1:
+        raise ValueError(f"Size must be positive: '{text}'")
+    return int(size)
+
+
+def format_size(fmt: dict) -> int | None:
+    """ Known or estimated size of a format in bytes, None if yt-dlp has neither. """
+    return fmt.get("filesize") or fmt.get("filesize_approx") or None
+
+
+def estimate_missing_sizes(formats: list[dict], duration: float | None) -> int:
+    """
+    Gives formats without a size an estimate from their bitrate and the duration, as yt-dlp
+    already does for progressive formats. For HLS/DASH the manifest's bitrate is often the
+    peak, so these estimates err on the large side. Returns the number of formats estimated.
+    """
+    if not duration:
+        return 0
+    from yt_dlp.utils import filesize_from_tbr # Not at module level: the GUI imports parse_size before the window shows
+    estimated = 0
+    for fmt in formats:
+        if format_size(fmt) is not None:
+            continue
+        tbr = fmt.get("tbr") or (fmt.get("vbr") or 0) + (fmt.get("abr") or 0)
+        size = filesize_from_tbr(tbr or None, duration)
+        if size:
+            fmt["filesize_approx"] = size
+            estimated += 1
+    return estimated
+
+
+def _has_video(fmt: dict) -> bool:
+    return fmt.get("vcodec") != "none" # Unknown codecs count as present, as in yt-dlp's selector
+
+
+def _has_audio(fmt: dict) -> bool:
+    return fmt.get("acodec") != "none"
+
+
+def _merged(video: dict, audio: dict) -> dict:
+    """ A video+audio selection as yt-dlp's own format selector builds it. """
+    from yt_dlp.utils import get_compatible_ext
+    return {
+        "requested_formats": [video, audio],
+        "format": f"{video.get('format')}+{audio.get('format')}",
+        "format_id": f"{video['format_id']}+{audio['format_id']}",
+        "ext": get_compatible_ext(vcodecs=[video.get("vcodec")], acodecs=[audio.get("acodec")],
+                                  vexts=[video["ext"]], aexts=[audio["ext"]]),
+        "protocol": f"{video.get('protocol')}+{audio.get('protocol')}",
+        "filesize_approx": format_size(video) + format_size(audio),
+        "tbr": (video.get("tbr") or video.get("vbr") or 0) + (audio.get("tbr") or audio.get("abr") or 0),
+        "width": video.get("width"), "height": video.get("height"), "resolution": video.get("resolution"),
+        "fps": video.get("fps"), "dynamic_range": video.get("dynamic_range"), "vcodec": video.get("vcodec"),
+        "vbr": video.get("vbr"), "aspect_ratio": video.get("aspect_ratio"),
+        "acodec": audio.get("acodec"), "abr": audio.get("abr"), "asr": audio.get("asr"),
+        "audio_channels": audio.get("audio_channels"),
+    }
+
+
+class SizeBudgetSelector:
+    """
+    yt-dlp format selector (YoutubeDL.format_selector) that picks the best format, or video+audio
+    pair, whose known or estimated size fits the budget. yt-dlp lists formats worst to best, so
+    the first fit counting down from the best wins; video quality comes first, then audio, and
+    audio in the video's own container is preferred. When sizes are known but nothing fits, the
+    smallest selection is downloaded (to be transcoded into the budget afterwards); without any
+    sizes the regular selection (fallback) is used.
+    """
+    def __init__(self, budget: int, audio_only: bool = False, max_height: int | None = None, fallback=None, report=None):
+        self.budget = budget
+        self.audio_only = audio_only
+        self.max_height = max_height
+        self.fallback = fallback
+        self.report = report or (lambda message: None)
+
+    def _candidates(self, formats):
+        """ Selections from best to worst. """
+        audios = [fmt for fmt in reversed(formats) if _has_audio(fmt) and not _has_video(fmt)]
+        if self.audio_only:
+            yield from audios or (fmt for fmt in reversed(formats) if _has_audio(fmt))
+            return
+        for fmt in reversed(formats):
+            if not _has_video(fmt) or self.max_height and (fmt.get("height") or 0) > self.max_height:
+                continue
+            if _has_audio(fmt):
+                yield fmt
+                continue
+            matching = {"mp4": ("m4a", "mp4"), "webm": ("webm",)}.get(fmt.get("ext"), ())
+            for audio in sorted(audios, key=lambda audio: audio.get("ext") not in matching): # Stable: keeps best first
+                if format_size(fmt) is not None and format_size(audio) is not None:
+                    yield _merged(fmt, audio)
+
+    def __call__(self, ctx):
+        from yt_dlp.utils import format_bytes
+        candidates = [fmt for fmt in self._candidates(list(ctx["formats"])) if format_size(fmt) is not None]
+        if not candidates:
+            self.report("[info] Size budget: no format sizes known, using the regular selection")
+            if self.fallback is not None:
+                yield from self.fallback(ctx)
+            return
+        selection = next((fmt for fmt in candidates if format_size(fmt) <= self.budget), None)
+        if selection is not None:
+            self.report(f"[info] Size budget {format_bytes(self.budget)}: format {selection['format_id']} "
+                        f"(~{format_bytes(format_size(selection))})")
+        else:
+            selection = min(candidates, key=format_size)
+            self.report(f"[info] Size budget {format_bytes(self.budget)}: nothing fits, downloading the smallest "
+                        f"format {selection['format_id']} (~{format_bytes(format_size(selection))}) to transcode")
+        yield selection
+
+
+def budget_bitrates(budget: int, duration: float, has_video: bool, audio_streams: int = 1) -> tuple[int | None, int, int | None]:
+    """
+    (video kbps, audio kbps per stream, height limit) for re-encoding a file of this duration
+    into budget bytes. Video gets what the audio leaves (None without video); the height limit
+    (None: keep) scales the picture to what the video bitrate can carry.
+    """
+    total_kbps = budget * 8 * (1 - CONTAINER_OVERHEAD) / duration / 1000
+    if not has_video:
+        return None, max(MIN_AUDIO_KBPS, int(total_kbps / max(audio_streams, 1))), None
+    audio_kbps = min(MAX_AUDIO_KBPS, max(MIN_AUDIO_KBPS, int(total_kbps / 8)))
+    video_kbps = max(MIN_VIDEO_KBPS, int(total_kbps - audio_kbps * audio_streams))
+    height = next(height for minimum, height in BITRATE_HEIGHTS if video_kbps >= minimum)
+    return video_kbps, audio_kbps, height
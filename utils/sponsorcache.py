@@ -0,0 +1,62 @@
+"""Local cache of SponsorBlock segments per video, so repeat jobs don't query the API again"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+try:
+    from utils.config import config_folder
+except ImportError:
+    config_folder = os.path.join(tempfile.gettempdir(), "ForgeYT")
+
+SPONSORBLOCK_CACHE_FOLDER = os.path.join(config_folder, "sponsorblock")
+DEFAULT_SPONSORBLOCK_API_URL = "https://sponsor.ajay.app"
+DEFAULT_SPONSORBLOCK_CACHE_HOURS = 24
+
+
+def segment_cache_key(api_url: str, service: str, video_id: str, categories) -> str:
+    """ Results depend on the API instance and the requested categories, not only the video. """
+    categories = ",".join(sorted(categories or ()))
+    return hashlib.sha256(f"{api_url.rstrip('/')}\n{service}\n{video_id}\n{categories}".encode("utf-8")).hexdigest()
+
+
+class SponsorSegmentCache:
+    """
+    SponsorBlock API results as one small JSON file per video.
+
+    Entries younger than ttl_hours are used instead of querying the API. Older entries are
+    kept: they are refreshed on the next query, and used if the API can't be reached.
+    "No segments" is cached too, since most videos have none.
+    """
+    def __init__(self, folder: str = SPONSORBLOCK_CACHE_FOLDER, ttl_hours: float = DEFAULT_SPONSORBLOCK_CACHE_HOURS):
+        self.folder = folder
+        self.ttl_hours = ttl_hours
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.json")
+
+    def get(self, api_url: str, service: str, video_id: str, categories, allow_stale: bool = False,
+            now: float | None = None) -> list | None:
+        """ The cached segment list (possibly empty), or None if there is no usable entry. """
+        try:
+            with open(self._path(segment_cache_key(api_url, service, video_id, categories)), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            fetched_at, segments = entry["fetched_at"], entry["segments"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        now = time.time() if now is None else now
+        fresh = self.ttl_hours > 0 and 0 <= now - fetched_at < self.ttl_hours * 3600
+        return segments if fresh or allow_stale else None
+
+    def put(self, api_url: str, service: str, video_id: str, categories, segments: list):
+        """ Stores the API result atomically; failures only cost a fresh query next time. """
+        path = self._path(segment_cache_key(api_url, service, video_id, categories))
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=".segments-", suffix=".tmp", dir=self.folder)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"video_id": video_id, "fetched_at": time.time(), "segments": segments}, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not cache SponsorBlock segments: {e}")
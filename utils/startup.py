@@ -0,0 +1,203 @@
+"""Startup instrumentation: times launch phases and module imports and keeps a JSON report per launch"""
+import builtins
+import importlib.util
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from utils.config import config_folder, CURRENT_VERSION
+except ImportError:
+    import tempfile
+    config_folder = os.path.join(tempfile.gettempdir(), "ForgeYT")
+    CURRENT_VERSION = "0.0.0-fallback"
+
+STARTUP_REPORT_FOLDER = os.path.join(config_folder, "startup_reports")
+STARTUP_REPORT_LIMIT = 20   # Older reports are deleted
+STARTUP_TOP_IMPORTS = 25    # Slowest imports kept in a report
+
+
+class StartupProfiler:
+    """
+    Records how long each startup phase and each (first) module import takes.
+
+    Nothing is recorded until start() is called, so phase() is free in normal use.
+    Imports are timed by wrapping builtins.__import__ on the main thread; the time of a
+    module includes the modules it imports itself ("cumulative"), "self" excludes them.
+    """
+    def __init__(self):
+        self.active = False
+        self.started_at = None
+        self.phases = []            # [(name, start offset s, duration s)]
+        self.imports = {}           # module -> [cumulative s, self s]
+        self._import_stack = []     # child time accumulated per open import
+        self._original_import = builtins.__import__
+        self._hooked = False
+        self._main_thread = None
+
+    # --- Control ---
+    def start(self, started_at: float | None = None, track_imports: bool = True):
+        """ Begins profiling; started_at is a time.perf_counter() value taken earlier in the launch. """
+        self.active = True
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self._main_thread = threading.get_ident()
+        if track_imports and not self._hooked:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+            self._hooked = True
+
+    def finish(self, write: bool = True) -> dict | None:
+        """ Stops profiling and returns the report (also written to disk unless write=False). """
+        if not self.active:
+            return None
+        total = time.perf_counter() - self.started_at
+        self.active = False
+        if self._hooked:
+            # Other threads may still be inside _timed_import; it keeps using the saved original
+            builtins.__import__ = self._original_import
+            self._hooked = False
+        report = self.build_report(total)
+        if write:
+            try:
+                report["path"] = write_report(report)
+            except OSError as e:
+                print(f"Warning: Could not write startup report: {e}")
+        return report
+
+    @contextmanager
+    def phase(self, name: str):
+        """ Times a named startup phase (no-op when the profiler isn't running). """
+        if not self.active:
+            yield
+            return
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phases.append((name, begin - self.started_at, end - begin))
+
+    def mark(self, name: str, begin: float):
+        """ Records a phase that started at begin (perf_counter) and ends now. """
+        if self.active:
+            self.phases.append((name, begin - self.started_at, time.perf_counter() - begin))
+
+    # --- Import Timing ---
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if not self.active or threading.get_ident() != self._main_thread:
+            return original(name, globals, locals, fromlist, level)
+        module = self._first_new_module(name, globals, fromlist, level)
+        if module is None: # Already imported, nothing to time
+            return original(name, globals, locals, fromlist, level)
+        self._import_stack.append(0.0)
+        begin = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - begin
+            children = self._import_stack.pop()
+            if self._import_stack:
+                self._import_stack[-1] += elapsed
+            if module in sys.modules:
+                timing = self.imports.setdefault(module, [0.0, 0.0])
+                timing[0] += elapsed
+                timing[1] += elapsed - children
+
+    @staticmethod
+    def _first_new_module(name, globals, fromlist, level) -> str | None:
+        """ Absolute name of the module this import statement loads for the first time, if any. """
+        try:
+            absolute = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__")) if level else name
+        except (ImportError, ValueError):
+            return None
+        if absolute not in sys.modules:
+            return absolute
+        for item in fromlist or ():
+            submodule = f"{absolute}.{item}"
+            if item != "*" and submodule not in sys.modules and hasattr(sys.modules[absolute], "__path__"):
+                # 'from package import submodule' loads it if it isn't an attribute yet
+                if not hasattr(sys.modules[absolute], item):
+                    return submodule
+        return None
+
+    # --- Report ---
+    def build_report(self, total: float) -> dict:
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)[:STARTUP_TOP_IMPORTS]
+        return {
+            "version": CURRENT_VERSION,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "total_ms": round(total * 1000, 1),
+            "phases": [{"name": name, "start_ms": round(start * 1000, 1), "duration_ms": round(duration * 1000, 1)}
+                       for name, start, duration in self.phases],
+            "imports": [{"module": module, "cumulative_ms": round(cumulative * 1000, 1), "self_ms": round(own * 1000, 1)}
+                        for module, (cumulative, own) in slowest],
+        }
+
+
+profiler = StartupProfiler()
+
+
+# --- Report Files ---
+def write_report(report: dict, folder: str = STARTUP_REPORT_FOLDER, limit: int = STARTUP_REPORT_LIMIT) -> str:
+    """ Writes a report as startup-<timestamp>.json and deletes the oldest beyond limit. Returns its path. """
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"startup-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    for old in list_reports(folder)[limit:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return path
+
+
+def list_reports(folder: str = STARTUP_REPORT_FOLDER) -> list[str]:
+    """ Report paths, newest first. """
+    try:
+        names = [n for n in os.listdir(folder) if n.startswith("startup-") and n.endswith(".json")]
+    except OSError:
+        return []
+    return [os.path.join(folder, n) for n in sorted(names, reverse=True)]
+
+
+def load_reports(count: int = 2, folder: str = STARTUP_REPORT_FOLDER) -> list[dict]:
+    """ Loads up to count reports, newest first; unreadable files are skipped. """
+    reports = []
+    for path in list_reports(folder):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                reports.append(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            continue
+        if len(reports) >= count:
+            break
+    return reports
+
+
+def format_report(report: dict, previous: dict | None = None) -> str:
+    """ Human-readable report; with previous, every phase shows its change against that launch. """
+    def delta(current, before):
+        return f" ({current - before:+.1f})" if before is not None else ""
+
+    previous_phases = {p["name"]: p["duration_ms"] for p in (previous or {}).get("phases", [])}
+    lines = [f"Startup report {report.get('timestamp', '?')} - ForgeYT {report.get('version', '?')}, "
+             f"Python {report.get('python', '?')}{' (frozen)' if report.get('frozen') else ''}",
+             f"Total: {report.get('total_ms', 0):.1f} ms{delta(report.get('total_ms', 0), (previous or {}).get('total_ms'))}"]
+    if previous:
+        lines.append(f"Compared with {previous.get('timestamp', '?')} (version {previous.get('version', '?')})")
+    lines.append("Phases (ms):")
+    for p in report.get("phases", []):
+        lines.append(f"  {p['name']:<28} {p['duration_ms']:>8.1f}{delta(p['duration_ms'], previous_phases.get(p['name']))}")
+    lines.append("Slowest imports (cumulative / self ms):")
+    for imp in report.get("imports", []):
+        lines.append(f"  {imp['module']:<28} {imp['cumulative_ms']:>8.1f} / {imp['self_ms']:.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,240 @@
+"""Subtitle conversion (VTT/TTML/JSON3/SRV -> SRT/ASS) in-process, without FFmpeg"""
+import html
+import json
+import re
+import xml.etree.ElementTree as ElementTree
+
+SUBTITLE_TARGET_FORMATS = ("srt", "ass")
+SUBTITLE_SOURCE_FORMATS = ("vtt", "srt", "ttml", "dfxp", "xml", "srv1", "srv2", "srv3", "json3")
+# Rolling auto-captions: a cue continuing the previous one starts within this many seconds of its end
+ROLLING_GAP = 0.05
+
+_VTT_TIMING = re.compile(r"^\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})\s+-->\s+((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})")
+_TAG = re.compile(r"<[^>]*>")
+
+
+class SubtitleError(ValueError):
+    """ Raised for subtitle files that can't be parsed. """
+
+
+def _clock(text: str) -> float:
+    """ Seconds from 'hh:mm:ss.mmm', 'mm:ss.mmm' or the SRT form 'hh:mm:ss,mmm'. """
+    seconds = 0.0
+    for part in text.strip().replace(",", ".").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def _clean_text(text: str) -> str:
+    """ Plain text of a cue: markup removed, entities decoded, blank lines dropped. """
+    lines = (html.unescape(_TAG.sub("", line)).replace("\u200e", "").replace("\u200f", "").strip()
+             for line in text.replace("\r", "").split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def parse_vtt(text: str) -> list[tuple[float, float, str]]:
+    """
+    (start, end, text) cues of a WebVTT (or SRT) file; styles, notes and regions are skipped.
+    Only empty lines end a cue: YouTube's captions have whitespace-only lines inside cues.
+    """
+    cues, current = [], None
+    def finish():
+        cue_text = _clean_text("\n".join(current[2]))
+        if cue_text:
+            cues.append((current[0], current[1], cue_text))
+    for line in text.replace("\r\n", "\n").replace("\r", "\n").lstrip("\ufeff").split("\n"):
+        match = _VTT_TIMING.match(line)
+        if match:
+            if current:
+                lines = current[2]
+                if lines and (not lines[-1].strip() or len(lines) > 1 and not lines[-2].strip()):
+                    lines.pop() # The separator or the next cue's identifier (SRT with whitespace-only separators)
+                finish()
+            current = (_clock(match.group(1)), _clock(match.group(2)), [])
+        elif current is None:
+            continue # Header, NOTE, STYLE or REGION block, or a cue identifier
+        elif line:
+            current[2].append(line)
+        else:
+            finish()
+            current = None
+    if current:
+        finish()
+    return cues
+
+
+def _ttml_time(value: str | None, tick_rate: float, frame_rate: float) -> float | None:
+    """ Seconds from a TTML time expression ('00:00:01.500', '00:00:01:12', '1.5s', '1500ms', '15000000t'). """
+    if not value:
+        return None
+    value = value.strip()
+    match = re.fullmatch(r"(\d+):(\d{2}):(\d{2})(?:\.(\d+)|:(\d+))?", value)
+    if match:
+        hours, minutes, seconds, fraction, frames = match.groups()
+        total = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+        if fraction:
+            total += float(f"0.{fraction}")
+        elif frames:
+            total += int(frames) / frame_rate
+        return total
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)(h|m|s|ms|f|t)", value)
+    if not match:
+        raise SubtitleError(f"Invalid TTML time '{value}'")
+    number, unit = float(match.group(1)), match.group(2)
+    return number * {"h": 3600, "m": 60, "s": 1, "ms": 0.001, "f": 1 / frame_rate, "t": 1 / tick_rate}[unit]
+
+
+def _local_name(element) -> str:
+    return element.tag.rsplit("}", 1)[-1] if isinstance(element.tag, str) else ""
+
+
+def _ttml_text(element) -> str:
+    parts = [element.text or ""]
+    for child in element:
+        parts.append("\n" if _local_name(child) == "br" else _ttml_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def parse_ttml(text: str) -> list[tuple[float, float, str]]:
+    """ Cues of a TTML/DFXP file, or of YouTube's srv1/srv2/srv3 XML formats. """
+    try:
+        root = ElementTree.fromstring(text.lstrip("\ufeff").encode("utf-8"))
+    except ElementTree.ParseError as e:
+        raise SubtitleError(f"Invalid XML subtitles: {e}") from e
+    if _local_name(root) in ("transcript", "timedtext"):
+        return _parse_srv(root)
+    attributes = {key.rsplit("}", 1)[-1]: value for key, value in root.attrib.items()}
+    tick_rate = float(attributes.get("tickRate") or 10_000_000)
+    frame_rate = float(attributes.get("frameRate") or 30)
+    cues = []
+    for element in root.iter():
+        if _local_name(element) != "p":
+            continue
+        start = _ttml_time(element.get("begin"), tick_rate, frame_rate)
+        end = _ttml_time(element.get("end"), tick_rate, frame_rate)
+        duration = _ttml_time(element.get("dur"), tick_rate, frame_rate)
+        if start is None:
+            continue
+        if end is None:
+            end = start + (duration or 0)
+        cue_text = _clean_text(_ttml_text(element))
+        if cue_text and end > start:
+            cues.append((start, end, cue_text))
+    return cues
+
+
+def _parse_srv(root) -> list[tuple[float, float, str]]:
+    """ srv1 (<text start dur>, seconds) and srv2/srv3 (<text t d> / <p t d>, milliseconds). """
+    cues = []
+    for element in root.iter():
+        name = _local_name(element)
+        if name == "text" and element.get("start") is not None:
+            start, duration = float(element.get("start")), float(element.get("dur") or 0)
+        elif name in ("text", "p") and element.get("t") is not None:
+            start, duration = int(element.get("t")) / 1000, int(element.get("d") or 0) / 1000
+        else:
+            continue
+        cue_text = _clean_text(_ttml_text(element))
+        if cue_text and duration > 0:
+            cues.append((start, start + duration, cue_text))
+    return cues
+
+
+def parse_json3(text: str) -> list[tuple[float, float, str]]:
+    """ Cues of YouTube's json3 format (events with tStartMs/dDurationMs and utf8 segments). """
+    try:
+        events = json.loads(text).get("events") or []
+    except (ValueError, AttributeError) as e:
+        raise SubtitleError(f"Invalid json3 subtitles: {e}") from e
+    cues = []
+    for event in events:
+        cue_text = _clean_text("".join(seg.get("utf8", "") for seg in event.get("segs") or []))
+        start, duration = event.get("tStartMs"), event.get("dDurationMs")
+        if cue_text and start is not None and duration:
+            cues.append((start / 1000, (start + duration) / 1000, cue_text))
+    return cues
+
+
+def merge_rolling_lines(cues: list[tuple[float, float, str]]) -> list[tuple[float, float, str]]:
+    """
+    Removes the repetition in YouTube's auto-generated captions, where every cue repeats the
+    line(s) still on screen from the previous one and a 10 ms cue bridges each scroll step.
+    Each line is kept once, from its first appearance until it is last shown; cues that only
+    repeat text extend the previous cue instead.
+    """
+    merged, previous_lines = [], []
+    for start, end, text in cues:
+        lines = text.split("\n")
+        continues = merged and start <= merged[-1][1] + ROLLING_GAP
+        overlap = 0
+        if continues:
+            overlap = next((n for n in range(min(len(lines), len(previous_lines)), 0, -1)
+                            if lines[:n] == previous_lines[-n:]), 0)
+        previous_lines = lines
+        new_lines = lines[overlap:]
+        if new_lines:
+            merged.append((start, end, "\n".join(new_lines)))
+        elif merged[-1][1] < end:
+            merged[-1] = (merged[-1][0], end, merged[-1][2])
+    return merged
+
+
+def _srt_time(seconds: float) -> str:
+    milliseconds = max(0, int(round(seconds * 1000)))
+    hours, rest = divmod(milliseconds, 3600_000)
+    minutes, rest = divmod(rest, 60_000)
+    return f"{hours:02d}:{minutes:02d}:{rest // 1000:02d},{rest % 1000:03d}"
+
+
+def _ass_time(seconds: float) -> str:
+    centiseconds = max(0, int(round(seconds * 100)))
+    hours, rest = divmod(centiseconds, 360_000)
+    minutes, rest = divmod(rest, 6000)
+    return f"{hours}:{minutes:02d}:{rest // 100:02d}.{rest % 100:02d}"
+
+
+def to_srt(cues: list[tuple[float, float, str]]) -> str:
+    return "".join(f"{index}\n{_srt_time(start)} --> {_srt_time(end)}\n{text}\n\n"
+                   for index, (start, end, text) in enumerate(cues, 1))
+
+
+def to_ass(cues: list[tuple[float, float, str]]) -> str:
+    """ Plain ASS with one default style (like FFmpeg's SRT -> ASS conversion). """
+    header = (
+        "[Script Info]\nScriptType: v4.00+\nPlayResX: 384\nPlayResY: 288\nScaledBorderAndShadow: yes\n\n"
+        "[V4+ Styles]\nFormat: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, "
+        "MarginL, MarginR, MarginV, Encoding\n"
+        "Style: Default,Arial,16,&Hffffff,&Hffffff,&H0,&H0,0,0,0,0,100,100,0,0,1,1,0,2,10,10,10,0\n\n"
+        "[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    )
+    def escape(text):
+        return re.sub(r"([\\{}])", r"\\\1", text).replace("\n", "\\N")
+    return header + "".join(f"Dialogue: 0,{_ass_time(start)},{_ass_time(end)},Default,,0,0,0,,{escape(text)}\n"
+                            for start, end, text in cues)
+
+
+def parse_subtitles(text: str, ext: str) -> list[tuple[float, float, str]]:
+    """ Cues of a subtitle file's contents, by its yt-dlp extension. Raises SubtitleError. """
+    ext = ext.lower()
+    if ext in ("vtt", "srt"):
+        return parse_vtt(text)
+    if ext == "json3":
+        return parse_json3(text)
+    if ext in ("ttml", "dfxp", "xml", "srv1", "srv2", "srv3"):
+        return parse_ttml(text)
+    raise SubtitleError(f"Unsupported subtitle format: {ext}")
+
+
+def convert_subtitles(text: str, ext: str, target: str = "srt", rolling: bool = False) -> str:
+    """
+    Converts subtitles to SRT or ASS. rolling merges the repeated lines of auto-generated
+    captions (merge_rolling_lines). Raises SubtitleError.
+    """
+    if target not in SUBTITLE_TARGET_FORMATS:
+        raise SubtitleError(f"Unsupported subtitle target format: {target}")
+    cues = sorted(parse_subtitles(text, ext), key=lambda cue: cue[0])
+    if rolling:
+        cues = merge_rolling_lines(cues)
+    return to_srt(cues) if target == "srt" else to_ass(cues)
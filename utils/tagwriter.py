@@ -0,0 +1,230 @@
+"""Writing tags, chapters and cover art into finished files in place, without an FFmpeg remux"""
+import base64
+import html
+import os
+import shutil
+import subprocess
+import tempfile
+
+try:
+    import mutagen # Optional; without it tags are written by an FFmpeg remux
+    from mutagen.flac import FLAC, Picture
+    from mutagen.id3 import (
+        APIC, CHAP, COMM, CTOC, ID3, TALB, TCOM, TCON, TDRC, TIT2, TPE1, TPE2, TPOS, TRCK, TXXX, CTOCFlags, ID3NoHeaderError
+    )
+    from mutagen.mp4 import MP4, MP4Cover
+    from mutagen.oggopus import OggOpus
+    from mutagen.oggvorbis import OggVorbis
+except ImportError:
+    mutagen = None
+
+MP4_EXTENSIONS = ("m4a", "mp4", "m4v", "mov")
+VORBIS_COMMENT_EXTENSIONS = ("flac", "ogg", "opus")
+MATROSKA_EXTENSIONS = ("mkv", "mka")
+COVER_MIMETYPES = {b"\xff\xd8\xff": "image/jpeg", b"\x89PNG\r\n\x1a\n": "image/png"}
+
+
+class TagWriteError(Exception):
+    """ Raised when a file's tags can't be written in place (the file is left unchanged or only partly tagged). """
+
+
+def tags_from_info(info: dict) -> dict[str, str]:
+    """ Common tags from a yt-dlp info dict, picked like FFmpegMetadataPP does (empty ones are left out). """
+    def first(*keys):
+        for key in keys:
+            value = info.get(key)
+            if value not in (None, "", []):
+                return ", ".join(map(str, value)) if isinstance(value, (list, tuple)) else str(value)
+        return None
+
+    date = first("release_date", "upload_date")
+    if date and len(date) == 8 and date.isdigit():
+        date = f"{date[:4]}-{date[4:6]}-{date[6:]}"
+    tags = {
+        "title": first("track", "title"),
+        "artist": first("artist", "artists", "creator", "creators", "uploader", "uploader_id"),
+        "album": first("album", "series"),
+        "album_artist": first("album_artist", "album_artists"),
+        "composer": first("composer", "composers"),
+        "date": date,
+        "genre": first("genre", "genres", "categories"),
+        "description": first("description"),
+        "comment": first("webpage_url"),
+        "track": first("track_number"),
+        "disc": first("disc_number"),
+    }
+    return {key: value.replace("\0", "") for key, value in tags.items() if value}
+
+
+def _cover_mimetype(cover: str) -> str | None:
+    """ 'image/jpeg' or 'image/png' from the file's signature; None for other formats (e.g. WebP). """
+    try:
+        with open(cover, "rb") as f:
+            head = f.read(8)
+    except OSError:
+        return None
+    return next((mimetype for magic, mimetype in COVER_MIMETYPES.items() if head.startswith(magic)), None)
+
+
+def _mkvpropedit() -> str | None:
+    return shutil.which("mkvpropedit")
+
+
+def can_write_tags(path: str, chapters: bool = False, cover: str | None = None) -> bool:
+    """ True if write_tags() can handle this file, chapters and cover without FFmpeg. """
+    extension = os.path.splitext(path)[1][1:].lower()
+    if extension in MATROSKA_EXTENSIONS:
+        return _mkvpropedit() is not None
+    if mutagen is None or (cover is not None and _cover_mimetype(cover) is None):
+        return False
+    if extension in MP4_EXTENSIONS:
+        return not chapters # mutagen can't write MP4 chapter tracks
+    return extension == "mp3" or extension in VORBIS_COMMENT_EXTENSIONS
+
+
+def _timestamp(seconds: float) -> str:
+    milliseconds = int(round(seconds * 1000))
+    hours, rest = divmod(milliseconds, 3600_000)
+    minutes, rest = divmod(rest, 60_000)
+    return f"{hours:02d}:{minutes:02d}:{rest // 1000:02d}.{rest % 1000:03d}"
+
+
+def _write_id3(path, tags, chapters, cover):
+    try:
+        id3 = ID3(path)
+    except ID3NoHeaderError:
+        id3 = ID3()
+    frames = {"title": TIT2, "artist": TPE1, "album": TALB, "album_artist": TPE2, "composer": TCOM,
+              "date": TDRC, "genre": TCON, "track": TRCK, "disc": TPOS}
+    for key, frame in frames.items():
+        if key in tags:
+            id3.setall(frame.__name__, [frame(encoding=3, text=[tags[key]])])
+    if "comment" in tags:
+        id3.setall("COMM", [COMM(encoding=3, lang="eng", desc="", text=[tags["comment"]])])
+    if "description" in tags:
+        id3.delall("TXXX:description")
+        id3.add(TXXX(encoding=3, desc="description", text=[tags["description"]]))
+    if chapters:
+        id3.delall("CHAP")
+        id3.delall("CTOC")
+        element_ids = [f"chp{index}" for index in range(len(chapters))]
+        for element_id, chapter in zip(element_ids, chapters):
+            id3.add(CHAP(element_id=element_id, start_time=int(chapter["start_time"] * 1000),
+                         end_time=int(chapter["end_time"] * 1000),
+                         sub_frames=[TIT2(encoding=3, text=[chapter.get("title") or element_id])]))
+        id3.add(CTOC(element_id="toc", flags=CTOCFlags.TOP_LEVEL | CTOCFlags.ORDERED,
+                     child_element_ids=element_ids, sub_frames=[TIT2(encoding=3, text=["Chapters"])]))
+    if cover:
+        with open(cover, "rb") as f:
+            id3.setall("APIC", [APIC(encoding=3, mime=_cover_mimetype(cover), type=3, desc="Cover (front)", data=f.read())])
+    id3.save(path, v2_version=3) # ID3v2.3 like yt-dlp's FFmpeg route, for Windows Explorer
+
+
+def _write_mp4(path, tags, cover):
+    atoms = {"title": "\xa9nam", "artist": "\xa9ART", "album": "\xa9alb", "album_artist": "aART", "composer": "\xa9wrt",
+             "date": "\xa9day", "genre": "\xa9gen", "description": "desc", "comment": "\xa9cmt"}
+    mp4 = MP4(path)
+    if mp4.tags is None:
+        mp4.add_tags()
+    for key, atom in atoms.items():
+        if key in tags:
+            mp4.tags[atom] = [tags[key]]
+    for key, atom in (("track", "trkn"), ("disc", "disk")):
+        if tags.get(key, "").isdigit():
+            mp4.tags[atom] = [(int(tags[key]), 0)]
+    if cover:
+        image_format = MP4Cover.FORMAT_PNG if _cover_mimetype(cover) == "image/png" else MP4Cover.FORMAT_JPEG
+        with open(cover, "rb") as f:
+            mp4.tags["covr"] = [MP4Cover(f.read(), imageformat=image_format)]
+    mp4.save()
+
+
+def _write_vorbis_comments(path, extension, tags, chapters, cover):
+    fields = {"title": "TITLE", "artist": "ARTIST", "album": "ALBUM", "album_artist": "ALBUMARTIST", "composer": "COMPOSER",
+              "date": "DATE", "genre": "GENRE", "description": "DESCRIPTION", "comment": "COMMENT",
+              "track": "TRACKNUMBER", "disc": "DISCNUMBER"}
+    audio = {"flac": FLAC, "opus": OggOpus}.get(extension, OggVorbis)(path)
+    if audio.tags is None:
+        audio.add_tags()
+    for key, field in fields.items():
+        if key in tags:
+            audio.tags[field] = [tags[key]]
+    if chapters: # The CHAPTERxxx convention understood by most Vorbis comment readers
+        for field in [field for field in audio.tags.keys() if field.upper().startswith("CHAPTER")]:
+            del audio.tags[field]
+        for index, chapter in enumerate(chapters, 1):
+            audio.tags[f"CHAPTER{index:03d}"] = [_timestamp(chapter["start_time"])]
+            audio.tags[f"CHAPTER{index:03d}NAME"] = [chapter.get("title") or f"Chapter {index}"]
+    if cover:
+        picture = Picture()
+        picture.type = 3 # Front cover
+        picture.mime = _cover_mimetype(cover)
+        picture.desc = "Cover (front)"
+        with open(cover, "rb") as f:
+            picture.data = f.read()
+        if extension == "flac":
+            audio.clear_pictures()
+            audio.add_picture(picture)
+        else:
+            audio.tags["METADATA_BLOCK_PICTURE"] = [base64.b64encode(picture.write()).decode("ascii")]
+    audio.save()
+
+
+def _write_matroska(path, tags, chapters, cover):
+    names = {"title": "TITLE", "artist": "ARTIST", "album": "ALBUM", "album_artist": "ALBUM_ARTIST", "composer": "COMPOSER",
+             "date": "DATE_RELEASED", "genre": "GENRE", "description": "DESCRIPTION", "comment": "COMMENT",
+             "track": "PART_NUMBER"}
+    work_dir = tempfile.mkdtemp(prefix="forgeyt-tags-")
+    try:
+        cmd = [_mkvpropedit(), path]
+        if "title" in tags:
+            cmd += ["--edit", "info", "--set", f"title={tags['title']}"]
+        simple_tags = "".join(f"<Simple><Name>{name}</Name><String>{html.escape(tags[key], quote=False)}</String></Simple>"
+                              for key, name in names.items() if key in tags)
+        if simple_tags:
+            tags_path = os.path.join(work_dir, "tags.xml")
+            with open(tags_path, "w", encoding="utf-8") as f:
+                f.write(f'<?xml version="1.0" encoding="UTF-8"?><Tags><Tag><Targets><TargetTypeValue>50</TargetTypeValue>'
+                        f'</Targets>{simple_tags}</Tag></Tags>')
+            cmd += ["--tags", f"global:{tags_path}"]
+        if chapters:
+            chapters_path = os.path.join(work_dir, "chapters.txt")
+            with open(chapters_path, "w", encoding="utf-8") as f:
+                for index, chapter in enumerate(chapters, 1):
+                    f.write(f"CHAPTER{index:02d}={_timestamp(chapter['start_time'])}\n"
+                            f"CHAPTER{index:02d}NAME={chapter.get('title') or f'Chapter {index}'}\n")
+            cmd += ["--chapters", chapters_path]
+        if cover:
+            mimetype = _cover_mimetype(cover) or "image/webp"
+            cmd += ["--attachment-name", f"cover.{mimetype.split('/')[1].replace('jpeg', 'jpg')}",
+                    "--attachment-mime-type", mimetype, "--add-attachment", cover]
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="replace")
+        if result.returncode > 1: # 1 means warnings only
+            lines = (result.stdout or result.stderr).strip().splitlines()
+            raise TagWriteError(lines[-1] if lines else f"mkvpropedit exit code {result.returncode}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def write_tags(path: str, tags: dict, chapters: list | None = None, cover: str | None = None):
+    """
+    Writes tags (see tags_from_info), chapters and a cover image into path in place.
+    Only the tag area changes (or grows into its padding), so this takes milliseconds
+    regardless of the file's size. Raises TagWriteError; check can_write_tags() first.
+    """
+    extension = os.path.splitext(path)[1][1:].lower()
+    if not can_write_tags(path, bool(chapters), cover):
+        raise TagWriteError(f"Can't write tags into .{extension} files in place")
+    try:
+        if extension == "mp3":
+            _write_id3(path, tags, chapters, cover)
+        elif extension in MP4_EXTENSIONS:
+            _write_mp4(path, tags, cover)
+        elif extension in VORBIS_COMMENT_EXTENSIONS:
+            _write_vorbis_comments(path, extension, tags, chapters, cover)
+        else:
+            _write_matroska(path, tags, chapters, cover)
+    except TagWriteError:
+        raise
+    except Exception as e: # mutagen raises its own errors for damaged files, OSError for I/O
+        raise TagWriteError(f"{type(e).__name__}: {e}") from e
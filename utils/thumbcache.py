@@ -0,0 +1,112 @@
+"""Local thumbnail cache shared by all jobs and formats, with LRU eviction by total size"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+try:
+    from utils.config import config_folder
+except ImportError:
+    config_folder = os.path.join(tempfile.gettempdir(), "ForgeYT")
+
+THUMBNAIL_CACHE_FOLDER = os.path.join(config_folder, "thumbnails")
+DEFAULT_THUMBNAIL_CACHE_MB = 200
+
+
+def thumbnail_key(video_id: str, thumbnail_url: str) -> str:
+    """ Cache key of one thumbnail: the same video can have several (sizes, custom uploads). """
+    return hashlib.sha256(f"{video_id}\n{thumbnail_url}".encode("utf-8")).hexdigest()
+
+
+class ThumbnailCache:
+    """
+    Thumbnails on disk, named by thumbnail_key() and fanned out over 256 subfolders.
+
+    A hit refreshes the file's mtime, so eviction can drop the least recently used files
+    first once the cache grows beyond max_bytes. The size total is computed by one folder
+    scan per process and then kept up to date by put().
+    """
+    def __init__(self, folder: str = THUMBNAIL_CACHE_FOLDER, max_bytes: int = DEFAULT_THUMBNAIL_CACHE_MB * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self._total_bytes = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.folder, key[:2], f"{key}.{ext}")
+
+    def get(self, video_id: str, thumbnail_url: str, ext: str) -> str | None:
+        """ Path of the cached thumbnail, or None. """
+        if not video_id or not thumbnail_url:
+            return None
+        path = self._path(thumbnail_key(video_id, thumbnail_url), ext)
+        try:
+            os.utime(path) # Mark as recently used
+        except OSError:
+            return None
+        return path
+
+    def put(self, video_id: str, thumbnail_url: str, ext: str, source_path: str) -> str | None:
+        """ Copies a downloaded thumbnail into the cache and returns the cached path. """
+        if not video_id or not thumbnail_url or not os.path.isfile(source_path):
+            return None
+        path = self._path(thumbnail_key(video_id, thumbnail_url), ext)
+        if os.path.exists(path):
+            return self.get(video_id, thumbnail_url, ext)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix=".thumb-", dir=os.path.dirname(path))
+            os.close(fd)
+            shutil.copyfile(source_path, temp_path)
+            os.replace(temp_path, path) # Concurrent jobs never see a partial file
+        except OSError as e:
+            print(f"Warning: Could not cache thumbnail: {e}")
+            return None
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += os.path.getsize(path)
+        self.evict()
+        return path
+
+    def copy_to(self, cached_path: str, target_path: str) -> bool:
+        """ Places a copy of a cached thumbnail at target_path (a copy, since postprocessors may delete or convert it). """
+        try:
+            os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+            shutil.copyfile(cached_path, target_path)
+            return True
+        except OSError as e:
+            print(f"Warning: Could not reuse cached thumbnail: {e}")
+            return False
+
+    def _scan(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                if name.startswith(".thumb-"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """ Deletes least recently used thumbnails until the cache fits max_bytes. """
+        with self._lock:
+            if self._total_bytes is not None and self._total_bytes <= self.max_bytes:
+                return
+            entries = self._scan()
+            self._total_bytes = sum(size for _, size, _ in entries)
+            if self._total_bytes <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes * 0.9: # Leave some headroom, so not every put() rescans
+                    break
@@ -0,0 +1,72 @@
+"""Cache for the update check: last result, its ETag and when it was fetched"""
+import json
+import os
+import tempfile
+import time
+
+try:
+    from utils.config import config_folder
+except ImportError:
+    config_folder = os.path.join(tempfile.gettempdir(), "ForgeYT")
+
+DEFAULT_RELEASES_API_URL = "https://api.github.com/repos/bytewired9/forgeyt/releases/latest"
+UPDATE_CACHE_FILE = os.path.join(config_folder, "update_check.json")
+# Choices offered on the settings page (label -> hours; 0 checks on every launch)
+UPDATE_CHECK_INTERVALS = {"Every launch": 0, "Daily": 24, "Weekly": 168}
+UPDATE_CHECK_DELAY_MS = 2000 # Startup delay, so the check never competes with the first paint
+
+
+def load_update_cache(cache_file: str = UPDATE_CACHE_FILE) -> dict:
+    """
+    Returns the cached check result, or {} if there is none.
+
+    Keys: api_url, checked_at (epoch seconds), etag, latest_version.
+    """
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_update_cache(cache: dict, cache_file: str = UPDATE_CACHE_FILE):
+    """ Writes the cache atomically; failures only cost a fresh check next time. """
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".update-", suffix=".tmp", dir=os.path.dirname(cache_file))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=4)
+        os.replace(temp_path, cache_file)
+    except OSError as e:
+        print(f"Warning: Could not write update check cache: {e}")
+
+
+def update_check_due(cache: dict, api_url: str, interval_hours: float, now: float | None = None) -> bool:
+    """ True if the cached result is missing, for another URL, or older than the interval. """
+    if interval_hours <= 0 or cache.get("api_url") != api_url or "latest_version" not in cache:
+        return True
+    checked_at = cache.get("checked_at")
+    if not isinstance(checked_at, (int, float)):
+        return True
+    now = time.time() if now is None else now
+    return now - checked_at >= interval_hours * 3600 or now < checked_at # Clock went backwards: check again
+
+
+def is_newer_version(current_version: str, latest_version: str) -> bool:
+    """ Compares two version strings (e.g., '1.2.3'). Handles 'v' prefix. """
+    try:
+        current_parts = list(map(int, current_version.lstrip('v').split('.')))
+        latest_parts = list(map(int, latest_version.lstrip('v').split('.')))
+
+        for i in range(max(len(current_parts), len(latest_parts))):
+            c_part = current_parts[i] if i < len(current_parts) else 0
+            l_part = latest_parts[i] if i < len(latest_parts) else 0
+            if l_part > c_part:
+                return True
+            if l_part < c_part:
+                return False
+        return len(latest_parts) > len(current_parts)
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"Warning: Could not compare version numbers ('{current_version}', '{latest_version}'). Error: {e}")
+        return False